@@ -6,4 +6,10 @@ class AppConfig(AppConfig):
     name = 'app'    
     def ready(self):
         """Register signals when app is ready"""
-        import app.signals  # Import signals to register them
\ No newline at end of file
+        import app.signals  # Import signals to register them
+        
+        # Serving workers can load the ML engines up front (see ml/engines.py)
+        from django.conf import settings
+        if getattr(settings, 'ML_WARMUP_ON_STARTUP', False):
+            from ml.engines import warm_up
+            warm_up()
\ No newline at end of file
@@ -0,0 +1,76 @@
+"""
+Django management command for offline ranking-quality and latency evaluation
+Trains on older interactions, tests on newer ones and writes a JSON report
+Usage: python manage.py evaluate_recommendations --k 10 --output report.json
+"""
+
+from django.core.management.base import BaseCommand
+from ml.ranking_evaluation import evaluate
+import json
+
+
+class Command(BaseCommand):
+    help = 'Evaluate recommendation quality (precision/recall/NDCG@k, coverage) and latency'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--k',
+            type=int,
+            default=10,
+            help='Cut-off rank for the metrics',
+        )
+        parser.add_argument(
+            '--test-fraction',
+            type=float,
+            default=0.2,
+            help='Newest share of interactions held out for testing',
+        )
+        parser.add_argument(
+            '--latency-samples',
+            type=int,
+            default=200,
+            help='Timed calls per endpoint',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+            help='Seed for the latency request sample',
+        )
+        parser.add_argument(
+            '--output',
+            type=str,
+            default=None,
+            help='Write the JSON report to this file (default: print it)',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('\n📊 Evaluating Recommendation Engine\n'))
+
+        report = evaluate(
+            k=options['k'],
+            test_fraction=options['test_fraction'],
+            latency_samples=options['latency_samples'],
+            seed=options['seed'],
+        )
+        if report is None:
+            self.stdout.write(self.style.ERROR('❌ Evaluation failed. Check logs above.'))
+            return
+
+        for name, metrics in report['metrics'].items():
+            summary = ', '.join(
+                f'{metric}={value:.4f}' for metric, value in metrics.items() if metric != 'users'
+            )
+            self.stdout.write(f'   • {name} ({metrics["users"]} users): {summary}')
+        for name, latency in report['latency_ms'].items():
+            if latency:
+                self.stdout.write(
+                    f'   • {name}: p50={latency["p50"]}ms p95={latency["p95"]}ms p99={latency["p99"]}ms'
+                )
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'\n✅ Report written to {options["output"]}'))
+        else:
+            self.stdout.write(json.dumps(report, indent=2))
@@ -0,0 +1,345 @@
+"""
+Django management command to generate a large synthetic store for load and
+scale testing: users, sellers, products, power-law distributed interactions,
+carts, orders and order tracking updates. Everything is derived from --seed,
+so the same arguments produce the same data on any machine.
+Usage: python manage.py generate_synthetic_data --products 50000 --interactions 2000000 --seed 42
+"""
+
+from contextlib import contextmanager
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+from app.models import (
+    Product, SellerProfile, UserInteraction, Cart, CartItem, Order, OrderItem, OrderTracking
+)
+import numpy as np
+import time
+
+
+CATEGORIES = [
+    'electronics', 'accessories', 'fashion', 'footwear', 'home', 'kitchen',
+    'books', 'sports', 'beauty', 'toys', 'grocery', 'furniture',
+    'automotive', 'garden', 'health', 'music', 'office', 'pets',
+]
+ADJECTIVES = [
+    'Classic', 'Smart', 'Portable', 'Premium', 'Compact', 'Wireless', 'Eco',
+    'Deluxe', 'Ultra', 'Essential', 'Pro', 'Mini', 'Vintage', 'Modern',
+]
+NOUNS = [
+    'Kit', 'Set', 'Pack', 'Edition', 'Bundle', 'Series', 'Collection',
+    'Model', 'Station', 'Organizer', 'Holder', 'Device', 'Combo',
+]
+CITIES = ['Mumbai', 'Delhi', 'Bengaluru', 'Hyderabad', 'Chennai', 'Kolkata', 'Pune', 'Jaipur']
+
+INTERACTION_MIX = {
+    'view': 0.60,
+    'click': 0.18,
+    'cart': 0.08,
+    'wishlist': 0.05,
+    'purchase': 0.06,
+    'rating': 0.03,
+}
+ORDER_STATUS_MIX = {
+    'pending': 0.10,
+    'confirmed': 0.15,
+    'shipped': 0.20,
+    'delivered': 0.50,
+    'cancelled': 0.05,
+}
+TRACKING_STEPS = {
+    'pending': ['pending'],
+    'confirmed': ['pending', 'confirmed'],
+    'shipped': ['pending', 'confirmed', 'shipped'],
+    'delivered': ['pending', 'confirmed', 'shipped', 'delivered'],
+    'cancelled': ['pending', 'cancelled'],
+}
+
+
+@contextmanager
+def explicit_timestamps(*fields):
+    """Let bulk_create store generated dates in auto_now/auto_now_add fields"""
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field, _, _ in saved:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def power_law_weights(n, exponent, rng):
+    """Zipf-like probabilities over n items in random order"""
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    rng.shuffle(weights)
+    return weights / weights.sum()
+
+
+class Command(BaseCommand):
+    help = 'Generate a reproducible synthetic catalog, user base and interaction history'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000, help='Customer accounts')
+        parser.add_argument('--sellers', type=int, default=100, help='Seller accounts')
+        parser.add_argument('--products', type=int, default=20000, help='Products')
+        parser.add_argument('--interactions', type=int, default=500000, help='UserInteraction rows')
+        parser.add_argument('--carts', type=int, default=3000, help='Users with a non-empty cart')
+        parser.add_argument('--orders', type=int, default=20000, help='Orders (with items and tracking)')
+        parser.add_argument('--days', type=int, default=90, help='History length in days')
+        parser.add_argument('--popularity-exponent', type=float, default=1.1,
+                            help='Zipf exponent of product popularity')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Rows per bulk_create')
+        parser.add_argument('--prefix', type=str, default='synth',
+                            help='Username prefix of generated accounts')
+        parser.add_argument('--clear', action='store_true',
+                            help='Delete data generated earlier with the same prefix first')
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('\n🧪 Generating Synthetic Data\n'))
+
+        self.rng = np.random.default_rng(options['seed'])
+        self.chunk_size = options['chunk_size']
+        self.prefix = options['prefix']
+        self.now = timezone.now().replace(microsecond=0)
+        self.days = options['days']
+        start_time = time.time()
+
+        if options['clear']:
+            deleted, _ = User.objects.filter(username__startswith=f'{self.prefix}_').delete()
+            self.stdout.write(f'   • Removed {deleted} previously generated rows')
+
+        user_ids = self.create_users('user', options['users'])
+        seller_ids = self.create_sellers(options['sellers'])
+        catalog = self.create_products(options['products'], seller_ids)
+
+        popularity = power_law_weights(len(catalog['ids']), options['popularity_exponent'], self.rng)
+        # A few heavy users and a long tail of light ones
+        activity = self.rng.pareto(1.5, len(user_ids)) + 1
+        activity /= activity.sum()
+
+        self.create_interactions(options['interactions'], user_ids, catalog, popularity, activity)
+        self.create_carts(options['carts'], user_ids, catalog['ids'], popularity)
+        self.create_orders(options['orders'], user_ids, catalog, popularity, activity)
+
+        elapsed = time.time() - start_time
+        self.stdout.write(self.style.SUCCESS(f'\n✅ Synthetic data generated in {elapsed:.2f} seconds'))
+        self.stdout.write('   Retrain with: python manage.py train_advanced_model\n')
+
+    def random_dates(self, n):
+        """Timestamps spread over the last --days days, skewed towards recent"""
+        age = self.rng.beta(1.0, 2.0, n) * self.days * 86400
+        return [self.now - timedelta(seconds=float(seconds)) for seconds in age]
+
+    def bulk_insert(self, model, rows, label):
+        """Insert ``rows`` (an iterable of unsaved instances) in chunks"""
+        batch, total = [], 0
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.chunk_size:
+                total += self.flush(model, batch)
+                batch = []
+        if batch:
+            total += self.flush(model, batch)
+        self.stdout.write(f'   ✓ {label}: {total}')
+
+    def flush(self, model, batch):
+        with transaction.atomic():
+            model.objects.bulk_create(batch, batch_size=self.chunk_size)
+        return len(batch)
+
+    def create_users(self, kind, count):
+        pattern = f'{self.prefix}_{kind}_'
+        start = User.objects.filter(username__startswith=pattern).count()
+        with explicit_timestamps(User._meta.get_field('date_joined')):
+            self.bulk_insert(User, (
+                User(
+                    username=f'{pattern}{i:07d}',
+                    email=f'{kind}{i}@{self.prefix}.example.com',
+                    password='!',  # unusable password, hashing would dominate runtime
+                    date_joined=date,
+                )
+                for i, date in zip(range(start, start + count), self.random_dates(count))
+            ), f'{kind.title()}s')
+        return np.array(
+            User.objects.filter(username__startswith=pattern).order_by('id').values_list('id', flat=True)
+        )
+
+    def create_sellers(self, count):
+        seller_ids = self.create_users('seller', count)
+        existing = set(SellerProfile.objects.filter(user_id__in=seller_ids).values_list('user_id', flat=True))
+        self.bulk_insert(SellerProfile, (
+            SellerProfile(
+                user_id=int(user_id),
+                seller_id=f'SYN-{user_id}',
+                shop_name=f'{self.rng.choice(ADJECTIVES)} Store {user_id}',
+                rating=round(float(self.rng.uniform(3.0, 5.0)), 1),
+                is_verified=True,
+            )
+            for user_id in seller_ids if user_id not in existing
+        ), 'Seller profiles')
+        return seller_ids
+
+    def create_products(self, count, seller_ids):
+        rng = self.rng
+        categories = rng.choice(CATEGORIES, count)
+        # Category-specific price levels with log-normal spread
+        base_price = dict(zip(CATEGORIES, rng.uniform(200, 5000, len(CATEGORIES))))
+        prices = np.round([base_price[c] * rng.lognormal(0, 0.5) for c in categories], 2)
+        ratings = np.round(1 + 4 * rng.beta(5, 2, count), 1)
+        reviews = np.floor(rng.pareto(1.2, count) * 10).astype(int)
+        sellers = rng.choice(seller_ids, count)
+        adjectives = rng.choice(ADJECTIVES, count)
+        nouns = rng.choice(NOUNS, count)
+        qualities = rng.choice(['basic', 'standard', 'premium'], count, p=[0.3, 0.5, 0.2])
+        created = self.random_dates(count)
+
+        fields = [Product._meta.get_field('created_at'), Product._meta.get_field('updated_at')]
+        with explicit_timestamps(*fields):
+            self.bulk_insert(Product, (
+                Product(
+                    name=f'{adjectives[i]} {categories[i].title()} {nouns[i]} {i}',
+                    description=f'{adjectives[i]} {nouns[i].lower()} for {categories[i]} lovers. '
+                                f'{qualities[i].title()} quality, synthetic item #{i}.',
+                    price=prices[i],
+                    category=categories[i],
+                    quality=qualities[i],
+                    rating=ratings[i],
+                    total_reviews=int(reviews[i]),
+                    stock=int(rng.integers(0, 500)),
+                    seller_id=int(sellers[i]),
+                    product_status='approved',
+                    created_at=created[i],
+                    updated_at=created[i],
+                )
+                for i in range(count)
+            ), 'Products')
+
+        # Includes products generated by earlier runs with the same prefix
+        rows = list(Product.objects.filter(seller_id__in=seller_ids).order_by('id').values_list(
+            'id', 'price', 'name', 'category'
+        ))
+        return {
+            'ids': np.array([row[0] for row in rows]),
+            'prices': np.array([float(row[1]) for row in rows]),
+            'names': [row[2] for row in rows],
+            'categories': np.array([row[3] for row in rows]),
+        }
+
+    def create_interactions(self, count, user_ids, catalog, popularity, activity):
+        rng = self.rng
+        product_ids = catalog['ids']
+        users = rng.choice(user_ids, count, p=activity)
+        products = rng.choice(product_ids, count, p=popularity)
+
+        # Users stick to a favourite category for most of their activity,
+        # still following product popularity inside it
+        favourite = dict(zip(user_ids, rng.choice(CATEGORIES, len(user_ids))))
+        in_favourite = rng.random(count) < 0.6
+        user_category = np.array([favourite[uid] for uid in users])
+        for category in CATEGORIES:
+            members = catalog['categories'] == category
+            picks = in_favourite & (user_category == category)
+            if members.any() and picks.any():
+                weights = popularity[members] / popularity[members].sum()
+                products[picks] = rng.choice(product_ids[members], int(picks.sum()), p=weights)
+
+        types = rng.choice(list(INTERACTION_MIX), count, p=list(INTERACTION_MIX.values()))
+        ratings = rng.choice([1, 2, 3, 4, 5], count, p=[0.05, 0.07, 0.18, 0.35, 0.35])
+        timestamps = self.random_dates(count)
+        weights = UserInteraction.INTERACTION_WEIGHTS
+
+        with explicit_timestamps(UserInteraction._meta.get_field('timestamp')):
+            self.bulk_insert(UserInteraction, (
+                UserInteraction(
+                    user_id=int(users[i]),
+                    product_id=int(products[i]),
+                    interaction_type=types[i],
+                    rating_value=int(ratings[i]) if types[i] == 'rating' else None,
+                    weight=weights[types[i]],
+                    timestamp=timestamps[i],
+                    session_id=f'{self.prefix}-{users[i]}-{timestamps[i]:%Y%m%d}',
+                )
+                for i in range(count)
+            ), 'Interactions')
+
+    def create_carts(self, count, user_ids, product_ids, popularity):
+        rng = self.rng
+        has_cart = set(Cart.objects.filter(user_id__in=user_ids).values_list('user_id', flat=True))
+        candidates = np.array([uid for uid in user_ids if uid not in has_cart])
+        owners = rng.choice(candidates, min(count, len(candidates)), replace=False) if len(candidates) else []
+        self.bulk_insert(Cart, (Cart(user_id=int(uid)) for uid in owners), 'Carts')
+
+        cart_ids = Cart.objects.filter(user_id__in=[int(uid) for uid in owners]).values_list('id', flat=True)
+        self.bulk_insert(CartItem, (
+            CartItem(cart_id=cart_id, product_id=int(product_id), quantity=int(rng.integers(1, 4)))
+            for cart_id in cart_ids
+            for product_id in np.unique(rng.choice(product_ids, rng.integers(1, 6), p=popularity))
+        ), 'Cart items')
+
+    def create_orders(self, count, user_ids, catalog, popularity, activity):
+        rng = self.rng
+        product_ids = catalog['ids']
+        start = Order.objects.filter(order_number__startswith=f'{self.prefix.upper()}-').count()
+        buyers = rng.choice(user_ids, count, p=activity)
+        statuses = rng.choice(list(ORDER_STATUS_MIX), count, p=list(ORDER_STATUS_MIX.values()))
+        created = self.random_dates(count)
+        price_of = dict(zip(product_ids, catalog['prices']))
+        name_of = dict(zip(product_ids, catalog['names']))
+
+        baskets = []
+        for _ in range(count):
+            items = np.unique(rng.choice(product_ids, rng.integers(1, 5), p=popularity))
+            baskets.append([(int(pid), int(rng.integers(1, 3))) for pid in items])
+
+        numbers = [f'{self.prefix.upper()}-{start + i:08d}' for i in range(count)]
+        order_fields = [Order._meta.get_field('created_at'), Order._meta.get_field('updated_at')]
+        with explicit_timestamps(*order_fields):
+            self.bulk_insert(Order, (
+                Order(
+                    user_id=int(buyers[i]),
+                    order_number=numbers[i],
+                    total_amount=round(sum(price_of[pid] * qty for pid, qty in baskets[i]), 2),
+                    order_status=statuses[i],
+                    payment_status='completed' if statuses[i] in ('shipped', 'delivered') else 'pending',
+                    full_name=f'Customer {buyers[i]}',
+                    shipping_address=f'{int(rng.integers(1, 999))} Synthetic Street',
+                    city=str(rng.choice(CITIES)),
+                    pincode=f'{int(rng.integers(100000, 999999))}',
+                    phone_number=f'9{int(rng.integers(100000000, 999999999))}',
+                    payment_method=str(rng.choice(['cod', 'upi', 'card'])),
+                    created_at=created[i],
+                    updated_at=created[i],
+                )
+                for i in range(count)
+            ), 'Orders')
+
+        order_ids = dict(Order.objects.filter(order_number__in=numbers).values_list('order_number', 'id'))
+        self.bulk_insert(OrderItem, (
+            OrderItem(
+                order_id=order_ids[numbers[i]],
+                product_id=pid,
+                product_name=name_of[pid],
+                product_price=round(price_of[pid], 2),
+                quantity=qty,
+                subtotal=round(price_of[pid] * qty, 2),
+            )
+            for i in range(count)
+            for pid, qty in baskets[i]
+        ), 'Order items')
+
+        with explicit_timestamps(OrderTracking._meta.get_field('timestamp')):
+            self.bulk_insert(OrderTracking, (
+                OrderTracking(
+                    order_id=order_ids[numbers[i]],
+                    status=status,
+                    location=str(rng.choice(CITIES)),
+                    details=f'Order {status}',
+                    timestamp=created[i] + timedelta(days=step),
+                )
+                for i in range(count)
+                for step, status in enumerate(TRACKING_STEPS[statuses[i]])
+            ), 'Tracking updates')
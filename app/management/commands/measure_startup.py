@@ -0,0 +1,124 @@
+"""
+Django management command that measures startup and import cost
+Imports each target module in a fresh interpreter with ``-X importtime`` and
+reports wall time plus the heaviest top-level packages it pulled in
+Usage: python manage.py measure_startup --modules app.urls,ml.advanced_recommendation
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from collections import defaultdict
+import json
+import os
+import subprocess
+import sys
+
+DEFAULT_MODULES = 'app.urls,ml.engines,ml.recommendation,ml.advanced_recommendation'
+
+# Runs in the child interpreter; the last stdout line is the timing report
+CHILD_SCRIPT = '''
+import json, sys, time
+started = time.perf_counter()
+import django
+django.setup()
+setup_done = time.perf_counter()
+import importlib
+importlib.import_module(sys.argv[1])
+imported = time.perf_counter()
+heavy = sorted(m for m in ('numpy', 'pandas', 'scipy', 'sklearn') if m in sys.modules)
+if sys.argv[2] == '1':
+    from ml.engines import warm_up
+    warm_up()
+print(json.dumps({
+    'django_setup_ms': (setup_done - started) * 1000,
+    'import_ms': (imported - setup_done) * 1000,
+    'warm_up_ms': (time.perf_counter() - imported) * 1000 if sys.argv[2] == '1' else None,
+    'heavy_loaded': heavy,
+}))
+'''
+
+
+def parse_importtime(stderr):
+    """{top-level package: self import time in ms} from ``-X importtime`` output"""
+    packages = defaultdict(float)
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        try:
+            self_us, _, name = line[len('import time:'):].split('|')
+            packages[name.strip().split('.')[0]] += int(self_us) / 1000
+        except ValueError:
+            continue
+    return dict(packages)
+
+
+class Command(BaseCommand):
+    help = 'Measure Django startup and per-module import cost in fresh interpreters'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--modules',
+            type=str,
+            default=DEFAULT_MODULES,
+            help='Comma-separated modules to import after django.setup()',
+        )
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=8,
+            help='Heaviest top-level packages to list per module',
+        )
+        parser.add_argument(
+            '--warm-up',
+            action='store_true',
+            help='Also time ml.engines.warm_up() (engine imports and model load)',
+        )
+        parser.add_argument(
+            '--output',
+            type=str,
+            default=None,
+            help='Write the JSON report to this file',
+        )
+
+    def measure(self, module, warm_up):
+        env = dict(os.environ)
+        env.setdefault('DJANGO_SETTINGS_MODULE', 'ecommerce.settings')
+        # Warm-up is measured explicitly, not as part of django.setup()
+        env['ML_WARMUP_ON_STARTUP'] = '0'
+        completed = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', CHILD_SCRIPT, module, '1' if warm_up else '0'],
+            capture_output=True, text=True, cwd=settings.BASE_DIR, env=env
+        )
+        if completed.returncode != 0:
+            raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr else 'failed')
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        result['packages_ms'] = parse_importtime(completed.stderr)
+        return result
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('\n⏱️  Measuring Startup Import Cost\n'))
+
+        report = {}
+        for module in [m.strip() for m in options['modules'].split(',') if m.strip()]:
+            try:
+                result = self.measure(module, options['warm_up'])
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f'❌ {module}: {e}'))
+                continue
+            report[module] = result
+
+            heavy = ', '.join(result['heavy_loaded']) or 'none'
+            self.stdout.write(
+                f'📦 {module}: django.setup() {result["django_setup_ms"]:.0f}ms, '
+                f'import {result["import_ms"]:.0f}ms (heavy packages loaded: {heavy})'
+            )
+            if result['warm_up_ms'] is not None:
+                self.stdout.write(f'   • warm_up(): {result["warm_up_ms"]:.0f}ms')
+            packages = sorted(result['packages_ms'].items(), key=lambda item: -item[1])
+            for name, ms in packages[:options['top']]:
+                self.stdout.write(f'   • {name}: {ms:.1f}ms')
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'\n✅ Report written to {options["output"]}'))
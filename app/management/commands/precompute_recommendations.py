@@ -0,0 +1,60 @@
+"""
+Django management command to precompute personalized recommendations
+for every known user in one batch (run nightly/hourly after training)
+Usage: python manage.py precompute_recommendations --n 20 --workers 4
+"""
+
+from django.core.management.base import BaseCommand
+from ml.advanced_recommendation import advanced_recommendation_engine
+import time
+
+
+class Command(BaseCommand):
+    help = 'Precompute top-N personalized recommendations for all users'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--n',
+            type=int,
+            default=20,
+            help='Recommendations to store per user',
+        )
+        parser.add_argument(
+            '--block-size',
+            type=int,
+            default=256,
+            help='Users scored per block',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Worker processes (default: CPU count, 1 = no pool)',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('\n🚀 Precomputing Personalized Recommendations\n'))
+        
+        start_time = time.time()
+        
+        success = advanced_recommendation_engine.precompute_user_recommendations(
+            n_recommendations=options['n'],
+            block_size=options['block_size'],
+            workers=options['workers'],
+        )
+        if success:
+            success = advanced_recommendation_engine.save_model()
+        
+        elapsed = time.time() - start_time
+        
+        if success:
+            self.stdout.write(
+                self.style.SUCCESS(f'✅ Precompute completed in {elapsed:.2f} seconds')
+            )
+            self.stdout.write(f'   • Users: {len(advanced_recommendation_engine.users_list)}')
+            self.stdout.write(f'   • Per user: {advanced_recommendation_engine.user_recommendations.shape[1]}')
+            self.stdout.write('\n')
+        else:
+            self.stdout.write(
+                self.style.ERROR('❌ Precompute failed. Check logs above.')
+            )
@@ -0,0 +1,50 @@
+"""
+Django management command that runs the out-of-process recommendation server
+Loads the advanced model once and answers web workers over a Unix socket or
+local TCP port (see ml/rpc.py); point ML_RECOMMENDATION_SERVER at it
+Usage: python manage.py run_recommendation_server --address unix:/srv/smartshop/var/recommendations.sock
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from ml.engines import warm_up
+from ml.rpc import RecommendationServer, DEFAULT_ADDRESS
+import signal
+import sys
+
+
+class Command(BaseCommand):
+    help = 'Serve recommendations to web workers from a single process'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--address',
+            type=str,
+            default=None,
+            help="'unix:/path' or 'tcp:host:port' (default: ML_RECOMMENDATION_SERVER)",
+        )
+        parser.add_argument(
+            '--allow-retrain',
+            action='store_true',
+            help='Accept retrain requests from clients (default: ML_RECOMMENDATION_SERVER_ALLOW_RETRAIN)',
+        )
+
+    def handle(self, *args, **options):
+        address = options['address'] or getattr(settings, 'ML_RECOMMENDATION_SERVER', None) or DEFAULT_ADDRESS
+        allow_retrain = options['allow_retrain'] or getattr(settings, 'ML_RECOMMENDATION_SERVER_ALLOW_RETRAIN', False)
+
+        self.stdout.write(self.style.SUCCESS('\n🛰️  Starting Recommendation Server\n'))
+        if not warm_up():
+            self.stdout.write(self.style.ERROR('❌ Engines failed to load. Check logs above.'))
+            return
+
+        server = RecommendationServer(address, allow_retrain=allow_retrain)
+        # Stop cleanly (and remove the socket file) under process managers too
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+        self.stdout.write(self.style.SUCCESS(f'✅ Listening on {address} (Ctrl+C to stop)'))
+        if not allow_retrain:
+            self.stdout.write('ℹ️  Retrain requests are disabled; workers retrain locally')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            self.stdout.write('\n👋 Recommendation server stopped')
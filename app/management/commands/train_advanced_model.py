@@ -1,6 +1,8 @@
 """
 Django management command to train the advanced ML model
 Usage: python manage.py train_advanced_model
+       python manage.py train_advanced_model --popularity-only
+       python manage.py train_advanced_model --incremental
 """
 
 from django.core.management.base import BaseCommand
@@ -17,8 +19,34 @@ class Command(BaseCommand):
             action='store_true',
             help='Force retrain even if model exists',
         )
+        parser.add_argument(
+            '--popularity-only',
+            action='store_true',
+            help='Only refresh popularity scores from current ratings (no full retrain)',
+        )
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help='Only fold in interactions newer than the last training',
+        )
 
     def handle(self, *args, **options):
+        if options['popularity_only']:
+            if advanced_recommendation_engine.refresh_popularity():
+                self.stdout.write(self.style.SUCCESS('✅ Popularity scores refreshed'))
+            else:
+                self.stdout.write(self.style.ERROR('❌ Popularity refresh failed. Check logs above.'))
+            return
+        
+        if options['incremental']:
+            start_time = time.time()
+            if advanced_recommendation_engine.update_from_database():
+                elapsed = time.time() - start_time
+                self.stdout.write(self.style.SUCCESS(f'✅ Incremental update completed in {elapsed:.2f} seconds'))
+            else:
+                self.stdout.write(self.style.ERROR('❌ Incremental update failed. Check logs above.'))
+            return
+        
         self.stdout.write(self.style.SUCCESS('\n🚀 Starting Advanced ML Model Training\n'))
         
         start_time = time.time()
@@ -36,7 +64,7 @@ class Command(BaseCommand):
             )
             self.stdout.write(f'   • Products: {len(advanced_recommendation_engine.products_list)}')
             self.stdout.write(f'   • Users: {len(advanced_recommendation_engine.users_list)}')
-            self.stdout.write(f'   • Model Path: ml/advanced_model.pkl')
+            self.stdout.write(f'   • Model Path: {advanced_recommendation_engine.model_path}/')
             self.stdout.write('\n')
         else:
             self.stdout.write(
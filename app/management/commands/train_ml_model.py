@@ -31,7 +31,7 @@ class Command(BaseCommand):
             self.stdout.write(
                 self.style.SUCCESS(
                     f'✅ Model training completed in {elapsed:.2f}s\n'
-                    f'Model saved to: ml/model.pkl'
+                    f'Model saved to: {recommendation_engine.model_path}/'
                 )
             )
         else:
@@ -158,6 +158,16 @@ class UserInteraction(models.Model):
         ('wishlist', 'Add to Wishlist'),
     ]
     
+    # Signal strength of each interaction type (also used for trending)
+    INTERACTION_WEIGHTS = {
+        'view': 1.0,
+        'click': 2.0,
+        'cart': 3.0,
+        'wishlist': 2.5,
+        'purchase': 5.0,
+        'rating': 4.0,
+    }
+    
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='interactions')
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='interactions')
     interaction_type = models.CharField(max_length=20, choices=INTERACTION_TYPES)
@@ -179,16 +189,8 @@ class UserInteraction(models.Model):
     
     def save(self, *args, **kwargs):
         """Auto-assign weights based on interaction type"""
-        interaction_weights = {
-            'view': 1.0,
-            'click': 2.0,
-            'cart': 3.0,
-            'wishlist': 2.5,
-            'purchase': 5.0,
-            'rating': 4.0,
-        }
         if not self.weight:
-            self.weight = interaction_weights.get(self.interaction_type, 1.0)
+            self.weight = self.INTERACTION_WEIGHTS.get(self.interaction_type, 1.0)
         super().save(*args, **kwargs)
 
 
@@ -0,0 +1,107 @@
+"""
+Recommendation result cache
+Caches recommendation id lists per (kind, user, context product, n, model version)
+in the 'recommendations' cache alias (TTL and LRU culling come from its
+CACHES settings). Each user has a generation number that is part of every
+key; strong signals (cart, purchase, rating) bump it, which invalidates all
+of that user's entries at once without having to know their keys.
+Trending ids are cached once for everybody.
+
+Invalidation reaches exactly the processes that share the alias's backend:
+with the default in-memory backend that is only the current worker, and
+other workers serve their copy until it expires (the alias TIMEOUT). Set
+ML_RECOMMENDATION_CACHE_URL to share one Redis between all workers.
+"""
+
+import time
+from django.core.cache import caches
+
+CACHE_ALIAS = 'recommendations'
+
+# Trending ids are the same for everyone; they are kept briefly and double as
+# the fallback of the async endpoints when the engine misses its deadline
+TRENDING_KEY = 'recs:trending'
+TRENDING_SIZE = 50
+TRENDING_TIMEOUT = 60
+
+# Interactions that change what we should recommend to the user
+STRONG_SIGNALS = {'cart', 'purchase', 'rating'}
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def _generation_key(user_id):
+    return f'recs:gen:{user_id}'
+
+
+def get_recommendations(kind, user_id, product_id, n, model_version, compute):
+    """
+    Cached recommendation ids, calling ``compute()`` on a miss
+
+    Args:
+        kind: Which engine method computes them ('personalized', 'hybrid')
+        user_id: Requesting user id (None for anonymous)
+        product_id: Context product id (None on non-product pages)
+        n: Number of recommendations
+        model_version: Version token of the engine that would compute them
+        compute: Zero-argument callable returning the id list
+    """
+    try:
+        cache = _cache()
+        generation = cache.get(_generation_key(user_id), 0) if user_id else 0
+        key = f'recs:{kind}:{user_id}:{product_id}:{n}:{model_version}:{generation}'
+        recommended_ids = cache.get(key)
+        if recommended_ids is not None:
+            return recommended_ids
+    except Exception as e:
+        print(f"Recommendation cache error: {e}")
+        return compute()
+
+    recommended_ids = compute()
+    if recommended_ids:
+        cache.set(key, recommended_ids)
+    return recommended_ids
+
+
+def get_trending(n, compute):
+    """
+    Cached trending ids; ``compute(n)`` fills the cache with the top
+    TRENDING_SIZE on a miss
+    """
+    if n > TRENDING_SIZE:
+        return compute(n)
+    try:
+        trending_ids = _cache().get(TRENDING_KEY)
+        if trending_ids is not None:
+            return trending_ids[:n]
+    except Exception as e:
+        print(f"Recommendation cache error: {e}")
+        return compute(n)
+
+    trending_ids = compute(TRENDING_SIZE)
+    if trending_ids:
+        _cache().set(TRENDING_KEY, trending_ids, TRENDING_TIMEOUT)
+    return trending_ids[:n]
+
+
+async def aget_cached_trending(n):
+    """Trending ids from the cache only ([] while it is cold), for use on the event loop"""
+    try:
+        trending_ids = await _cache().aget(TRENDING_KEY)
+    except Exception as e:
+        print(f"Recommendation cache error: {e}")
+        return []
+    return (trending_ids or [])[:n]
+
+
+def invalidate_user(user_id):
+    """Drop every cached recommendation of ``user_id``"""
+    try:
+        # A fresh generation orphans the old entries; they age out via TTL/LRU.
+        # The generation shares the entry TTL, so by the time it expires every
+        # entry made before the bump has expired too.
+        _cache().set(_generation_key(user_id), time.time_ns())
+    except Exception as e:
+        print(f"Recommendation cache error: {e}")
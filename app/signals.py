@@ -5,25 +5,20 @@ Uses Django signals to trigger training
 
 from django.db.models.signals import post_save
 from django.dispatch import receiver
-from django.core.management import call_command
 from app.models import Product
-import threading
+from ml.retrain_scheduler import get_retrain_scheduler
+from ml.rpc import get_recommendation_client
 
 @receiver(post_save, sender=Product)
 def auto_train_model_on_product_change(sender, instance, created, **kwargs):
     """
     Automatically retrain the ML model when a product is created/updated
-    Runs in background to avoid blocking the request
+    Runs in background to avoid blocking the request; a burst of new
+    products (e.g. an import) is coalesced into a single training run
     """
     if created:
-        # Only train on new products, not every update
-        def train_in_background():
-            try:
-                print("🔄 Auto-training ML model due to new product...")
-                call_command('train_ml_model', '--source', 'database')
-            except Exception as e:
-                print(f"⚠️  Auto-training failed: {e}")
-        
-        # Start training in background thread
-        thread = threading.Thread(target=train_in_background, daemon=True)
-        thread.start()
+        # Only train on new products, not every update. With a recommendation
+        # server the training runs there instead of in this web worker.
+        client = get_recommendation_client()
+        if client is None or not client.request_retrain('new_product'):
+            get_retrain_scheduler().request('new_product')
@@ -1,3 +1,460 @@
-from django.test import TestCase
+import asyncio
+import shutil
+import tempfile
+import time
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+import pandas as pd
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from scipy import sparse
+from sklearn.metrics.pairwise import cosine_similarity
+
+from app import recommendation_cache, views
+from app.models import Order, OrderItem, Product, UserInteraction
+from ml.advanced_recommendation import AdvancedRecommendationEngine
+from ml.artifacts import current_token
+from ml.benchmark import synthetic_frames
+from ml.co_purchase import CoPurchaseIndex
+from ml.similarity import top_k_cosine_neighbors
+from ml.trending import TrendingEngine
+
+
+def trained_engine(n_products=300, n_users=200, interactions_per_user=12, **kwargs):
+    """Advanced engine fitted in memory on synthetic frames"""
+    product_df, interaction_df = synthetic_frames(n_products, n_users, interactions_per_user)
+    engine = AdvancedRecommendationEngine(als_threads=1, **kwargs)
+    engine.fit(product_df, interaction_df)
+    return engine
+
+
+def create_catalog(product_df, n_users):
+    """Products and users of a synthetic frame (bulk_create skips the retrain signal)"""
+    User.objects.bulk_create([User(id=user_id, username=f'user{user_id}') for user_id in range(1, n_users + 1)])
+    Product.objects.bulk_create([
+        Product(
+            id=row.id, name=row.name, description=row.description, category=row.category,
+            price=round(row.price, 2), rating=row.rating, total_reviews=row.total_reviews,
+        )
+        for row in product_df.itertuples()
+    ])
+
+
+def create_interactions(interaction_df):
+    """UserInteraction rows of a synthetic frame, with the frame's timestamps"""
+    interactions = UserInteraction.objects.bulk_create([
+        UserInteraction(
+            user_id=row.user_id, product_id=row.product_id, interaction_type=row.interaction_type,
+            weight=row.weight, rating_value=None if pd.isna(row.rating_value) else int(row.rating_value),
+        )
+        for row in interaction_df.itertuples()
+    ])
+    # auto_now_add stamped them with the current time
+    for interaction, timestamp in zip(interactions, interaction_df['timestamp']):
+        interaction.timestamp = timestamp.to_pydatetime()
+    UserInteraction.objects.bulk_update(interactions, ['timestamp'])
+
+
+class TopKCosineNeighborsTests(TestCase):
+    """top_k_cosine_neighbors against a dense sklearn similarity matrix"""
+
+    def assert_matches_sklearn(self, features, k, **kwargs):
+        neighbors, scores = top_k_cosine_neighbors(features, k=k, **kwargs)
+        similarity = cosine_similarity(features)
+        np.fill_diagonal(similarity, -np.inf)
+        expected = -np.sort(-similarity, axis=1)[:, :k]
+
+        self.assertEqual(neighbors.shape, (features.shape[0], k))
+        np.testing.assert_allclose(scores, expected, atol=1e-5)
+        # Ties may come in any order, but every neighbor must carry its own score
+        np.testing.assert_allclose(np.take_along_axis(similarity, neighbors, axis=1), scores, atol=1e-5)
+        self.assertFalse((neighbors == np.arange(features.shape[0])[:, None]).any())
+
+    def test_dense_features(self):
+        features = np.random.default_rng(0).random((120, 16))
+        self.assert_matches_sklearn(features, k=10)
+
+    def test_sparse_features_in_blocks(self):
+        features = sparse.random(150, 400, density=0.05, format='csr', random_state=1)
+        self.assert_matches_sklearn(features, k=8, block_rows=7, workers=3)
+
+    def test_k_capped_at_other_rows(self):
+        neighbors, scores = top_k_cosine_neighbors(np.eye(4), k=10)
+        self.assertEqual(neighbors.shape, (4, 3))
+
+
+class HybridBatchTests(TestCase):
+    """get_hybrid_recommendations_batch answers like one call per query"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.engine = trained_engine()
+
+    def final_scores(self, user_id, product_id):
+        """Single-query scores of every product, by id"""
+        engine = self.engine
+        scores = engine._combine_scores({
+            'collaborative': engine._collaborative_score(user_id) if user_id else None,
+            'content_based': engine._content_based_score(product_id) if product_id else None,
+            'popularity': engine._popularity_score(),
+        })
+        return dict(zip(engine.products_list, scores))
+
+    def test_batch_matches_single_queries(self):
+        engine = self.engine
+        users, products = engine.users_list, engine.products_list
+        queries = [
+            (users[0], products[0], 6),
+            (users[1], None, 10),
+            (None, products[1], 4),
+            (None, None, 6),
+            (10 ** 9, products[2], 6),
+            (users[2], 10 ** 9, 6),
+            (users[3], products[3], len(products) + 5),
+        ]
+
+        batch = engine.get_hybrid_recommendations_batch(queries)
+
+        self.assertEqual(len(batch), len(queries))
+        for (user_id, product_id, n), recommended in zip(queries, batch):
+            with self.subTest(user_id=user_id, product_id=product_id, n=n):
+                single = engine.get_hybrid_recommendations(user_id=user_id, product_id=product_id, n_recommendations=n)
+                # Popularity has exact ties, which either path may order differently
+                scores = self.final_scores(user_id, product_id)
+                self.assertEqual(len(recommended), len(single))
+                self.assertEqual(len(set(recommended)), len(recommended))
+                np.testing.assert_allclose(
+                    [scores[pid] for pid in recommended], [scores[pid] for pid in single], rtol=1e-6
+                )
+
+
+class IncrementalUpdateTests(TestCase):
+    """update_from_database against a full retrain, and delta replay on load"""
+
+    def setUp(self):
+        product_df, interaction_df = synthetic_frames(150, 120, 10)
+        create_catalog(product_df, 120)
+        cutoff = interaction_df['timestamp'].quantile(0.8)
+        self.new_interactions = interaction_df[interaction_df['timestamp'] > cutoff]
+        create_interactions(interaction_df[interaction_df['timestamp'] <= cutoff])
+
+        self.model_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.model_path, ignore_errors=True)
+        self.engine = AdvancedRecommendationEngine(model_path=self.model_path, als_threads=1)
+        self.assertTrue(self.engine.train_from_database())
+
+    def assert_same_users(self, engine, expected):
+        self.assertEqual(engine.products_list, expected.products_list)
+        self.assertEqual(sorted(engine.users_list), sorted(expected.users_list))
+        for user_id in expected.users_list:
+            row, expected_row = engine.user_index[user_id], expected.user_index[user_id]
+            np.testing.assert_allclose(
+                engine.user_item_matrix[row].toarray(), expected.user_item_matrix[expected_row].toarray(), rtol=1e-5
+            )
+            self.assertAlmostEqual(
+                float(engine.user_weight_totals[row]), float(expected.user_weight_totals[expected_row]), places=4
+            )
+            preferences, expected_preferences = engine.user_preferences[user_id], expected.user_preferences[user_id]
+            self.assertEqual(preferences['preferred_categories'], expected_preferences['preferred_categories'])
+            self.assertEqual(preferences['interaction_count'], expected_preferences['interaction_count'])
+            self.assertAlmostEqual(preferences['avg_price'], expected_preferences['avg_price'], places=2)
+            self.assertAlmostEqual(preferences['avg_rating'], expected_preferences['avg_rating'], places=4)
+            self.assertEqual(engine.interaction_history[user_id], expected.interaction_history[user_id])
+
+    def test_update_matches_full_retrain(self):
+        create_interactions(self.new_interactions)
+        self.assertTrue(self.engine.update_from_database())
+
+        full = AdvancedRecommendationEngine(model_path=tempfile.mkdtemp(), als_threads=1)
+        self.addCleanup(shutil.rmtree, full.model_path, ignore_errors=True)
+        self.assertTrue(full.train_from_database())
+        self.assert_same_users(self.engine, full)
+
+    def test_load_replays_deltas(self):
+        create_interactions(self.new_interactions)
+        self.assertTrue(self.engine.update_from_database())
+        self.assertEqual(self.engine.model_version, current_token(self.model_path))
+
+        loaded = AdvancedRecommendationEngine(model_path=self.model_path, als_threads=1)
+        self.assertTrue(loaded.load_model())
+        self.assertEqual(loaded.model_version, self.engine.model_version)
+        self.assertEqual(loaded.last_trained_at, self.engine.last_trained_at)
+        self.assert_same_users(loaded, self.engine)
+        for user_id in self.engine.users_list:
+            np.testing.assert_allclose(
+                loaded.user_factors[loaded.user_index[user_id]],
+                self.engine.user_factors[self.engine.user_index[user_id]], rtol=1e-4, atol=1e-5
+            )
+
+    def test_update_reruns_on_a_newly_published_version(self):
+        other = AdvancedRecommendationEngine(model_path=self.model_path, als_threads=1)
+        self.assertTrue(other.load_model())
+        self.assertTrue(other.save_model())
+
+        create_interactions(self.new_interactions)
+        self.assertTrue(self.engine.update_from_database())
+
+        version, revision = self.engine.model_version.split(':')
+        self.assertEqual(version, other.model_version.split(':')[0])
+        self.assertEqual(revision, '1')
+        self.assertEqual(self.engine.model_version, current_token(self.model_path))
+
+
+class TrendingEngineTests(TestCase):
+    """Decayed counters, top-K ranking and pulls from UserInteraction"""
+
+    def trending(self, **kwargs):
+        # A debounce this long keeps the background pull from ever running here
+        return TrendingEngine(half_life_hours=1.0, debounce=3600, **kwargs)
+
+    def test_older_interactions_decay(self):
+        trending, now = self.trending(), time.time()
+        trending.add(1, 1.0, now)
+        trending.add(2, 1.5, now - 3600)         # one half-life: 0.75
+        trending.add(3, 3.0, now - 7200 + 60)    # just under two: ~0.76
+        self.assertEqual(trending.top(3), [1, 3, 2])
+
+    def test_top_is_capped_at_capacity(self):
+        trending, now = self.trending(capacity=3), time.time()
+        for product_id, weight in enumerate([1.0, 5.0, 2.0, 4.0, 3.0], start=1):
+            trending.add(product_id, weight, now)
+        self.assertEqual(trending.top(10), [2, 4, 5])
+
+    def test_ranking_survives_rebase(self):
+        trending, start = self.trending(), time.time()
+        trending.add(1, 1.0, start)
+        trending.add(2, 1.0, start + 100 * 3600)
+        self.assertEqual(trending.top(2), [2, 1])
+        trending.add(1, 1.0, start + 100 * 3600 + 1)
+        self.assertEqual(trending.top(2), [1, 2])
+
+    def test_refresh_pulls_new_interactions(self):
+        user = User.objects.create(username='shopper')
+        Product.objects.bulk_create([
+            Product(id=product_id, name=f'Product {product_id}', description='', category='home', price=10)
+            for product_id in (1, 2, 3)
+        ])
+        UserInteraction.objects.create(user=user, product_id=1, interaction_type='purchase')
+        UserInteraction.objects.create(user=user, product_id=2, interaction_type='view')
+        UserInteraction.objects.create(user=user, product_id=2, interaction_type='view')
+        UserInteraction.objects.create(user=user, product_id=3, interaction_type='cart')
+
+        trending = self.trending()
+        trending.refresh()
+        with self.assertNumQueries(0):
+            self.assertEqual(trending.top(3), [1, 3, 2])
+
+        for _ in range(3):
+            UserInteraction.objects.create(user=user, product_id=2, interaction_type='purchase')
+        trending.refresh()
+        self.assertEqual(trending.top(3), [2, 1, 3])
+
+
+class RecommendationCacheTests(TestCase):
+    """Cached ids per user, orphaned by invalidate_user"""
+
+    def setUp(self):
+        recommendation_cache._cache().clear()
+        self.calls = []
+
+    def recommendations(self, user_id, ids, model_version='v1:0'):
+        def compute():
+            self.calls.append(user_id)
+            return ids
+        return recommendation_cache.get_recommendations('hybrid', user_id, 7, 4, model_version, compute)
+
+    def test_hits_until_invalidated(self):
+        self.assertEqual(self.recommendations(1, [1, 2]), [1, 2])
+        self.assertEqual(self.recommendations(1, [3, 4]), [1, 2])
+        self.assertEqual(self.calls, [1])
+
+        recommendation_cache.invalidate_user(1)
+        self.assertEqual(self.recommendations(1, [3, 4]), [3, 4])
+        self.assertEqual(self.recommendations(1, [5, 6]), [3, 4])
+        self.assertEqual(self.calls, [1, 1])
+
+    def test_invalidation_is_per_user(self):
+        self.recommendations(1, [1, 2])
+        self.recommendations(2, [1, 2])
+        recommendation_cache.invalidate_user(1)
+        self.recommendations(1, [1, 2])
+        self.recommendations(2, [1, 2])
+        self.assertEqual(self.calls, [1, 2, 1])
+
+    def test_new_model_version_misses(self):
+        self.recommendations(1, [1, 2])
+        self.assertEqual(self.recommendations(1, [3, 4], model_version='v2:0'), [3, 4])
+        self.assertEqual(self.calls, [1, 1])
+
+    def test_empty_results_are_not_cached(self):
+        self.recommendations(1, [])
+        self.recommendations(1, [])
+        self.assertEqual(self.calls, [1, 1])
+
+
+class CoPurchaseIndexTests(TestCase):
+    """Order and pair counts, the lift filter and pulls from OrderItem"""
+
+    def setUp(self):
+        self.user = User.objects.create(username='shopper')
+        Product.objects.bulk_create([
+            Product(id=product_id, name=f'Product {product_id}', description='', category='home', price=10)
+            for product_id in range(1, 5)
+        ])
+
+    def index(self, **kwargs):
+        # A debounce this long keeps the background pull from ever running here
+        return CoPurchaseIndex(debounce=3600, **kwargs)
+
+    def test_counts_confidence_and_lift(self):
+        index = self.index()
+        index.add_orders([[1, 2], [1, 2], [1, 3], [4], [2, 4]])
+
+        self.assertEqual(index.stats()['orders'], 5)
+        self.assertEqual(index.stats()['pairs'], 3)
+        associations = index.associations(1)
+        self.assertEqual([partner for partner, _, _ in associations], [2, 3])
+        # 1 -> 2: 2 of 3 orders, 2 * 5 / (3 * 3); 1 -> 3: 1 of 3 orders, 1 * 5 / (3 * 1)
+        expected = [(2 / 3, 10 / 9), (1 / 3, 5 / 3)]
+        for (_, confidence, lift), (expected_confidence, expected_lift) in zip(associations, expected):
+            self.assertAlmostEqual(confidence, expected_confidence)
+            self.assertAlmostEqual(lift, expected_lift)
+
+    def test_partners_at_or_below_min_lift_are_skipped(self):
+        index = self.index()
+        index.add_orders([[1, 2], [1, 2], [1, 3], [4], [2, 4]])
+        # 2 -> 4: lift 1 * 5 / (3 * 2) < 1
+        self.assertEqual(index.top(2), [1])
+        self.assertEqual(index.for_basket([1, 4]), [2, 3])
+
+    def order(self, *product_ids, status='pending'):
+        order = Order.objects.create(
+            user=self.user, order_number=f'ORD-{Order.objects.count() + 1}', total_amount=10,
+            shipping_address='1 Main St', phone_number='555', order_status=status,
+        )
+        self.add_items(order, *product_ids)
+        return order
+
+    def add_items(self, order, *product_ids):
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product_id=product_id, product_name=f'Product {product_id}',
+                      product_price=10, quantity=1, subtotal=10)
+            for product_id in product_ids
+        ])
+
+    def assert_matches_full_count(self, index):
+        full = self.index()
+        full.refresh()
+        self.assertEqual(index.stats()['orders'], full.stats()['orders'])
+        self.assertEqual(index.stats()['pairs'], full.stats()['pairs'])
+        for product_id in range(1, 5):
+            self.assertEqual(index.associations(product_id), full.associations(product_id))
+
+    def test_refresh_counts_placed_orders(self):
+        first = self.order(1, 2)
+        self.order(1, 2)
+        self.order(1, 3)
+        self.order(4)
+        self.order(2, 3, status='cancelled')
+        index = self.index()
+        self.assertEqual(index.refresh(), 4)
+        self.assertEqual(index.top(1), [2, 3])
+
+        first.order_status = 'cancelled'
+        first.save()
+        self.order(3, 4)
+        index.refresh()
+        self.assertEqual(index.stats()['orders'], 4)
+        self.assert_matches_full_count(index)
+
+    def test_refresh_counts_late_commits_below_the_watermark(self):
+        late = Order.objects.create(
+            user=self.user, order_number='ORD-LATE', total_amount=10, shipping_address='1 Main St', phone_number='555'
+        )
+        self.order(1, 2)
+        index = self.index()
+        index.refresh()
+        self.add_items(late, 1, 3)
+        index.refresh()
+        self.assertEqual(index.stats()['orders'], 2)
+        self.assert_matches_full_count(index)
+
+    def test_rebuild_catches_changes_outside_the_rescan_window(self):
+        first = self.order(1, 2)
+        for _ in range(3):
+            self.order(3, 4)
+        index = self.index(rescan_orders=1)
+        index.refresh()
+        first.delete()
+        index.refresh()
+        self.assertEqual(index.stats()['orders'], 4)
+
+        index.rebuild()
+        self.assertEqual(index.stats()['orders'], 3)
+        self.assert_matches_full_count(index)
+
+
+class SlowEngine:
+    """Engine stand-in whose recommendations take ``delay`` seconds"""
+
+    model_version = 'slow:0'
+
+    def __init__(self, recommended_ids, delay=0.0):
+        self.recommended_ids = recommended_ids
+        self.delay = delay
+
+    def get_hybrid_recommendations(self, user_id=None, product_id=None, n_recommendations=6):
+        time.sleep(self.delay)
+        return self.recommended_ids
+
+
+@override_settings(ASYNC_API_DEADLINE_SECONDS=0.1)
+class AsyncDeadlineTests(TestCase):
+    """Async endpoints answer with cached trending ids past the deadline"""
+
+    def setUp(self):
+        recommendation_cache._cache().clear()
+        Product.objects.bulk_create([
+            Product(id=product_id, name=f'Product {product_id}', description='', category='home', price=10)
+            for product_id in range(1, 5)
+        ])
+
+    def hybrid(self, engine):
+        with mock.patch.object(views, 'get_recommender', return_value=engine):
+            response = self.client.get(reverse('app:hybrid_recommendations'), {'product_id': 1, 'n': 2})
+        return response.json()
+
+    def test_answers_in_time(self):
+        data = self.hybrid(SlowEngine([3, 4]))
+        self.assertTrue(data['success'])
+        self.assertFalse(data['fallback'])
+        self.assertEqual(sorted(product['id'] for product in data['recommendations']), [3, 4])
+
+    def test_falls_back_to_cached_trending(self):
+        recommendation_cache._cache().set(recommendation_cache.TRENDING_KEY, [2, 1, 4])
+        data = self.hybrid(SlowEngine([3, 4], delay=0.5))
+        self.assertTrue(data['success'])
+        self.assertTrue(data['fallback'])
+        self.assertEqual(sorted(product['id'] for product in data['recommendations']), [1, 2])
+
+    def test_falls_back_to_nothing_while_trending_is_cold(self):
+        data = self.hybrid(SlowEngine([3, 4], delay=0.5))
+        self.assertTrue(data['fallback'])
+        self.assertEqual(data['recommendations'], [])
+
+    async def test_within_deadline(self):
+        async def slow():
+            await asyncio.sleep(1)
+            return 'slow'
+
+        async def fast():
+            return 'fast'
+
+        async def fallback():
+            return 'fallback'
+
+        self.assertEqual(await views._within_deadline(fast(), fallback), 'fast')
+        self.assertEqual(await views._within_deadline(slow(), fallback), 'fallback')
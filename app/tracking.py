@@ -5,6 +5,9 @@ Tracks views, clicks, purchases, ratings etc. for ML model
 
 from django.contrib.auth.models import User
 from .models import UserInteraction, Product
+from .recommendation_cache import STRONG_SIGNALS, invalidate_user
+from ml.session_recommendations import session_recommender
+from ml.co_purchase import co_purchase_index
 from datetime import datetime
 
 def track_user_interaction(user, product, interaction_type='view', rating_value=None, session_id=None):
@@ -17,8 +20,12 @@ def track_user_interaction(user, product, interaction_type='view', rating_value=
         interaction_type: 'view', 'click', 'purchase', 'rating', 'cart', 'wishlist'
         rating_value: Rating value (1-5) if interaction is rating
         session_id: Session identifier for tracking
+    
+    Every session (anonymous too) feeds the in-memory session window; only
+    logged-in users' interactions are stored.
     """
     try:
+        session_recommender.record(session_id, product.id, interaction_type)
         if user and user.is_authenticated:
             interaction = UserInteraction.objects.create(
                 user=user,
@@ -27,6 +34,8 @@ def track_user_interaction(user, product, interaction_type='view', rating_value=
                 rating_value=rating_value,
                 session_id=session_id or ''
             )
+            if interaction_type in STRONG_SIGNALS:
+                invalidate_user(user.id)
             return interaction
     except Exception as e:
         print(f"Tracking error: {e}")
@@ -42,15 +51,24 @@ def get_user_session_id(request):
     return session_id
 
 def get_similar_products(product_id, n=5):
-    """Get similar products based on category and price"""
+    """
+    Products frequently bought together with this one (co-purchase index),
+    topped up with the best-rated products of its category
+    """
     try:
+        bought_together = co_purchase_index.top(product_id, n)
+        by_id = Product.objects.in_bulk(bought_together)
+        similar = [by_id[pid] for pid in bought_together if pid in by_id]
+        if len(similar) >= n:
+            return similar
+        
         product = Product.objects.get(id=product_id)
         
-        similar = Product.objects.filter(
+        same_category = Product.objects.filter(
             category=product.category
-        ).exclude(id=product_id).order_by('-rating', '-total_reviews')[:n]
+        ).exclude(id__in=[product_id, *by_id]).order_by('-rating', '-total_reviews')[:n - len(similar)]
         
-        return list(similar)
+        return similar + list(same_category)
     except Product.DoesNotExist:
         return []
     except Exception as e:
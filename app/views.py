@@ -7,8 +7,7 @@ from django.contrib import messages
 from django.db.models import Q, Sum
 from django.http import JsonResponse
 from .models import Product, UserProfile, UserInteraction, Cart, CartItem, Order, OrderItem, SellerProfile, ReturnRequest
-from ml.recommendation import recommendation_engine
-from ml.advanced_recommendation import advanced_recommendation_engine
+from ml.engines import recommendation_engine, get_recommender
 from .forms import ProductUploadForm, CheckoutForm, AddToCartForm, ProductEditForm
 
 
@@ -47,32 +46,53 @@ from django.contrib import messages
 from django.db.models import Q, Sum
 from django.http import JsonResponse
 from .models import Product, UserProfile, UserInteraction, Cart, CartItem, Order, OrderItem, SellerProfile, ReturnRequest
-from ml.recommendation import recommendation_engine
-from ml.advanced_recommendation import advanced_recommendation_engine
+from ml.engines import recommendation_engine, get_recommender
 from .forms import ProductUploadForm, CheckoutForm, AddToCartForm
 from .tracking import track_user_interaction, get_user_session_id, get_similar_products
+from . import recommendation_cache
+from ml.session_recommendations import session_recommender
+from ml.co_purchase import co_purchase_index
+from django.db import transaction, close_old_connections
+from django.conf import settings
+from django.core.cache import cache
+from asgiref.sync import sync_to_async
+import asyncio
+import hashlib
 import uuid
 
+def _session_first(request, engine, recommended_ids, n=6, min_products=1):
+    """
+    Ids from the visitor's current browsing session (see
+    ml/session_recommendations.py) first, then ``recommended_ids`` to fill up
+    """
+    session_ids = session_recommender.recommend(request.session.get('session_id'), engine, n, min_products)
+    if not session_ids:
+        return recommended_ids
+    return (session_ids + [pid for pid in recommended_ids if pid not in session_ids])[:n]
+
 def home(request):
     products = Product.objects.all().order_by('-created_at')
     
-    # Load advanced ML model
-    if advanced_recommendation_engine.product_similarity is None:
-        advanced_recommendation_engine.load_model()
+    # Use one model version for the whole request (reloads happen in the background)
+    engine = get_recommender()
     
     # Get personalized recommendations if user is logged in
     if request.user.is_authenticated:
-        recommended_ids = advanced_recommendation_engine.get_personalized_recommendations(
-            user_id=request.user.id, n_recommendations=6
+        recommended_ids = recommendation_cache.get_recommendations(
+            'personalized', request.user.id, None, 6, engine.model_version,
+            lambda: engine.get_personalized_recommendations(user_id=request.user.id, n_recommendations=6)
         )
     else:
         # Get trending for anonymous users
-        recommended_ids = advanced_recommendation_engine.get_trending_products(6)
+        recommended_ids = recommendation_cache.get_trending(6, engine.get_trending_products)
+    
+    # React to what was browsed in this session, ahead of the trained model
+    recommended_ids = _session_first(request, engine, recommended_ids)
     
     recommended_products = Product.objects.filter(id__in=recommended_ids) if recommended_ids else []
     
     # Get trending products
-    trending_ids = advanced_recommendation_engine.get_trending_products(6)
+    trending_ids = recommendation_cache.get_trending(6, engine.get_trending_products)
     trending_products = Product.objects.filter(id__in=trending_ids) if trending_ids else []
     
     context = {
@@ -83,61 +103,83 @@ def home(request):
     return render(request, 'home.html', context)
 
 
-def search_suggestions(request):
-    """API endpoint for search suggestions/autocomplete"""
+async def _within_deadline(awaitable, fallback):
+    """
+    Result of ``awaitable``, or of the ``fallback`` coroutine function if it
+    takes longer than ASYNC_API_DEADLINE_SECONDS. Work already handed to a
+    thread keeps running; only the response stops waiting for it.
+    """
+    try:
+        return await asyncio.wait_for(awaitable, timeout=settings.ASYNC_API_DEADLINE_SECONDS)
+    except asyncio.TimeoutError:
+        return await fallback()
+
+
+async def search_suggestions(request):
+    """API endpoint for search suggestions/autocomplete (async)"""
     query = request.GET.get('q', '').strip()
     
     if len(query) < 2:
         return JsonResponse({'suggestions': []})
     
-    # Search products by name, category, and description
-    products = Product.objects.filter(
-        Q(name__icontains=query) | 
-        Q(category__icontains=query)
-    ).distinct()[:10]
-    
-    suggestions = [
-        {
-            'id': product.id,
-            'name': product.name,
-            'category': product.category,
-            'price': str(product.price),
-            'rating': product.rating,
-            'image': product.image.url if product.image else '/static/images/no-image.png'
-        }
-        for product in products
-    ]
-    
+    # Keystroke-driven: identical prefixes from many users share one lookup.
+    # Hashed, since raw queries can hold spaces or exceed memcached's key limit.
+    query_hash = hashlib.md5(query.lower().encode()).hexdigest()
+    cache_key = f'search:suggestions:{query_hash}'
+    cached = await cache.aget(cache_key)
+    if cached is not None:
+        return JsonResponse({'suggestions': cached})
+    
+    async def lookup():
+        # Search products by name, category, and description
+        products = Product.objects.filter(
+            Q(name__icontains=query) | 
+            Q(category__icontains=query)
+        ).distinct()[:10]
+        
+        return [
+            {
+                'id': product.id,
+                'name': product.name,
+                'category': product.category,
+                'price': str(product.price),
+                'rating': product.rating,
+                'image': product.image.url if product.image else '/static/images/no-image.png'
+            }
+            async for product in products
+        ]
+    
+    async def no_suggestions():
+        return None
+    
+    suggestions = await _within_deadline(lookup(), no_suggestions)
+    if suggestions is None:
+        return JsonResponse({'suggestions': [], 'timed_out': True})
+    
+    await cache.aset(cache_key, suggestions, 60)
     return JsonResponse({'suggestions': suggestions})
 
 def product_detail(request, pk):
     product = get_object_or_404(Product, pk=pk)
     
-    # Track product view
+    # Track product view (anonymous views only feed the session window)
     session_id = get_user_session_id(request)
-    if request.user.is_authenticated:
-        track_user_interaction(request.user, product, 'view', session_id=session_id)
+    track_user_interaction(request.user, product, 'view', session_id=session_id)
     
     # Get similar products
     similar_products = get_similar_products(product.id, n=5)
     
     # Get hybrid recommendations for this product
-    if advanced_recommendation_engine.product_similarity is None:
-        advanced_recommendation_engine.load_model()
+    engine = get_recommender()
     
-    if request.user.is_authenticated:
-        # Personalized recommendations
-        recommended_ids = advanced_recommendation_engine.get_hybrid_recommendations(
-            user_id=request.user.id,
-            product_id=pk,
-            n_recommendations=6
-        )
-    else:
-        # Content-based recommendations
-        recommended_ids = advanced_recommendation_engine.get_hybrid_recommendations(
-            product_id=pk,
-            n_recommendations=6
-        )
+    user_id = request.user.id if request.user.is_authenticated else None
+    # Personalized when logged in, content-based otherwise
+    recommended_ids = recommendation_cache.get_recommendations(
+        'hybrid', user_id, pk, 6, engine.model_version,
+        lambda: engine.get_hybrid_recommendations(user_id=user_id, product_id=pk, n_recommendations=6)
+    )
+    # Once the session has more than this product, blend in the rest of it
+    recommended_ids = _session_first(request, engine, recommended_ids, min_products=2)
     
     recommended_products = Product.objects.filter(id__in=recommended_ids) if recommended_ids else []
     
@@ -335,10 +377,44 @@ def profile_view(request):
 
 # ===== ADVANCED ML API ENDPOINTS =====
 
-def get_personalized_recommendations(request):
-    """API endpoint for getting personalized recommendations"""
+async def _recommendation_ids(kind, user_id, product_id, n):
+    """
+    Cached recommendation ids computed on a worker thread (the model work
+    never runs on the event loop); cached trending ids past the deadline
+    
+    Returns:
+        (ids, timed_out)
+    """
+    def compute():
+        try:
+            engine = get_recommender()
+            if kind == 'personalized':
+                fn = lambda: engine.get_personalized_recommendations(user_id=user_id, n_recommendations=n)
+            else:
+                fn = lambda: engine.get_hybrid_recommendations(
+                    user_id=user_id, product_id=product_id, n_recommendations=n
+                )
+            return recommendation_cache.get_recommendations(kind, user_id, product_id, n, engine.model_version, fn)
+        finally:
+            # Executor threads live outside the request cycle, so Django never
+            # closes the connections they open (fallback queries, cold loads)
+            close_old_connections()
+    
+    async def trending_fallback():
+        return await recommendation_cache.aget_cached_trending(n), True
+    
+    async def recommended():
+        # Not thread-sensitive: scoring is thread-safe and should run in parallel
+        return await sync_to_async(compute, thread_sensitive=False)(), False
+    
+    return await _within_deadline(recommended(), trending_fallback)
+
+
+async def get_personalized_recommendations(request):
+    """API endpoint for getting personalized recommendations (async)"""
     try:
-        if not request.user.is_authenticated:
+        user = await request.auser()
+        if not user.is_authenticated:
             return JsonResponse({
                 'success': False,
                 'message': 'User must be logged in'
@@ -346,15 +422,8 @@ def get_personalized_recommendations(request):
         
         n_recommendations = int(request.GET.get('n', 6))
         
-        # Load model
-        if advanced_recommendation_engine.product_similarity is None:
-            advanced_recommendation_engine.load_model()
-        
         # Get recommendations
-        recommended_ids = advanced_recommendation_engine.get_personalized_recommendations(
-            user_id=request.user.id,
-            n_recommendations=n_recommendations
-        )
+        recommended_ids, timed_out = await _recommendation_ids('personalized', user.id, None, n_recommendations)
         
         products = Product.objects.filter(id__in=recommended_ids).values(
             'id', 'name', 'price', 'rating', 'category', 'image'
@@ -362,7 +431,8 @@ def get_personalized_recommendations(request):
         
         return JsonResponse({
             'success': True,
-            'recommendations': list(products)
+            'recommendations': [product async for product in products],
+            'fallback': timed_out
         })
     except Exception as e:
         return JsonResponse({
@@ -371,10 +441,11 @@ def get_personalized_recommendations(request):
         })
 
 
-def track_interaction(request):
-    """API endpoint for tracking user interactions"""
+async def track_interaction(request):
+    """API endpoint for tracking user interactions (async)"""
     try:
-        if not request.user.is_authenticated:
+        user = await request.auser()
+        if not user.is_authenticated:
             return JsonResponse({
                 'success': False,
                 'message': 'User must be logged in'
@@ -384,17 +455,21 @@ def track_interaction(request):
         interaction_type = request.POST.get('interaction_type', 'view')
         rating_value = request.POST.get('rating_value')
         
-        product = Product.objects.get(id=product_id)
-        session_id = get_user_session_id(request)
+        product = await Product.objects.aget(id=product_id)
         
-        # Track interaction
-        interaction = track_user_interaction(
-            user=request.user,
-            product=product,
-            interaction_type=interaction_type,
-            rating_value=int(rating_value) if rating_value else None,
-            session_id=session_id
-        )
+        # Track interaction (session and ORM writes stay on Django's sync thread).
+        # No deadline here: a write can't be cancelled once handed to the
+        # thread, so a "timed out" answer would only invite duplicate retries.
+        def track():
+            return track_user_interaction(
+                user=user,
+                product=product,
+                interaction_type=interaction_type,
+                rating_value=int(rating_value) if rating_value else None,
+                session_id=get_user_session_id(request)
+            )
+        
+        interaction = await sync_to_async(track)()
         
         return JsonResponse({
             'success': True,
@@ -413,27 +488,17 @@ def track_interaction(request):
         })
 
 
-def get_hybrid_recommendations(request):
-    """API endpoint for hybrid recommendations"""
+async def get_hybrid_recommendations(request):
+    """API endpoint for hybrid recommendations (async)"""
     try:
         product_id = int(request.GET.get('product_id', 0))
         n = int(request.GET.get('n', 6))
         
-        if advanced_recommendation_engine.product_similarity is None:
-            advanced_recommendation_engine.load_model()
-        
         # Get hybrid recommendations
-        if request.user.is_authenticated:
-            recommended_ids = advanced_recommendation_engine.get_hybrid_recommendations(
-                user_id=request.user.id,
-                product_id=product_id if product_id else None,
-                n_recommendations=n
-            )
-        else:
-            recommended_ids = advanced_recommendation_engine.get_hybrid_recommendations(
-                product_id=product_id if product_id else None,
-                n_recommendations=n
-            )
+        user = await request.auser()
+        user_id = user.id if user.is_authenticated else None
+        product_id = product_id if product_id else None
+        recommended_ids, timed_out = await _recommendation_ids('hybrid', user_id, product_id, n)
         
         products = Product.objects.filter(id__in=recommended_ids).values(
             'id', 'name', 'price', 'rating', 'category'
@@ -441,7 +506,8 @@ def get_hybrid_recommendations(request):
         
         return JsonResponse({
             'success': True,
-            'recommendations': list(products)
+            'recommendations': [product async for product in products],
+            'fallback': timed_out
         })
     except Exception as e:
         return JsonResponse({
@@ -531,7 +597,7 @@ def add_to_cart(request, product_id):
         cart_item.save()
         
         # Track interaction
-        track_user_interaction(request.user, product, 'cart')
+        track_user_interaction(request.user, product, 'cart', session_id=get_user_session_id(request))
         
         return JsonResponse({
             'success': True,
@@ -550,11 +616,18 @@ def view_cart(request):
     except Cart.DoesNotExist:
         cart = Cart.objects.create(user=request.user)
     
+    cart_items = cart.items.all()
+    
+    # Frequently bought together with the cart's products
+    bought_together_ids = co_purchase_index.for_basket([item.product_id for item in cart_items], n=4)
+    by_id = Product.objects.in_bulk(bought_together_ids)
+    
     context = {
         'cart': cart,
-        'cart_items': cart.items.all(),
+        'cart_items': cart_items,
         'total': cart.get_total(),
-        'item_count': cart.get_item_count()
+        'item_count': cart.get_item_count(),
+        'frequently_bought_together': [by_id[pid] for pid in bought_together_ids if pid in by_id]
     }
     return render(request, 'cart.html', context)
 
@@ -659,20 +732,30 @@ def checkout(request):
                 order.payment_status = 'pending'
                 order.order_status = 'pending'
             
-            order.save()
+            cart_items = list(cart.items.select_related('product'))
             
-            # Move cart items to order
-            for cart_item in cart.items.all():
-                OrderItem.objects.create(
-                    order=order,
-                    product=cart_item.product,
-                    product_name=cart_item.product.name,
-                    product_price=cart_item.product.price,
-                    quantity=cart_item.quantity,
-                    subtotal=cart_item.get_subtotal()
-                )
+            # Order and items become visible together (the co-purchase index
+            # reads whole orders)
+            with transaction.atomic():
+                order.save()
                 
-                # Track purchase interaction
+                # Move cart items to order
+                for cart_item in cart_items:
+                    OrderItem.objects.create(
+                        order=order,
+                        product=cart_item.product,
+                        product_name=cart_item.product.name,
+                        product_price=cart_item.product.price,
+                        quantity=cart_item.quantity,
+                        subtotal=cart_item.get_subtotal()
+                    )
+                
+                # Clear cart
+                cart.items.all().delete()
+            
+            # Track purchase interactions outside the order's transaction, so
+            # a failed analytics write can't roll back the order
+            for cart_item in cart_items:
                 track_user_interaction(
                     request.user,
                     cart_item.product,
@@ -680,8 +763,8 @@ def checkout(request):
                     session_id=get_user_session_id(request)
                 )
             
-            # Clear cart
-            cart.items.all().delete()
+            # Count the new order into "frequently bought together" (in the background)
+            co_purchase_index.request_refresh('order')
             
             # If CoD, go directly to confirmation
             if payment_method == 'cod':
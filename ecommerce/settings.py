@@ -92,5 +92,61 @@ STATICFILES_DIRS = [BASE_DIR / 'static']
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Caches ('recommendations' holds per-user recommendation results, LRU-culled)
+# By default it is in-process memory, so invalidating a user's results on
+# cart/purchase/rating only reaches the worker that saw the event. With
+# several web workers set ML_RECOMMENDATION_CACHE_URL to a shared Redis
+# (e.g. redis://127.0.0.1:6379/1, needs the redis package) so every worker
+# sees the same entries and invalidations.
+ML_RECOMMENDATION_CACHE_URL = os.environ.get('ML_RECOMMENDATION_CACHE_URL')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'recommendations': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'recommendations',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': 20000,
+        },
+    },
+}
+
+if ML_RECOMMENDATION_CACHE_URL:
+    # Redis evicts by its own maxmemory policy, MAX_ENTRIES doesn't apply
+    CACHES['recommendations'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': ML_RECOMMENDATION_CACHE_URL,
+        'TIMEOUT': 300,
+    }
+
+# ML retraining: triggers within the debounce window share one training run
+ML_RETRAIN_DEBOUNCE_SECONDS = 30
+ML_RETRAIN_MAX_DELAY_SECONDS = 300
+
+# Import the ML engines and load their models in AppConfig.ready. Set it in
+# the serving workers' environment only; migrate/shell then stay light.
+ML_WARMUP_ON_STARTUP = os.environ.get('ML_WARMUP_ON_STARTUP') == '1'
+
+# Out-of-process recommendation server ('unix:/path' or 'tcp:127.0.0.1:8765',
+# see ml/rpc.py). Unset: every worker serves recommendations in-process.
+ML_RECOMMENDATION_SERVER = os.environ.get('ML_RECOMMENDATION_SERVER')
+# Let clients queue retrains in the server process (its RPC op is otherwise
+# refused and workers fall back to their own scheduler)
+ML_RECOMMENDATION_SERVER_ALLOW_RETRAIN = os.environ.get('ML_RECOMMENDATION_SERVER_ALLOW_RETRAIN') == '1'
+ML_RECOMMENDATION_TIMEOUT = 0.25
+
+# Score concurrent hybrid queries together (ml/micro_batch.py). Only pays off
+# with threaded workers or the recommendation server.
+ML_MICRO_BATCH = os.environ.get('ML_MICRO_BATCH') == '1'
+ML_MICRO_BATCH_SIZE = 32
+ML_MICRO_BATCH_WAIT_MS = 2
+
+# Per-call deadline of the async read endpoints (search, recommendations);
+# slower calls answer with cached/fallback results instead
+ASYNC_API_DEADLINE_SECONDS = 0.5
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
\ No newline at end of file
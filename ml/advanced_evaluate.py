@@ -3,9 +3,9 @@ Advanced ML Model Evaluation and Analytics
 Provides detailed metrics about recommendations system performance
 """
 
-import pickle
 from datetime import datetime, timedelta
 from app.models import Product, UserInteraction, User
+from ml.advanced_recommendation import AdvancedRecommendationEngine
 from django.db.models import Count, Avg, Q
 
 
@@ -13,12 +13,22 @@ class AdvancedModelEvaluator:
     """Evaluate advanced recommendation model performance"""
     
     @staticmethod
-    def load_model(model_path="ml/advanced_model.pkl"):
+    def load_model(model_path="ml/advanced_model"):
         """Load trained model"""
         try:
-            with open(model_path, "rb") as f:
-                data = pickle.load(f)
-            return data
+            engine = AdvancedRecommendationEngine(model_path=model_path)
+            if not engine.load_model():
+                return None
+            return {
+                'timestamp': engine.trained_at,
+                'products_list': engine.products_list,
+                'users_list': engine.users_list,
+                'user_item_matrix': engine.user_item_matrix,
+                'product_neighbor_scores': engine.product_neighbor_scores,
+                'user_factors': engine.user_factors,
+                'item_factors': engine.item_factors,
+                'user_preferences': engine.user_preferences
+            }
         except:
             return None
     
@@ -66,7 +76,7 @@ class AdvancedModelEvaluator:
         
         user_item_matrix = model_data.get('user_item_matrix')
         if user_item_matrix is not None:
-            sparsity = 1 - (user_item_matrix != 0).sum().sum() / (user_item_matrix.shape[0] * user_item_matrix.shape[1])
+            sparsity = 1 - user_item_matrix.nnz / (user_item_matrix.shape[0] * user_item_matrix.shape[1])
             coverage = 1 - sparsity
             density = 1 - sparsity
             
@@ -74,7 +84,7 @@ class AdvancedModelEvaluator:
             print(f"   • Sparsity: {sparsity:.2%} (lower is better)")
             print(f"   • Density: {density:.2%}")
             print(f"   • Coverage: {coverage:.2%}")
-            print(f"   • Data Points: {(user_item_matrix != 0).sum().sum()}")
+            print(f"   • Data Points: {user_item_matrix.nnz}")
         else:
             print("   ⚠️  No user-item interactions available")
         
@@ -82,16 +92,17 @@ class AdvancedModelEvaluator:
         print("\n\n🔗 SIMILARITY METRICS:")
         print("-" * 70)
         
-        product_sim = model_data.get('product_similarity')
-        user_sim = model_data.get('user_similarity')
+        product_neighbor_scores = model_data.get('product_neighbor_scores')
+        user_factors = model_data.get('user_factors')
+        item_factors = model_data.get('item_factors')
         
-        if product_sim is not None:
-            print(f"   • Product Similarity Matrix: {product_sim.shape}")
-            print(f"   • Avg Product Similarity: {product_sim.mean():.4f}")
+        if product_neighbor_scores is not None:
+            print(f"   • Product Neighbor Lists: {product_neighbor_scores.shape}")
+            print(f"   • Avg Neighbor Similarity: {product_neighbor_scores.mean():.4f}")
         
-        if user_sim is not None:
-            print(f"   • User Similarity Matrix: {user_sim.shape}")
-            print(f"   • Avg User Similarity: {user_sim.mean():.4f}")
+        if user_factors is not None:
+            print(f"   • User Factors (ALS): {user_factors.shape}")
+            print(f"   • Item Factors (ALS): {item_factors.shape}")
         
         # USER PREFERENCES
         print("\n\n👤 USER PREFERENCES ANALYSIS:")
@@ -1,7 +1,7 @@
 """
 Advanced ML Recommendation Engine - Intermediate Level
 Features:
-- User-based Collaborative Filtering
+- Collaborative Filtering (implicit matrix factorization, ALS)
 - Hybrid Recommendations (Content + Collaborative + Popularity)
 - User Preference Learning
 - Cold Start Problem Handling
@@ -10,13 +10,75 @@ Features:
 
 import pandas as pd
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
+from scipy import sparse
 from sklearn.preprocessing import StandardScaler
-from sklearn.feature_extraction.text import TfidfVectorizer
-import pickle
+from ml.similarity import top_k_cosine_neighbors, DEFAULT_TOP_K
+from ml.als import ImplicitALS, DEFAULT_FACTORS
+from ml.artifacts import (
+    save_artifact, load_artifact, csr_to_arrays, arrays_to_csr, publish, publish_lock, check_current,
+    version_dir, VersionMoved,
+)
+from ml.hot_reload import ReloadableEngine
+from ml.trending import trending_engine
+from ml.user_tables import UserPreferences, InteractionHistory, RaggedArray
+from ml.data_loader import load_products, load_interactions, stream_product_text
+from ml.text_features import product_text_features, frame_text_chunks
 import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime, timedelta
 
+
+# Shared state for batch precompute workers, set once per process by
+# _init_block_worker so each task only ships its own user factor rows
+_block_worker_state = {}
+
+
+def _init_block_worker(user_item_matrix, item_factors, popularity_scores, score_weights, n_recommendations):
+    """Process pool initializer for precompute_user_recommendations"""
+    _block_worker_state.update(
+        user_item_matrix=user_item_matrix,
+        item_factors=item_factors,
+        popularity_scores=popularity_scores,
+        score_weights=score_weights,
+        n_recommendations=n_recommendations,
+    )
+
+
+def _score_user_block(start, factor_block):
+    """
+    Score one block of users against the whole catalog.
+    
+    Mirrors get_hybrid_recommendations(user_id=...) for every row at once:
+    user factors times item factors (one matrix product), minus what the
+    user has already seen, blended with popularity using the hybrid weights.
+    
+    Returns (start, top_n) where top_n holds product column indices, -1 padded.
+    """
+    user_item_matrix = _block_worker_state['user_item_matrix']
+    item_factors = _block_worker_state['item_factors']
+    popularity = _block_worker_state['popularity_scores']
+    weights = _block_worker_state['score_weights']
+    n_recommendations = _block_worker_state['n_recommendations']
+    n_rows = factor_block.shape[0]
+    
+    collaborative = np.maximum(factor_block @ item_factors.T, 0)
+    seen = user_item_matrix[start:start + n_rows].tocoo()
+    collaborative[seen.row, seen.col] = 0
+    
+    combined = collaborative * weights['collaborative'] + popularity * weights['popularity']
+    total_weight = (collaborative > 0) * weights['collaborative'] + (popularity > 0) * weights['popularity']
+    final_scores = np.full(combined.shape, -np.inf, dtype=np.float32)
+    np.divide(combined, total_weight, out=final_scores, where=total_weight > 0)
+    
+    n = min(n_recommendations, final_scores.shape[1])
+    top = np.argpartition(-final_scores, n - 1, axis=1)[:, :n]
+    top_scores = np.take_along_axis(final_scores, top, axis=1)
+    order = np.argsort(-top_scores, axis=1, kind='stable')
+    top = np.take_along_axis(top, order, axis=1).astype(np.int32)
+    top[~np.isfinite(np.take_along_axis(top_scores, order, axis=1))] = -1
+    return start, top
+
+
 class AdvancedRecommendationEngine:
     """
     Intermediate-level ML recommendation engine with:
@@ -26,70 +88,64 @@ class AdvancedRecommendationEngine:
     - Cold start handling
     """
     
-    def __init__(self, model_path="ml/advanced_model.pkl"):
+    # Hybrid weights for each score source
+    SCORE_WEIGHTS = {
+        'collaborative': 0.4,
+        'content_based': 0.35,
+        'popularity': 0.25
+    }
+    
+    # Recent products kept per user in interaction_history
+    HISTORY_LENGTH = 10
+    
+    # Scale of the name/description TF-IDF block (unit-norm rows) relative
+    # to the category one-hot in product features
+    TEXT_WEIGHT = 1.0
+    
+    def __init__(self, model_path="ml/advanced_model", n_neighbors=DEFAULT_TOP_K,
+                 n_factors=DEFAULT_FACTORS, als_threads=None):
         self.model_path = model_path
+        self.n_neighbors = n_neighbors
+        self.als = ImplicitALS(factors=n_factors, threads=als_threads)
         self.user_item_matrix = None
-        self.product_similarity = None
-        self.user_similarity = None
+        self.product_neighbors = None
+        self.product_neighbor_scores = None
+        self.popularity_scores = None
+        self.user_factors = None
+        self.item_factors = None
         self.product_df = None
         self.user_df = None
+        self.category_names = []
         self.products_list = []
         self.users_list = []
+        self.product_index = {}
+        self.user_index = {}
         self.interaction_history = {}
         self.user_preferences = {}
+        self.user_recommendations = None
+        self.user_weight_totals = None
+        self.last_trained_at = None
+        self.trained_at = None
+        self.model_version = None
         
     def train_from_database(self):
         """Train advanced model from Django database"""
         try:
-            from app.models import Product, UserInteraction
-            from django.db.models import Count, Avg
-            
             print("\n🚀 Training Advanced Recommendation Engine...\n")
             
-            # Load products
-            products = list(Product.objects.all().values(
-                'id', 'category', 'price', 'rating', 'total_reviews'
-            ))
+            # Stream products and interactions into compact columns
+            product_df = load_products()
             
-            if not products:
+            if product_df.empty:
                 print("❌ No products in database")
                 return False
             
-            self.product_df = pd.DataFrame(products)
-            self.products_list = [p['id'] for p in products]
-            
-            # 1. BUILD PRODUCT SIMILARITY MATRIX
-            print("1️⃣  Computing Product Similarity...")
-            product_features = self._extract_product_features()
-            self.product_similarity = cosine_similarity(product_features)
-            print(f"   ✓ Product similarity matrix: {self.product_similarity.shape}")
-            
-            # 2. BUILD USER INTERACTION MATRIX
-            print("2️⃣  Building User-Item Interaction Matrix...")
-            interactions = list(UserInteraction.objects.all().values(
-                'user_id', 'product_id', 'interaction_type', 'weight', 'rating_value'
-            ))
-            
-            if interactions:
-                interaction_df = pd.DataFrame(interactions)
-                self.user_item_matrix = self._build_weighted_interaction_matrix(interaction_df)
-                print(f"   ✓ User-item matrix: {self.user_item_matrix.shape}")
-                
-                # 3. BUILD USER SIMILARITY MATRIX
-                print("3️⃣  Computing User Similarity...")
-                if len(self.user_item_matrix) > 1:
-                    self.user_similarity = cosine_similarity(self.user_item_matrix)
-                    print(f"   ✓ User similarity matrix: {self.user_similarity.shape}")
-                
-                # 4. EXTRACT USER PREFERENCES
-                print("4️⃣  Learning User Preferences...")
-                self.user_preferences = self._extract_user_preferences(interaction_df)
-                print(f"   ✓ Preferences learned for {len(self.user_preferences)} users")
+            interaction_df = load_interactions()
             
-            # 5. BUILD INTERACTION HISTORY FOR COLD START
-            print("5️⃣  Building Interaction History...")
-            self.interaction_history = self._build_interaction_history(interaction_df) if interactions else {}
-            print(f"   ✓ History records: {len(self.interaction_history)}")
+            self.fit(
+                product_df, interaction_df if not interaction_df.empty else None,
+                product_text=stream_product_text()
+            )
             
             self.save_model()
             print("\n✅ Advanced model trained successfully!\n")
@@ -101,8 +157,76 @@ class AdvancedRecommendationEngine:
             traceback.print_exc()
             return False
     
-    def _extract_product_features(self):
-        """Extract and normalize product features"""
+    def fit(self, product_df, interaction_df=None, product_text=None):
+        """
+        Build every model component in memory from product and interaction
+        frames (the columns train_from_database loads). Nothing is saved, so
+        this can train on any subset, e.g. the training side of a time split.
+        
+        ``product_text`` is an iterable of (product_ids, texts) chunks for the
+        TF-IDF features, e.g. stream_product_text(). Without it the frame's
+        name/description columns are used if it has them.
+        """
+        self.product_df = product_df.reset_index(drop=True)
+        # DecimalFields come back as Decimal, which numpy/sklearn can't scale
+        self.product_df[['price', 'rating']] = self.product_df[['price', 'rating']].astype(float)
+        self.products_list = self.product_df['id'].tolist()
+        self.product_index = {pid: idx for idx, pid in enumerate(self.products_list)}
+        self.category_names = sorted(self.product_df['category'].unique().tolist())
+        
+        # 1. BUILD PRODUCT NEIGHBOR LISTS
+        print("1️⃣  Computing Product Similarity...")
+        product_features = self._extract_product_features(product_text)
+        self.product_neighbors, self.product_neighbor_scores = top_k_cosine_neighbors(
+            product_features, k=self.n_neighbors
+        )
+        print(f"   ✓ Product neighbor lists: {self.product_neighbors.shape}")
+        
+        self.popularity_scores = self._compute_popularity(
+            self.product_df['rating'].values, self.product_df['total_reviews'].values
+        )
+        
+        # 2. BUILD USER INTERACTION MATRIX
+        print("2️⃣  Building User-Item Interaction Matrix...")
+        self.last_trained_at = None
+        self.user_item_matrix = None
+        self.user_factors = None
+        self.item_factors = None
+        self.users_list = []
+        self.user_index = {}
+        self.user_preferences = UserPreferences.from_dict({}, {}, 0, self.category_names)
+        self.interaction_history = InteractionHistory.from_dict({}, {}, 0)
+        if interaction_df is not None and not interaction_df.empty:
+            # Watermark for incremental updates (see update_from_database)
+            self.last_trained_at = interaction_df['timestamp'].max().to_pydatetime()
+            self.user_item_matrix = self._build_weighted_interaction_matrix(interaction_df)
+            print(f"   ✓ User-item matrix: {self.user_item_matrix.shape} "
+                  f"({self.user_item_matrix.nnz} non-zero)")
+            
+            # 3. FACTORIZE USER-ITEM MATRIX (implicit ALS on raw weights)
+            print("3️⃣  Factorizing User-Item Matrix...")
+            self.user_factors, self.item_factors = self.als.fit(self._raw_user_rows())
+            print(f"   ✓ Factors: users {self.user_factors.shape}, items {self.item_factors.shape}")
+            
+            # 4. EXTRACT USER PREFERENCES
+            print("4️⃣  Learning User Preferences...")
+            self.user_preferences = self._extract_user_preferences(interaction_df)
+            print(f"   ✓ Preferences learned for {len(self.user_preferences)} users")
+            
+            # 5. BUILD INTERACTION HISTORY FOR COLD START
+            print("5️⃣  Building Interaction History...")
+            self.interaction_history = self._build_interaction_history(interaction_df)
+            print(f"   ✓ History records: {len(self.interaction_history)}")
+        
+        # Any precomputed table belongs to the previous model
+        self.user_recommendations = None
+        return True
+    
+    def _extract_product_features(self, product_text=None):
+        """
+        Extract and normalize product features as one sparse (CSR) matrix:
+        price, category one-hot, rating, reviews and name/description TF-IDF
+        """
         try:
             # Normalize price
             prices = self.product_df['price'].values.reshape(-1, 1)
@@ -110,7 +234,12 @@ class AdvancedRecommendationEngine:
             price_normalized = scaler.fit_transform(prices)
             
             # Category encoding (one-hot)
-            categories = pd.get_dummies(self.product_df['category'], prefix='cat')
+            n_products = len(self.product_df)
+            codes = pd.Categorical(self.product_df['category'], categories=self.category_names).codes
+            categories = sparse.csr_matrix(
+                (np.ones(n_products, dtype=np.float32), (np.arange(n_products), codes)),
+                shape=(n_products, len(self.category_names))
+            )
             
             # Rating impact
             ratings = self.product_df['rating'].values.reshape(-1, 1) / 5.0
@@ -122,76 +251,382 @@ class AdvancedRecommendationEngine:
             else:
                 reviews = np.zeros_like(reviews)
             
+            # Name + description TF-IDF (unit rows, scaled by TEXT_WEIGHT)
+            if product_text is None and {'name', 'description'} <= set(self.product_df.columns):
+                product_text = frame_text_chunks(self.product_df)
+            blocks = [
+                sparse.csr_matrix(price_normalized),
+                categories,
+                sparse.csr_matrix(ratings),
+                sparse.csr_matrix(reviews)
+            ]
+            if product_text is not None:
+                text = product_text_features(product_text, self.product_index, n_products)
+                blocks.append(text * self.TEXT_WEIGHT)
+            
             # Combine all features
-            features = np.hstack([
-                price_normalized,
-                categories.values,
-                ratings,
-                reviews
-            ])
+            features = sparse.hstack(blocks, format='csr', dtype=np.float32)
             
             return features
         except Exception as e:
             print(f"Feature extraction error: {e}")
-            return np.eye(len(self.product_df))
+            return sparse.identity(len(self.product_df), dtype=np.float32, format='csr')
     
     def _build_weighted_interaction_matrix(self, interaction_df):
-        """Build user-item matrix with weighted interactions"""
+        """
+        Build a sparse (CSR) user-item matrix with weighted interactions.
+        Rows follow ``users_list`` and columns follow ``products_list``.
+        """
         try:
-            # Aggregate interactions by weight
-            interaction_pivot = interaction_df.groupby(['user_id', 'product_id'])['weight'].sum().reset_index()
+            # Interactions on products outside the catalog have no column
+            known = interaction_df['product_id'].isin(self.product_index.keys())
+            interaction_df = interaction_df[known]
+            
+            user_ids, rows = np.unique(interaction_df['user_id'].values, return_inverse=True)
+            cols = interaction_df['product_id'].map(self.product_index).values
+            weights = interaction_df['weight'].values.astype(np.float32)
             
-            matrix = interaction_pivot.pivot_table(
-                index='user_id',
-                columns='product_id',
-                values='weight'
-            ).fillna(0)
+            # Duplicate (user, product) pairs are summed by the CSR conversion
+            matrix = sparse.coo_matrix(
+                (weights, (rows, cols)),
+                shape=(len(user_ids), len(self.products_list))
+            ).tocsr()
             
             # Normalize by row (user)
-            row_sums = matrix.sum(axis=1)
+            row_sums = np.asarray(matrix.sum(axis=1)).ravel()
             row_sums[row_sums == 0] = 1  # Avoid division by zero
-            matrix = matrix.div(row_sums, axis=0)
+            matrix = sparse.diags(1.0 / row_sums).dot(matrix).tocsr().astype(np.float32)
+            # Raw row totals let incremental updates re-normalize patched rows
+            self.user_weight_totals = row_sums.astype(np.float32)
             
-            self.users_list = list(matrix.index)
+            self.users_list = user_ids.tolist()
+            self.user_index = {uid: idx for idx, uid in enumerate(self.users_list)}
             return matrix
         except Exception as e:
             print(f"Matrix building error: {e}")
             return None
     
-    def _extract_user_preferences(self, interaction_df):
-        """Extract category and price preferences by user"""
-        prefs = {}
+    def _raw_user_rows(self, rows=None):
+        """Un-normalized interaction weights of user ``rows`` (all users by default)"""
+        totals = self.user_weight_totals if rows is None else self.user_weight_totals[rows]
+        matrix = self.user_item_matrix if rows is None else self.user_item_matrix[rows]
+        return sparse.diags(totals).dot(matrix).tocsr()
+    
+    def update_from_database(self, retries=2):
+        """
+        Incrementally fold interactions newer than the last training into the
+        model instead of running a full train_from_database.
+        
+        Only the new UserInteraction rows are read. Affected user rows of the
+        user-item matrix, their factors, preferences and history are
+        patched, and the new rows are persisted as a delta next to the model.
+        If another process published in the meantime, the patched model is
+        dropped and the update rerun on the newly published version, up to
+        ``retries`` times.
+        """
+        try:
+            from app.models import UserInteraction
+            
+            if self.user_item_matrix is None or self.last_trained_at is None:
+                print("ℹ️  No incremental baseline, running full training")
+                return self.train_from_database()
+            
+            interaction_df = load_interactions(
+                UserInteraction.objects.filter(timestamp__gt=self.last_trained_at).order_by('timestamp'),
+                fields=('user_id', 'product_id', 'interaction_type', 'weight', 'timestamp')
+            )
+            
+            if interaction_df.empty:
+                print("✓ Model is up to date")
+                return True
+            
+            if not self._apply_interactions(interaction_df):
+                return False
+            
+            try:
+                self.save_delta(interaction_df)
+            except VersionMoved as e:
+                if retries <= 0:
+                    print(f"❌ Incremental update gave up: {e}")
+                    return False
+                # The new version may already contain these interactions
+                print(f"ℹ️  {e}, updating the published version instead")
+                if not self.load_model():
+                    return False
+                return self.update_from_database(retries - 1)
+            print(f"✓ Incremental update applied: {len(interaction_df)} interactions")
+            return True
+        except Exception as e:
+            print(f"❌ Incremental update error: {e}")
+            return False
+    
+    def _apply_interactions(self, interaction_df):
+        """Patch the trained model in place with a batch of new interactions"""
         try:
-            for user_id in interaction_df['user_id'].unique():
-                user_interactions = interaction_df[interaction_df['user_id'] == user_id]
+            known = interaction_df['product_id'].isin(self.product_index.keys())
+            if not known.all():
+                # Products added since the last full training have no column yet
+                print(f"⚠️  Skipping {int((~known).sum())} interactions on untrained products")
+            new_interactions = interaction_df[known]
+            
+            if not new_interactions.empty:
+                # New users get rows appended at the end
+                for user_id in pd.unique(new_interactions['user_id']):
+                    if user_id not in self.user_index:
+                        self.user_index[user_id] = len(self.users_list)
+                        self.users_list.append(user_id)
+                n_users = len(self.users_list)
                 
-                # Get products they interacted with
-                product_ids = user_interactions['product_id'].values
-                products = self.product_df[self.product_df['id'].isin(product_ids)]
+                rows = new_interactions['user_id'].map(self.user_index).values
+                cols = new_interactions['product_id'].map(self.product_index).values
+                delta = sparse.coo_matrix(
+                    (new_interactions['weight'].values.astype(np.float32), (rows, cols)),
+                    shape=(n_users, len(self.products_list))
+                ).tocsr()
+                affected = np.unique(rows)
                 
-                if not products.empty:
-                    prefs[user_id] = {
-                        'preferred_categories': products['category'].mode().tolist(),
-                        'avg_price': float(products['price'].mean()),
-                        'interaction_count': len(user_interactions),
-                        'avg_rating': float(products['rating'].mean())
-                    }
+                self._patch_user_rows(affected, delta)
+                self._patch_user_factors(affected)
+                self._patch_user_profiles(affected, new_interactions)
+            
+            self.last_trained_at = interaction_df['timestamp'].max().to_pydatetime()
+            return True
+        except Exception as e:
+            print(f"Incremental apply error: {e}")
+            return False
+    
+    def _patch_user_rows(self, affected, delta):
+        """Replace the normalized user-item rows of ``affected`` users"""
+        n_users = delta.shape[0]
+        matrix = self.user_item_matrix.copy()
+        matrix.resize(n_users, matrix.shape[1])
+        totals = np.zeros(n_users, dtype=np.float32)
+        totals[:len(self.user_weight_totals)] = self.user_weight_totals
+        
+        # Back to raw weights, add the new ones, normalize again
+        raw_rows = sparse.diags(totals[affected]).dot(matrix[affected]) + delta[affected]
+        totals[affected] = np.asarray(raw_rows.sum(axis=1)).ravel()
+        new_rows = sparse.diags(1.0 / totals[affected]).dot(raw_rows)
+        
+        unaffected = np.ones(n_users, dtype=np.float32)
+        unaffected[affected] = 0
+        placement = sparse.csr_matrix(
+            (np.ones(len(affected), dtype=np.float32), (affected, np.arange(len(affected)))),
+            shape=(n_users, len(affected))
+        )
+        self.user_item_matrix = (
+            sparse.diags(unaffected).dot(matrix) + placement.dot(new_rows)
+        ).tocsr().astype(np.float32)
+        self.user_weight_totals = totals
+        
+        # Precomputed rows of affected users are stale, serve them live instead
+        if self.user_recommendations is not None:
+            table = np.full((n_users, self.user_recommendations.shape[1]), -1, dtype=np.int32)
+            table[:len(self.user_recommendations)] = self.user_recommendations
+            table[affected] = -1
+            self.user_recommendations = table
+    
+    def _patch_user_factors(self, affected):
+        """
+        Fold ``affected`` users back in against the fixed item factors.
+        Item factors only change on the next full training.
+        """
+        n_users = self.user_item_matrix.shape[0]
+        factors = np.zeros((n_users, self.item_factors.shape[1]), dtype=np.float32)
+        factors[:len(self.user_factors)] = self.user_factors
+        factors[affected] = self.als.recalculate_users(self._raw_user_rows(affected), self.item_factors)
+        self.user_factors = factors
+    
+    def _patch_user_profiles(self, affected, new_interactions):
+        """
+        Refresh preferences and recent history of ``affected`` users with the
+        grouped computations of a full build, run on just their rows
+        (position i of every intermediate array is user ``affected[i]``)
+        """
+        n_users = len(self.users_list)
+        n_affected = len(affected)
+        position = np.full(n_users, -1, dtype=np.int64)
+        position[affected] = np.arange(n_affected)
+        new_users = position[new_interactions['user_id'].map(self.user_index).to_numpy(dtype=np.int64)]
+        
+        # Preferences from every product now in the affected users' rows
+        rows = self.user_item_matrix[affected].tocoo()
+        categories, avg_price, avg_rating = self._preference_columns(
+            rows.row.astype(np.int64), rows.col.astype(np.int64), n_affected
+        )
+        previous_count = self.user_preferences.interaction_count
+        interaction_count = np.bincount(new_users, minlength=n_affected).astype(np.int32)
+        known = affected < len(previous_count)
+        interaction_count[known] += previous_count[affected[known]]
+        
+        # History: the new interactions newest first, then the previous history
+        timestamps = pd.to_datetime(new_interactions['timestamp'], utc=True).dt.as_unit('ns') \
+            .astype('int64').to_numpy()
+        users, ranks, product_ids = self._newest_first(
+            new_users, timestamps, new_interactions['product_id'].to_numpy(dtype=np.int64), n_affected
+        )
+        new_counts = np.bincount(users, minlength=n_affected)
+        previous = self.interaction_history.products.take_rows(affected)
+        previous_lengths = np.diff(previous.indptr)
+        previous_users = np.repeat(np.arange(n_affected), previous_lengths)
+        previous_ranks = np.arange(len(previous.values)) - np.repeat(previous.indptr[:-1], previous_lengths) \
+            + new_counts[previous_users]
+        
+        users = np.concatenate([users, previous_users])
+        ranks = np.concatenate([ranks, previous_ranks])
+        product_ids = np.concatenate([product_ids, previous.values.astype(np.int64)])
+        kept = ranks < self.HISTORY_LENGTH
+        order = np.lexsort((ranks[kept], users[kept]))
+        history = RaggedArray.from_sorted_rows(users[kept][order], product_ids[kept][order], n_affected)
+        
+        self.user_preferences = self.user_preferences.with_rows(
+            affected, categories, avg_price, avg_rating, interaction_count, n_users
+        )
+        self.interaction_history = self.interaction_history.with_rows(affected, history, n_users)
+    
+    def _delta_dir(self):
+        """Directory holding incremental deltas for the loaded model version"""
+        version = self.model_version.split(':')[0]
+        return os.path.join(version_dir(self.model_path, version), 'deltas')
+    
+    def save_delta(self, interaction_df):
+        """
+        Persist a batch of incrementally applied interactions inside the model
+        directory. Raises VersionMoved, without writing anything, when the
+        published model is no longer the one the batch was applied to.
+        """
+        try:
+            if self.model_version is None:
+                return self.save_model()
+            
+            until = pd.Timestamp(self.last_trained_at)
+            delta_path = os.path.join(self._delta_dir(), f"{until.strftime('%Y%m%d%H%M%S%f')}.npz")
+            with publish_lock(self.model_path):
+                check_current(self.model_path, self.model_version)
+                os.makedirs(self._delta_dir(), exist_ok=True)
+                np.savez(
+                    delta_path,
+                    until=np.int64(until.value),
+                    user_id=interaction_df['user_id'].to_numpy(dtype=np.int64),
+                    product_id=interaction_df['product_id'].to_numpy(dtype=np.int64),
+                    weight=interaction_df['weight'].to_numpy(dtype=np.float32),
+                    timestamp=pd.to_datetime(interaction_df['timestamp'], utc=True).dt.as_unit('ns').astype('int64').to_numpy(),
+                )
+                
+                # Bump the revision so other workers pick the delta up
+                version, revision = self.model_version.split(':')
+                self.model_version = publish(self.model_path, version, int(revision) + 1)
+            print(f"✓ Delta saved to {delta_path}")
+            return True
+        except VersionMoved:
+            raise
+        except Exception as e:
+            print(f"Delta save error: {e}")
+            return False
+    
+    def _replay_deltas(self):
+        """Apply persisted deltas newer than the loaded base model"""
+        if self.model_version is None or not os.path.isdir(self._delta_dir()):
+            return 0
+        
+        replayed = 0
+        for name in sorted(os.listdir(self._delta_dir())):
+            with np.load(os.path.join(self._delta_dir(), name)) as delta:
+                until = pd.Timestamp(int(delta['until']), unit='ns', tz='UTC')
+                if self.last_trained_at is not None and until <= self.last_trained_at:
+                    continue
+                interaction_df = pd.DataFrame({
+                    'user_id': delta['user_id'],
+                    'product_id': delta['product_id'],
+                    'weight': delta['weight'],
+                    'timestamp': pd.to_datetime(delta['timestamp'], unit='ns', utc=True),
+                })
+            if self._apply_interactions(interaction_df):
+                replayed += 1
+        return replayed
+    
+    def _extract_user_preferences(self, interaction_df):
+        """
+        Extract category and price preferences by user (rows of ``users_list``)
+        
+        One pass over the interactions: distinct (user, product) pairs are
+        joined to product columns by position, then averaged with bincount.
+        Preferred categories are the most frequent (ties kept) among them.
+        """
+        n_users = len(self.users_list)
+        try:
+            user_rows = interaction_df['user_id'].map(self.user_index)
+            product_rows = interaction_df['product_id'].map(self.product_index)
+            
+            interaction_count = np.bincount(
+                user_rows.dropna().astype(np.int64), minlength=n_users
+            ).astype(np.int32)
+            
+            pairs = pd.DataFrame({'user': user_rows, 'product': product_rows}).dropna()
+            pairs = pairs.astype(np.int64).drop_duplicates()
+            categories, avg_price, avg_rating = self._preference_columns(
+                pairs['user'].to_numpy(), pairs['product'].to_numpy(), n_users
+            )
         except Exception as e:
             print(f"Preference extraction error: {e}")
+            return UserPreferences.from_dict({}, self.user_index, n_users, self.category_names)
         
-        return prefs
+        return UserPreferences(self.user_index, self.category_names, categories,
+                               avg_price, avg_rating, interaction_count)
+    
+    def _preference_columns(self, users, products, n_users):
+        """
+        Preferred category codes (RaggedArray), average price and average
+        rating of rows 0..n_users-1 from distinct (user row, product row) pairs
+        """
+        n_products = np.maximum(np.bincount(users, minlength=n_users), 1)
+        avg_price = np.bincount(users, self.product_df['price'].to_numpy()[products], n_users) / n_products
+        avg_rating = np.bincount(users, self.product_df['rating'].to_numpy()[products], n_users) / n_products
+        
+        # Modal categories: per (user, category) counts, keep each user's maximum
+        codes = pd.Categorical(self.product_df['category'], categories=self.category_names).codes
+        category_counts = pd.DataFrame({'user': users, 'category': codes[products]}) \
+            .groupby(['user', 'category']).size().reset_index(name='count')
+        top = category_counts['count'] == category_counts.groupby('user')['count'].transform('max')
+        modal = category_counts[top]
+        categories = RaggedArray.from_sorted_rows(
+            modal['user'].to_numpy(), modal['category'].to_numpy(dtype=np.int32), n_users
+        )
+        return categories, avg_price.astype(np.float32), avg_rating.astype(np.float32)
+    
+    def _newest_first(self, users, timestamps, product_ids, n_users, keep=None):
+        """
+        Product ids grouped by user row, newest first, as (users, ranks,
+        products) sorted by user; only the first ``keep`` per user
+        (HISTORY_LENGTH by default)
+        """
+        keep = self.HISTORY_LENGTH if keep is None else keep
+        order = np.lexsort((-timestamps, users))
+        users = users[order]
+        counts = np.bincount(users, minlength=n_users)
+        ranks = np.arange(len(users)) - np.repeat(np.cumsum(counts) - counts, counts)
+        recent = ranks < keep
+        return users[recent], ranks[recent], product_ids[order][recent]
     
     def _build_interaction_history(self, interaction_df):
-        """Build interaction history for cold start problem"""
-        history = {}
+        """Build interaction history for cold start problem (last HISTORY_LENGTH per user)"""
+        n_users = len(self.users_list)
         try:
-            for user_id in interaction_df['user_id'].unique():
-                user_interactions = interaction_df[interaction_df['user_id'] == user_id].sort_values('timestamp', ascending=False)
-                history[user_id] = list(user_interactions['product_id'].values[:10])  # Last 10
+            user_rows = interaction_df['user_id'].map(self.user_index)
+            known = user_rows.notna().to_numpy()
+            users = user_rows.to_numpy()[known].astype(np.int64)
+            timestamps = pd.to_datetime(interaction_df['timestamp'], utc=True).dt.as_unit('ns') \
+                .astype('int64').to_numpy()[known]
+            product_ids = interaction_df['product_id'].to_numpy()[known].astype(np.int64)
+            
+            # Newest first within each user, then keep the first HISTORY_LENGTH
+            users, _, product_ids = self._newest_first(users, timestamps, product_ids, n_users)
+            products = RaggedArray.from_sorted_rows(users, product_ids, n_users)
         except Exception as e:
             print(f"History building error: {e}")
+            return InteractionHistory.from_dict({}, self.user_index, n_users)
         
-        return history
+        return InteractionHistory(self.user_index, products)
     
     def get_hybrid_recommendations(self, user_id=None, product_id=None, n_recommendations=6):
         """
@@ -199,152 +634,300 @@ class AdvancedRecommendationEngine:
         1. Collaborative Filtering (if user has history)
         2. Content-Based (product similarity)
         3. Popularity (high rating + reviews)
+        
+        Every score is a NumPy vector aligned to ``products_list``.
         """
         try:
-            if self.product_similarity is None:
-                self.load_model()
+            if self.product_neighbors is None:
+                # No model loaded yet (see ReloadableEngine)
+                return self.get_trending_products(n_recommendations)
             
             recommendations = {}
             
             # 1. COLLABORATIVE FILTERING SCORE
-            if user_id and self.user_similarity is not None:
-                collab_score = self._collaborative_score(user_id)
-                recommendations['collaborative'] = collab_score
+            if user_id and self.user_factors is not None:
+                recommendations['collaborative'] = self._collaborative_score(user_id)
             
             # 2. CONTENT-BASED SCORE (from product)
             if product_id:
-                content_score = self._content_based_score(product_id)
-                recommendations['content_based'] = content_score
+                recommendations['content_based'] = self._content_based_score(product_id)
             
             # 3. POPULARITY SCORE
-            popularity_score = self._popularity_score()
-            recommendations['popularity'] = popularity_score
+            recommendations['popularity'] = self._popularity_score()
             
             # Combine scores (hybrid approach)
             final_scores = self._combine_scores(recommendations)
             
             # Get top recommendations
-            if isinstance(final_scores, dict):
-                sorted_products = sorted(final_scores.items(), key=lambda x: x[1], reverse=True)
-                recommended_ids = [pid for pid, score in sorted_products[:n_recommendations]]
-            else:
-                recommended_ids = final_scores[:n_recommendations]
-            
-            return recommended_ids
+            return self._top_n_products(final_scores, n_recommendations)
         
         except Exception as e:
             print(f"Hybrid recommendation error: {e}")
             return self.get_trending_products(n_recommendations)
     
-    def _collaborative_score(self, user_id):
-        """Calculate collaborative filtering scores"""
+    def get_hybrid_recommendations_batch(self, queries):
+        """
+        get_hybrid_recommendations for many queries at once
+        
+        Args:
+            queries: List of (user_id, product_id, n_recommendations) tuples
+        
+        Returns:
+            One id list per query. Scores are the same as the single-query
+            path, computed as (queries x products) matrix operations: one
+            factor matmul for all known users, one neighbor scatter for all
+            context products and one top-N partition for every row.
+        """
         try:
-            if user_id not in self.users_list:
-                return {}
+            if self.product_neighbors is None:
+                return [self.get_trending_products(n) for _, _, n in queries]
             
-            user_idx = self.users_list.index(user_id)
-            user_vector = self.user_item_matrix.iloc[user_idx].values
+            n_products = len(self.products_list)
+            user_rows = np.array([
+                self.user_index.get(user_id, -1) if user_id else -1 for user_id, _, _ in queries
+            ], dtype=np.int64)
+            product_rows = np.array([
+                self.product_index.get(product_id, -1) if product_id else -1 for _, product_id, _ in queries
+            ], dtype=np.int64)
             
-            # Find similar users
-            similar_users_scores = self.user_similarity[user_idx]
-            similar_user_indices = np.argsort(-similar_users_scores)[1:6]  # Top 5 similar
+            combined_score = np.zeros((len(queries), n_products), dtype=np.float32)
+            total_weight = np.zeros((len(queries), n_products), dtype=np.float32)
             
-            # Aggregate products from similar users
-            product_scores = {}
-            for similar_idx in similar_user_indices:
-                similar_user_vector = self.user_item_matrix.iloc[similar_idx].values
+            # 1. COLLABORATIVE: one matmul for every query; unknown users get a
+            # zero factor row, i.e. no positive score and no weight
+            if self.user_factors is not None and (user_rows >= 0).any():
+                weight = self.SCORE_WEIGHTS['collaborative']
+                factors = self.user_factors[np.maximum(user_rows, 0)]
+                factors[user_rows < 0] = 0
+                np.matmul(factors, self.item_factors.T, out=combined_score)
+                np.maximum(combined_score, 0, out=combined_score)
                 
-                # Products this user hasn't seen
-                not_seen = user_vector == 0
-                similar_products = similar_user_vector * not_seen
+                # Products each user has already seen
+                with_user = np.flatnonzero(user_rows >= 0)
+                seen = self.user_item_matrix[user_rows[with_user]].tocoo()
+                combined_score[with_user[seen.row], seen.col] = 0
                 
-                for pid, score in enumerate(similar_products):
-                    if score > 0:
-                        product_scores[self.product_df.iloc[pid]['id']] = product_scores.get(
-                            self.product_df.iloc[pid]['id'], 0
-                        ) + score
+                np.greater(combined_score, 0, out=total_weight)
+                total_weight *= weight
+                combined_score *= weight
+            
+            # 2. CONTENT-BASED: only the K neighbor entries of each context product
+            with_product = np.flatnonzero(product_rows >= 0)
+            if len(with_product):
+                weight = self.SCORE_WEIGHTS['content_based']
+                rows = with_product[:, np.newaxis]
+                neighbors = self.product_neighbors[product_rows[with_product]]
+                scores = self.product_neighbor_scores[product_rows[with_product]]
+                combined_score[rows, neighbors] += scores * weight
+                total_weight[rows, neighbors] += (scores > 0) * weight
+            
+            # 3. POPULARITY: the same vector for every query
+            popularity = self._popularity_score()
+            if popularity is not None:
+                weight = self.SCORE_WEIGHTS['popularity']
+                combined_score += popularity * weight
+                total_weight += (popularity > 0) * np.float32(weight)
+            
+            # Weighted average where any source scored, -inf elsewhere
+            final_scores = combined_score
+            np.divide(combined_score, total_weight, out=final_scores, where=total_weight > 0)
+            final_scores[total_weight == 0] = -np.inf
+            
+            # Top N of every row with one partition (N of the largest query)
+            k = min(max(n for _, _, n in queries), n_products)
+            if k <= 0:
+                return [[] for _ in queries]
+            top = np.argpartition(-final_scores, k - 1, axis=1)[:, :k] if k < n_products \
+                else np.broadcast_to(np.arange(n_products), final_scores.shape)
+            top_scores = np.take_along_axis(final_scores, top, axis=1)
+            order = np.argsort(-top_scores, axis=1, kind='stable')
+            ranked = np.take_along_axis(top, order, axis=1)
+            ranked_scores = np.take_along_axis(top_scores, order, axis=1)
+            
+            return [
+                [self.products_list[idx] for idx in ranked[row, :n][np.isfinite(ranked_scores[row, :n])]]
+                for row, (_, _, n) in enumerate(queries)
+            ]
+        except Exception as e:
+            print(f"Batch hybrid recommendation error: {e}")
+            return [self.get_trending_products(n) for _, _, n in queries]
+    
+    def get_session_recommendations(self, recent_products, n_recommendations=6):
+        """
+        Recommendations for a browsing session from the precomputed neighbor
+        lists alone (no user row, no database access)
+        
+        Args:
+            recent_products: (product_id, weight) pairs of the session's window
+            n_recommendations: Number of ids to return
+        
+        Returns:
+            Up to n ids; a product's score is the weighted sum of its
+            similarity to every recent product. Products already in the window
+            are never returned, and [] means nothing in the window is known.
+        """
+        try:
+            if self.product_neighbors is None:
+                return []
+            
+            rows, weights = [], []
+            for product_id, weight in recent_products:
+                product_idx = self.product_index.get(product_id)
+                if product_idx is not None:
+                    rows.append(product_idx)
+                    weights.append(weight)
+            if not rows:
+                return []
+            
+            rows = np.array(rows, dtype=np.int64)
+            contributions = self.product_neighbor_scores[rows] * np.array(weights, dtype=np.float32)[:, np.newaxis]
+            scores = np.zeros(len(self.products_list), dtype=np.float32)
+            np.add.at(scores, self.product_neighbors[rows], contributions)
+            
+            scores[rows] = 0
+            scores[scores <= 0] = -np.inf
+            return self._top_n_products(scores, n_recommendations)
+        except Exception as e:
+            print(f"Session recommendation error: {e}")
+            return []
+    
+    def _collaborative_score(self, user_id):
+        """Calculate collaborative filtering scores (None if the user is unknown)"""
+        try:
+            user_idx = self.user_index.get(user_id)
+            if user_idx is None:
+                return None
+            
+            # Predicted preference for every product: one dot product
+            product_scores = np.maximum(self.item_factors @ self.user_factors[user_idx], 0)
+            
+            # Products this user hasn't seen
+            product_scores[self.user_item_matrix.getrow(user_idx).indices] = 0
             
             return product_scores
         except Exception as e:
             print(f"Collaborative score error: {e}")
-            return {}
+            return None
     
     def _content_based_score(self, product_id):
-        """Calculate content-based filtering scores"""
+        """Calculate content-based filtering scores (None if the product is unknown)"""
         try:
-            if product_id not in self.products_list:
-                return {}
-            
-            product_idx = self.products_list.index(product_id)
-            similarity_scores = self.product_similarity[product_idx]
+            product_idx = self.product_index.get(product_id)
+            if product_idx is None:
+                return None
             
-            scores = {}
-            for idx, score in enumerate(similarity_scores):
-                if idx != product_idx:
-                    scores[self.product_df.iloc[idx]['id']] = score
+            # Precomputed top-K neighbors (the product itself is never included)
+            scores = np.zeros(len(self.products_list), dtype=np.float32)
+            scores[self.product_neighbors[product_idx]] = self.product_neighbor_scores[product_idx]
             
             return scores
         except Exception as e:
             print(f"Content-based score error: {e}")
-            return {}
+            return None
     
     def _popularity_score(self):
-        """Calculate popularity scores (rating + review count)"""
-        scores = {}
+        """Popularity scores (rating + review count), precomputed at train time"""
         try:
-            for _, product in self.product_df.iterrows():
-                # Normalize rating (0-5) and reviews
-                rating_score = product['rating'] / 5.0
-                review_score = min(product['total_reviews'] / 100.0, 1.0)  # Cap at 100 reviews
-                
-                # Weighted combination
-                popularity = (rating_score * 0.6) + (review_score * 0.4)
-                scores[product['id']] = popularity
+            if self.popularity_scores is None:
+                self.popularity_scores = self._compute_popularity(
+                    self.product_df['rating'].values, self.product_df['total_reviews'].values
+                )
+            return self.popularity_scores
         except Exception as e:
             print(f"Popularity score error: {e}")
+            return None
+    
+    @staticmethod
+    def _compute_popularity(ratings, total_reviews):
+        """Calculate popularity scores (rating + review count) for all products at once"""
+        # Normalize rating (0-5) and reviews
+        rating_score = np.asarray(ratings, dtype=np.float32) / 5.0
+        review_score = np.minimum(
+            np.asarray(total_reviews, dtype=np.float32) / 100.0, 1.0
+        )  # Cap at 100 reviews
         
-        return scores
+        # Weighted combination
+        return (rating_score * 0.6) + (review_score * 0.4)
+    
+    def refresh_popularity(self):
+        """
+        Recompute popularity from the current product ratings and review
+        counts without retraining the rest of the model
+        """
+        try:
+            from app.models import Product
+            
+            if self.product_df is None:
+                print("❌ No trained model to refresh")
+                return False
+            
+            ratings = self.product_df['rating'].to_numpy(dtype=np.float32, copy=True)
+            total_reviews = self.product_df['total_reviews'].to_numpy(dtype=np.float32, copy=True)
+            
+            for pid, rating, reviews in Product.objects.values_list('id', 'rating', 'total_reviews').iterator():
+                idx = self.product_index.get(pid)
+                if idx is not None:
+                    ratings[idx] = rating
+                    total_reviews[idx] = reviews
+            
+            self.product_df['rating'] = ratings.astype(float)
+            self.product_df['total_reviews'] = total_reviews.astype(int)
+            # Swap in the new vector in one assignment so readers never see a partial update
+            self.popularity_scores = self._compute_popularity(ratings, total_reviews)
+            
+            self.save_model()
+            print(f"✓ Popularity refreshed for {len(self.products_list)} products")
+            return True
+        except Exception as e:
+            print(f"Popularity refresh error: {e}")
+            return False
     
     def _combine_scores(self, recommendations):
-        """Combine different recommendation scores using weighted average"""
+        """
+        Combine different recommendation scores using weighted average.
+        
+        A source only counts towards a product's total weight when it gave
+        that product a positive score; products no source scored positively
+        get -inf so they are never recommended.
+        """
         try:
-            final_scores = {}
-            all_product_ids = set()
-            
-            # Collect all products
-            for score_dict in recommendations.values():
-                all_product_ids.update(score_dict.keys())
-            
-            # Weighted average
-            weights = {
-                'collaborative': 0.4,
-                'content_based': 0.35,
-                'popularity': 0.25
-            }
+            combined_score = np.zeros(len(self.products_list), dtype=np.float32)
+            total_weight = np.zeros(len(self.products_list), dtype=np.float32)
             
-            for pid in all_product_ids:
-                combined_score = 0
-                total_weight = 0
-                
-                for category, weight in weights.items():
-                    if category in recommendations:
-                        score = recommendations[category].get(pid, 0)
-                        combined_score += score * weight
-                        if score > 0:
-                            total_weight += weight
-                
-                if total_weight > 0:
-                    final_scores[pid] = combined_score / total_weight
+            for category, weight in self.SCORE_WEIGHTS.items():
+                scores = recommendations.get(category)
+                if scores is None:
+                    continue
+                combined_score += scores * weight
+                total_weight += (scores > 0) * weight
             
+            final_scores = np.full(len(self.products_list), -np.inf, dtype=np.float32)
+            scored = total_weight > 0
+            final_scores[scored] = combined_score[scored] / total_weight[scored]
             return final_scores
         except Exception as e:
             print(f"Score combination error: {e}")
-            return {}
+            return np.full(len(self.products_list), -np.inf, dtype=np.float32)
+    
+    def _top_n_products(self, final_scores, n_recommendations):
+        """Return the ids of the n highest-scoring products, best first"""
+        candidates = np.flatnonzero(np.isfinite(final_scores))
+        if len(candidates) > n_recommendations:
+            top = np.argpartition(-final_scores[candidates], n_recommendations - 1)[:n_recommendations]
+            candidates = candidates[top]
+        
+        ranked = candidates[np.argsort(-final_scores[candidates], kind='stable')]
+        return [self.products_list[idx] for idx in ranked]
     
     def get_trending_products(self, n_products=6):
-        """Get trending products based on rating and reviews"""
+        """Get trending products from time-decayed interaction counters"""
         try:
+            trending = trending_engine.top(n_products)
+            if trending:
+                return trending
+            
             from app.models import Product
+            # No recent interactions yet, fall back to rating and reviews
             trending = Product.objects.order_by('-rating', '-total_reviews')[:n_products]
             return list(trending.values_list('id', flat=True))
         except Exception as e:
@@ -354,6 +937,18 @@ class AdvancedRecommendationEngine:
     def get_personalized_recommendations(self, user_id, n_recommendations=6):
         """Get personalized recommendations for a user"""
         try:
+            # Batch-precomputed table (see precompute_user_recommendations)
+            if self.user_recommendations is not None and n_recommendations <= self.user_recommendations.shape[1]:
+                user_idx = self.user_index.get(user_id)
+                if user_idx is not None:
+                    precomputed = [
+                        self.products_list[idx]
+                        for idx in self.user_recommendations[user_idx, :n_recommendations]
+                        if idx >= 0
+                    ]
+                    if precomputed:
+                        return precomputed
+            
             if user_id in self.user_preferences:
                 return self.get_hybrid_recommendations(user_id=user_id, n_recommendations=n_recommendations)
             else:
@@ -363,55 +958,145 @@ class AdvancedRecommendationEngine:
             print(f"Personalization error: {e}")
             return self.get_trending_products(n_recommendations)
     
+    def precompute_user_recommendations(self, n_recommendations=20, block_size=256, workers=None):
+        """
+        Compute top-N personalized recommendations for every user in
+        ``users_list`` in one batch and keep them as a lookup table that
+        get_personalized_recommendations reads directly.
+        
+        Users are scored in blocks of ``block_size`` rows (user factor block
+        times item factors), spread over a process pool of ``workers``
+        processes (1 = run in this process).
+        """
+        try:
+            if self.user_item_matrix is None or self.user_factors is None:
+                print("❌ No user interactions in model to precompute from")
+                return False
+            
+            n_users = self.user_item_matrix.shape[0]
+            n_recommendations = min(n_recommendations, len(self.products_list))
+            table = np.full((n_users, n_recommendations), -1, dtype=np.int32)
+            
+            init_args = (
+                self.user_item_matrix,
+                self.item_factors,
+                self._popularity_score(),
+                self.SCORE_WEIGHTS,
+                n_recommendations,
+            )
+            blocks = [
+                (start, self.user_factors[start:start + block_size])
+                for start in range(0, n_users, block_size)
+            ]
+            
+            if workers == 1:
+                _init_block_worker(*init_args)
+                results = (_score_user_block(start, block) for start, block in blocks)
+                for start, top in results:
+                    table[start:start + len(top)] = top
+            else:
+                with ProcessPoolExecutor(max_workers=workers, initializer=_init_block_worker,
+                                         initargs=init_args) as executor:
+                    futures = [executor.submit(_score_user_block, start, block) for start, block in blocks]
+                    for future in as_completed(futures):
+                        start, top = future.result()
+                        table[start:start + len(top)] = top
+            
+            self.user_recommendations = table
+            print(f"✓ Precomputed {n_recommendations} recommendations for {n_users} users")
+            return True
+        except Exception as e:
+            print(f"Precompute error: {e}")
+            return False
+    
     def save_model(self):
-        """Save model to disk"""
+        """Save model to disk as a memory-mappable artifact directory"""
         try:
-            model_data = {
-                'user_item_matrix': self.user_item_matrix,
-                'product_similarity': self.product_similarity,
-                'user_similarity': self.user_similarity,
-                'product_df': self.product_df,
-                'user_preferences': self.user_preferences,
-                'interaction_history': self.interaction_history,
-                'products_list': self.products_list,
-                'users_list': self.users_list,
-                'timestamp': datetime.now()
+            self.trained_at = datetime.now()
+            categories = pd.Categorical(self.product_df['category'], categories=self.category_names)
+            
+            arrays = {
+                'product_ids': np.asarray(self.products_list, dtype=np.int64),
+                'product_category_codes': categories.codes.astype(np.int32),
+                'product_price': self.product_df['price'].to_numpy(dtype=np.float32),
+                'product_rating': self.product_df['rating'].to_numpy(dtype=np.float32),
+                'product_total_reviews': self.product_df['total_reviews'].to_numpy(dtype=np.int32),
+                'product_neighbors': self.product_neighbors,
+                'product_neighbor_scores': self.product_neighbor_scores,
+                'popularity_scores': self.popularity_scores,
+                'user_ids': np.asarray(self.users_list, dtype=np.int64),
+                'user_weight_totals': self.user_weight_totals,
+                'user_factors': self.user_factors,
+                'item_factors': self.item_factors,
+                'user_recommendations': self.user_recommendations,
+                **csr_to_arrays('user_item', self.user_item_matrix),
+                **self.user_preferences.to_arrays(),
+                **self.interaction_history.to_arrays(),
+            }
+            meta = {
+                'engine': 'advanced',
+                'trained_at': self.trained_at.isoformat(),
+                'last_trained_at': self.last_trained_at.isoformat() if self.last_trained_at else None,
+                'n_neighbors': self.n_neighbors,
+                'category_names': self.category_names,
+                'user_item_shape': self.user_item_matrix.shape if self.user_item_matrix is not None else None,
+                'als': self.als.params(),
             }
             
-            with open(self.model_path, 'wb') as f:
-                pickle.dump(model_data, f)
+            # Publishes a new version, so applied deltas are folded in here
+            self.model_version = save_artifact(self.model_path, arrays, meta)
             
-            print(f"✓ Model saved to {self.model_path}")
+            print(f"✓ Model saved to {self.model_path} (version {self.model_version})")
             return True
         except Exception as e:
             print(f"Save error: {e}")
             return False
     
     def load_model(self):
-        """Load model from disk"""
+        """Load model from disk (arrays are memory-mapped, not copied)"""
         try:
-            if not os.path.exists(self.model_path):
+            arrays, meta = load_artifact(self.model_path)
+            if arrays is None:
                 print(f"⚠️  Model not found at {self.model_path}")
                 return False
             
-            with open(self.model_path, 'rb') as f:
-                model_data = pickle.load(f)
+            self.products_list = arrays['product_ids'].tolist()
+            self.users_list = arrays['user_ids'].tolist()
+            self.product_index = {pid: idx for idx, pid in enumerate(self.products_list)}
+            self.user_index = {uid: idx for idx, uid in enumerate(self.users_list)}
+            self.category_names = meta['category_names']
             
-            self.user_item_matrix = model_data.get('user_item_matrix')
-            self.product_similarity = model_data.get('product_similarity')
-            self.user_similarity = model_data.get('user_similarity')
-            self.product_df = model_data.get('product_df')
-            self.user_preferences = model_data.get('user_preferences', {})
-            self.interaction_history = model_data.get('interaction_history', {})
-            self.products_list = model_data.get('products_list', [])
-            self.users_list = model_data.get('users_list', [])
+            self.product_df = pd.DataFrame({
+                'id': arrays['product_ids'],
+                'category': pd.Categorical.from_codes(arrays['product_category_codes'], self.category_names),
+                'price': arrays['product_price'],
+                'rating': arrays['product_rating'],
+                'total_reviews': arrays['product_total_reviews'],
+            })
+            self.product_neighbors = arrays.get('product_neighbors')
+            self.product_neighbor_scores = arrays.get('product_neighbor_scores')
+            self.popularity_scores = arrays.get('popularity_scores')
+            self.user_item_matrix = arrays_to_csr(arrays, 'user_item', meta['user_item_shape'])
+            self.user_factors = arrays.get('user_factors')
+            self.item_factors = arrays.get('item_factors')
+            self.user_weight_totals = arrays.get('user_weight_totals')
+            self.user_recommendations = arrays.get('user_recommendations')
+            self.user_preferences = UserPreferences.from_arrays(arrays, self.user_index, self.category_names)
+            self.interaction_history = InteractionHistory.from_arrays(arrays, self.user_index)
+            self.trained_at = datetime.fromisoformat(meta['trained_at'])
+            self.last_trained_at = datetime.fromisoformat(meta['last_trained_at']) if meta['last_trained_at'] else None
+            self.model_version = meta['version']
+            if meta.get('als'):
+                # Deltas fold users in with the hyperparameters the factors were trained with
+                self.als = ImplicitALS(threads=self.als.threads, **meta['als'])
             
-            print(f"✓ Model loaded from {self.model_path}")
+            replayed = self._replay_deltas()
+            
+            print(f"✓ Model loaded from {self.model_path}" + (f" (+{replayed} deltas)" if replayed else ""))
             return True
         except Exception as e:
             print(f"Load error: {e}")
             return False
 
-
-# Global instance
-advanced_recommendation_engine = AdvancedRecommendationEngine()
+# Global instance, double-buffered so workers pick up newly published versions
+advanced_recommendation_engine = ReloadableEngine(AdvancedRecommendationEngine)
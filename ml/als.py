@@ -0,0 +1,121 @@
+"""
+Implicit-feedback matrix factorization (ALS)
+Alternating least squares for implicit data (Hu, Koren & Volinsky, 2008):
+every observed interaction weight r becomes a preference of 1 with
+confidence 1 + alpha * r, unobserved pairs are preferences of 0 with
+confidence 1. Each half-step solves one small ridge regression per user
+(or item); rows are solved in batches spread over a thread pool, since the
+BLAS/LAPACK calls doing the work release the GIL.
+"""
+
+import os
+import numpy as np
+from scipy import sparse
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_FACTORS = 32
+
+# Interactions and rows per thread-pool task; a task holds a factors x factors
+# system per row, so sparse rows must not all land in one batch
+BATCH_NNZ = 1 << 15
+BATCH_ROWS = 1 << 10
+
+
+def _row_batches(indptr, max_nnz=BATCH_NNZ, max_rows=BATCH_ROWS):
+    """Split CSR rows into contiguous (start, stop) ranges of at most ~max_nnz entries and max_rows rows"""
+    n_rows = len(indptr) - 1
+    batches, start = [], 0
+    while start < n_rows:
+        stop = int(np.searchsorted(indptr, indptr[start] + max_nnz, side='right')) - 1
+        stop = min(max(stop, start + 1), start + max_rows, n_rows)
+        batches.append((start, stop))
+        start = stop
+    return batches
+
+
+class ImplicitALS:
+    """
+    Low-rank user and item factors for implicit feedback
+
+    Args:
+        factors: Rank of the factorization
+        regularization: L2 penalty on the factors
+        alpha: Confidence scale applied to interaction weights
+        iterations: Number of alternating sweeps
+        threads: Worker threads per sweep (defaults to the CPU count)
+    """
+
+    def __init__(self, factors=DEFAULT_FACTORS, regularization=0.1, alpha=2.0,
+                 iterations=10, threads=None, random_state=42):
+        self.factors = factors
+        self.regularization = regularization
+        self.alpha = alpha
+        self.iterations = iterations
+        self.threads = threads or os.cpu_count() or 1
+        self.random_state = random_state
+
+    def params(self):
+        return {
+            'factors': self.factors,
+            'regularization': self.regularization,
+            'alpha': self.alpha,
+            'iterations': self.iterations,
+        }
+
+    def fit(self, user_items):
+        """
+        Factorize a (users x items) CSR matrix of raw interaction weights
+
+        Returns:
+            (user_factors, item_factors) as float32 arrays
+        """
+        confidence = sparse.csr_matrix(user_items, dtype=np.float32) * self.alpha
+        confidence_t = confidence.T.tocsr()
+
+        rng = np.random.default_rng(self.random_state)
+        item_factors = (rng.standard_normal((confidence.shape[1], self.factors)) * 0.01).astype(np.float32)
+        user_factors = np.zeros((confidence.shape[0], self.factors), dtype=np.float32)
+
+        with ThreadPoolExecutor(max_workers=self.threads) as executor:
+            for _ in range(self.iterations):
+                user_factors = self._solve(confidence, item_factors, executor)
+                item_factors = self._solve(confidence_t, user_factors, executor)
+
+        return user_factors, item_factors
+
+    def recalculate_users(self, user_items, item_factors):
+        """Fold users in against fixed item factors (one half-step)"""
+        confidence = sparse.csr_matrix(user_items, dtype=np.float32) * self.alpha
+        with ThreadPoolExecutor(max_workers=self.threads) as executor:
+            return self._solve(confidence, np.asarray(item_factors, dtype=np.float32), executor)
+
+    def _solve(self, confidence, fixed, executor):
+        """Least-squares factors for every row of ``confidence`` given the other side"""
+        gram = fixed.T @ fixed + self.regularization * np.eye(self.factors, dtype=np.float32)
+        solved = np.zeros((confidence.shape[0], self.factors), dtype=np.float32)
+
+        def solve_batch(bounds):
+            start, stop = bounds
+            block = confidence[start:stop]
+            indptr = block.indptr
+            # Empty rows have b_u = 0, so with the shared (positive definite)
+            # Gram matrix their factors are 0; only observed rows are solved
+            rows = np.flatnonzero(np.diff(indptr))
+            if not len(rows):
+                return
+
+            # A_u = Y^T Y + Y_u^T (C_u - I) Y_u + reg * I
+            gathered = fixed[block.indices]
+            weighted = gathered * block.data[:, None]
+            A = np.empty((len(rows), self.factors, self.factors), dtype=np.float32)
+            A[:] = gram
+            for i, row in enumerate(rows):
+                lo, hi = indptr[row], indptr[row + 1]
+                A[i] += weighted[lo:hi].T @ gathered[lo:hi]
+
+            # b_u = Y_u^T C_u p_u (preference is 1 on observed pairs)
+            b = sparse.csr_matrix((block.data + 1, block.indices, block.indptr), shape=block.shape) @ fixed
+            solved[start + rows] = np.linalg.solve(A, b[rows][..., None])[..., 0]
+
+        list(executor.map(solve_batch, _row_batches(confidence.indptr)))
+        return solved
@@ -0,0 +1,212 @@
+"""
+Directory-based, versioned model artifacts
+Every array is stored as its own .npy file next to a small JSON manifest.
+Loading opens the arrays with mmap_mode, so all worker processes share the
+same pages through the OS page cache instead of unpickling private copies.
+
+Layout:
+    <path>/CURRENT              "<version> <revision>" of the live model
+    <path>/versions/<version>/  manifest.json + <name>.npy (+ deltas/)
+
+A save writes a complete new version directory and only then repoints
+CURRENT, so readers either see the old model or the new one. The revision
+is bumped when incremental deltas are added to the live version. Writers of
+CURRENT hold a file lock (``<path>/.publish.lock``), and delta publishes
+are compare-and-swap, so a delta can never repoint CURRENT away from a
+version a full training published meanwhile.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime
+import numpy as np
+from scipy import sparse
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+MANIFEST_NAME = 'manifest.json'
+CURRENT_NAME = 'CURRENT'
+LOCK_NAME = '.publish.lock'
+VERSIONS_DIR = 'versions'
+FORMAT_VERSION = 2
+KEEP_VERSIONS = 3
+
+
+def _write_atomic(file_path, content):
+    """Replace a small text file in one rename"""
+    tmp_path = f'{file_path}.tmp-{os.getpid()}'
+    with open(tmp_path, 'w') as f:
+        f.write(content)
+    os.replace(tmp_path, file_path)
+
+
+def read_current(path):
+    """Return (version, revision) of the live artifact, or (None, 0)"""
+    try:
+        with open(os.path.join(path, CURRENT_NAME)) as f:
+            version, revision = f.read().split()
+        return version, int(revision)
+    except (OSError, ValueError):
+        return None, 0
+
+
+def current_token(path):
+    """Cheap identifier of the live artifact state ('<version>:<revision>'), or None"""
+    version, revision = read_current(path)
+    return f'{version}:{revision}' if version else None
+
+
+class VersionMoved(Exception):
+    """CURRENT no longer points at the version an update was based on"""
+
+
+@contextmanager
+def publish_lock(path):
+    """Exclusive lock on publishing at ``path``, across threads and processes"""
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, LOCK_NAME), 'a+') as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def publish(path, version, revision=0):
+    """Point CURRENT at ``version``/``revision`` (caller holds publish_lock)"""
+    _write_atomic(os.path.join(path, CURRENT_NAME), f'{version} {revision}\n')
+    return f'{version}:{revision}'
+
+
+def check_current(path, expected_token):
+    """Raise VersionMoved unless CURRENT is ``expected_token`` (caller holds publish_lock)"""
+    token = current_token(path)
+    if token != expected_token:
+        raise VersionMoved(f'{path} moved from {expected_token} to {token}')
+
+
+def version_dir(path, version):
+    return os.path.join(path, VERSIONS_DIR, version)
+
+
+def save_artifact(path, arrays, meta):
+    """
+    Write a new artifact version and make it the live one
+    
+    Args:
+        path: Artifact root directory
+        arrays: {name: ndarray}; None values are skipped
+        meta: JSON-serializable metadata stored in the manifest
+    
+    Returns:
+        Token of the published version (see current_token)
+    """
+    versions_root = os.path.join(path, VERSIONS_DIR)
+    os.makedirs(versions_root, exist_ok=True)
+    version = f"{datetime.now().strftime('%Y%m%dT%H%M%S%f')}-{os.getpid()}"
+    
+    # Write into a temp dir first so a version directory is always complete
+    tmp_path = tempfile.mkdtemp(prefix='.tmp-', dir=versions_root)
+    try:
+        names = []
+        for name, array in arrays.items():
+            if array is None:
+                continue
+            np.save(os.path.join(tmp_path, f'{name}.npy'), np.ascontiguousarray(array), allow_pickle=False)
+            names.append(name)
+        
+        manifest = {'format_version': FORMAT_VERSION, 'version': version, 'arrays': sorted(names), 'meta': meta}
+        with open(os.path.join(tmp_path, MANIFEST_NAME), 'w') as f:
+            json.dump(manifest, f, indent=2, default=str)
+        
+        os.rename(tmp_path, version_dir(path, version))
+    except Exception:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+    
+    with publish_lock(path):
+        token = publish(path, version)
+    _prune_versions(path, keep=version)
+    return token
+
+
+def _prune_versions(path, keep):
+    """
+    Drop all but the newest KEEP_VERSIONS versions. Workers still mapping an
+    old version keep their pages valid until they swap (POSIX unlink semantics).
+    """
+    versions_root = os.path.join(path, VERSIONS_DIR)
+    versions = sorted(name for name in os.listdir(versions_root) if not name.startswith('.'))
+    for name in versions[:-KEEP_VERSIONS]:
+        if name != keep:
+            shutil.rmtree(os.path.join(versions_root, name), ignore_errors=True)
+
+
+def load_artifact(path, mmap=True):
+    """
+    Read the live artifact version
+    
+    Returns:
+        (arrays, meta) or (None, None) if nothing has been published at
+        ``path``. ``meta['version']`` holds the loaded version token. With
+        ``mmap`` the arrays are read-only memory maps.
+    """
+    version, revision = read_current(path)
+    if version is None:
+        return None, None
+    
+    directory = version_dir(path, version)
+    with open(os.path.join(directory, MANIFEST_NAME)) as f:
+        manifest = json.load(f)
+    
+    mmap_mode = 'r' if mmap else None
+    arrays = {
+        name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode=mmap_mode, allow_pickle=False)
+        for name in manifest['arrays']
+    }
+    meta = dict(manifest['meta'], version=f'{version}:{revision}')
+    return arrays, meta
+
+
+def artifact_size(path):
+    """Total size in bytes of the files in an artifact directory"""
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return total
+
+
+def csr_to_arrays(prefix, matrix):
+    """Split a CSR matrix into named arrays for save_artifact"""
+    if matrix is None:
+        return {}
+    return {
+        f'{prefix}_data': matrix.data,
+        f'{prefix}_indices': matrix.indices,
+        f'{prefix}_indptr': matrix.indptr,
+    }
+
+
+def arrays_to_csr(arrays, prefix, shape):
+    """Rebuild a CSR matrix around (possibly memory-mapped) arrays without copying"""
+    if f'{prefix}_data' not in arrays:
+        return None
+    return sparse.csr_matrix(
+        (arrays[f'{prefix}_data'], arrays[f'{prefix}_indices'], arrays[f'{prefix}_indptr']),
+        shape=tuple(shape), copy=False
+    )
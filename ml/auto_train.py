@@ -18,17 +18,18 @@ django.setup()
 
 from ml.recommendation import recommendation_engine
 from ml.evaluate import ModelEvaluator
+from ml.retrain_scheduler import get_retrain_scheduler
 
 def train_job():
-    """Training job"""
-    print(f"\n[{time.strftime('%Y-%m-%d %H:%M:%S')}] Running scheduled training...")
-    recommendation_engine.train_from_database()
-    print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Training completed!")
+    """Training job (coalesced with any other pending retrain requests)"""
+    print(f"\n[{time.strftime('%Y-%m-%d %H:%M:%S')}] Queueing scheduled training...")
+    get_retrain_scheduler().request('schedule')
 
 def monitor_job():
     """Monitoring job"""
     print(f"\n[{time.strftime('%Y-%m-%d %H:%M:%S')}] Running model evaluation...")
     ModelEvaluator.print_evaluation()
+    print(f"Retrain queue: {get_retrain_scheduler().status()}")
 
 def start_scheduler():
     """
@@ -0,0 +1,241 @@
+#!/usr/bin/env python
+"""
+Recommendation Engine Scaling Benchmark
+Times every training stage and serving call of AdvancedRecommendationEngine
+over a grid of catalog and user sizes, on synthetic in-memory data (no
+database needed). Each grid point runs in its own Python process so its
+peak RSS is measured in isolation. Results are written as JSON so runs can
+be compared across commits.
+
+Usage:
+    python ml/benchmark.py --products 1000,10000 --users 1000,10000 --output bench.json
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import platform
+import resource
+import shutil
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+CATEGORIES = 30
+INTERACTION_TYPES = ['view', 'click', 'cart', 'wishlist', 'purchase', 'rating']
+INTERACTION_MIX = [0.60, 0.18, 0.08, 0.05, 0.06, 0.03]
+INTERACTION_WEIGHTS = [1.0, 2.0, 3.0, 2.5, 5.0, 4.0]
+VOCABULARY = 5000
+DESCRIPTION_WORDS = 20
+
+
+def synthetic_frames(n_products, n_users, interactions_per_user, seed=42):
+    """
+    Product and interaction frames shaped like train_from_database's, with
+    Zipf product popularity and Pareto user activity
+    """
+    rng = np.random.default_rng(seed)
+    product_df = pd.DataFrame({
+        'id': np.arange(1, n_products + 1),
+        'category': rng.integers(0, CATEGORIES, n_products).astype(str),
+        'price': np.round(rng.lognormal(7, 1, n_products), 2),
+        'rating': np.round(1 + 4 * rng.beta(5, 2, n_products), 1),
+        'total_reviews': np.floor(rng.pareto(1.2, n_products) * 10).astype(int),
+    })
+    product_df['category'] = 'cat_' + product_df['category']
+    word_p = 1.0 / np.arange(1, VOCABULARY + 1)
+    words = rng.choice(VOCABULARY, (n_products, DESCRIPTION_WORDS), p=word_p / word_p.sum())
+    product_df['name'] = [f'product w{a} w{b}' for a, b in words[:, :2]]
+    product_df['description'] = [' '.join(f'w{w}' for w in row) for row in words]
+
+    n_interactions = n_users * interactions_per_user
+    popularity = 1.0 / np.arange(1, n_products + 1) ** 1.1
+    rng.shuffle(popularity)
+    activity = rng.pareto(1.5, n_users) + 1
+    types = rng.choice(len(INTERACTION_TYPES), n_interactions, p=INTERACTION_MIX)
+    interaction_df = pd.DataFrame({
+        'user_id': rng.choice(np.arange(1, n_users + 1), n_interactions, p=activity / activity.sum()),
+        'product_id': rng.choice(product_df['id'].values, n_interactions, p=popularity / popularity.sum()),
+        'interaction_type': np.array(INTERACTION_TYPES)[types],
+        'weight': np.array(INTERACTION_WEIGHTS)[types],
+        'rating_value': np.where(types == 5, rng.integers(1, 6, n_interactions), np.nan),
+        'timestamp': pd.Timestamp('2024-01-01', tz='UTC')
+                     + pd.to_timedelta(rng.integers(0, 90 * 86400, n_interactions), unit='s'),
+    })
+    return product_df, interaction_df
+
+
+class StageTimer:
+    """Collects wall time of named stages"""
+
+    def __init__(self):
+        self.timings = {}
+
+    def run(self, name, fn, *args, **kwargs):
+        started = time.perf_counter()
+        result = fn(*args, **kwargs)
+        self.timings[name] = round(time.perf_counter() - started, 4)
+        return result
+
+
+def run_point(n_products, n_users, interactions_per_user, serving_calls, seed):
+    """Benchmark one grid point in this process"""
+    from ml.advanced_recommendation import AdvancedRecommendationEngine
+    from ml.similarity import top_k_cosine_neighbors
+    from ml.artifacts import artifact_size
+    from ml.ranking_evaluation import latency_percentiles
+
+    product_df, interaction_df = synthetic_frames(n_products, n_users, interactions_per_user, seed)
+    model_path = tempfile.mkdtemp(prefix='bench-model-')
+    engine = AdvancedRecommendationEngine(model_path=model_path)
+    timer = StageTimer()
+
+    # Training stages, in the order fit() runs them
+    engine.product_df = product_df
+    engine.products_list = product_df['id'].tolist()
+    engine.product_index = {pid: idx for idx, pid in enumerate(engine.products_list)}
+    engine.category_names = sorted(product_df['category'].unique().tolist())
+    features = timer.run('extract_product_features', engine._extract_product_features)
+    engine.product_neighbors, engine.product_neighbor_scores = timer.run(
+        'product_neighbors', top_k_cosine_neighbors, features, k=engine.n_neighbors
+    )
+    engine.popularity_scores = timer.run(
+        'popularity', engine._compute_popularity,
+        product_df['rating'].values, product_df['total_reviews'].values
+    )
+    engine.last_trained_at = interaction_df['timestamp'].max().to_pydatetime()
+    engine.user_item_matrix = timer.run(
+        'build_weighted_interaction_matrix', engine._build_weighted_interaction_matrix, interaction_df
+    )
+    engine.user_factors, engine.item_factors = timer.run(
+        'als_factorization', engine.als.fit, engine._raw_user_rows()
+    )
+    engine.user_preferences = timer.run(
+        'extract_user_preferences', engine._extract_user_preferences, interaction_df
+    )
+    engine.interaction_history = timer.run(
+        'build_interaction_history', engine._build_interaction_history, interaction_df
+    )
+    timer.run('precompute_user_recommendations', engine.precompute_user_recommendations, workers=1)
+    timer.run('save_model', engine.save_model)
+    loaded = AdvancedRecommendationEngine(model_path=model_path)
+    timer.run('load_model', loaded.load_model)
+
+    # Serving calls against the loaded (memory-mapped) model
+    rng = np.random.default_rng(seed)
+    users = rng.choice(np.asarray(loaded.users_list), serving_calls).tolist()
+    products = rng.choice(np.asarray(loaded.products_list), serving_calls).tolist()
+    serving = {
+        'get_hybrid_recommendations[user+product]': latency_percentiles(
+            lambda u, p: loaded.get_hybrid_recommendations(user_id=u, product_id=p), list(zip(users, products))
+        ),
+        'get_hybrid_recommendations[product]': latency_percentiles(
+            lambda p: loaded.get_hybrid_recommendations(product_id=p), [(p,) for p in products]
+        ),
+        'get_personalized_recommendations[precomputed]': latency_percentiles(
+            lambda u: loaded.get_personalized_recommendations(u), [(u,) for u in users]
+        ),
+    }
+    loaded.user_recommendations = None
+    serving['get_personalized_recommendations[live]'] = latency_percentiles(
+        lambda u: loaded.get_personalized_recommendations(u), [(u,) for u in users]
+    )
+
+    size = artifact_size(model_path)
+    shutil.rmtree(model_path, ignore_errors=True)
+    return {
+        'products': n_products,
+        'users': n_users,
+        'interactions': len(interaction_df),
+        'stages_seconds': timer.timings,
+        'training_seconds': round(sum(timer.timings.values()), 4),
+        'serving_ms': serving,
+        # ru_maxrss is KiB on Linux
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'artifact_bytes': size,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def run_grid(products, users, interactions_per_user, serving_calls, seed, timeout):
+    """Run every (products, users) point in a fresh interpreter"""
+    results = []
+    for n_products in products:
+        for n_users in users:
+            print(f"▶️  products={n_products} users={n_users}")
+            point = [str(n_products), str(n_users), str(interactions_per_user), str(serving_calls), str(seed)]
+            try:
+                completed = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), '--point', *point],
+                    capture_output=True, text=True, timeout=timeout
+                )
+                if completed.returncode != 0:
+                    raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr else 'failed')
+                result = json.loads(completed.stdout.strip().splitlines()[-1])
+                print(f"   ✓ train {result['training_seconds']}s, peak RSS {result['peak_rss_mb']} MB, "
+                      f"artifact {result['artifact_bytes'] / 1e6:.1f} MB")
+            except Exception as e:
+                print(f"   ❌ {e}")
+                result = {'products': n_products, 'users': n_users, 'error': str(e)}
+            results.append(result)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Recommendation engine scaling benchmark')
+    parser.add_argument('--products', default='1000,5000', help='Comma-separated catalog sizes')
+    parser.add_argument('--users', default='1000,5000', help='Comma-separated user counts')
+    parser.add_argument('--interactions-per-user', type=int, default=20)
+    parser.add_argument('--serving-calls', type=int, default=200, help='Timed calls per serving method')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--timeout', type=int, default=3600, help='Seconds allowed per grid point')
+    parser.add_argument('--output', default=None, help='JSON file (default: print)')
+    parser.add_argument('--point', nargs=5, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.point:
+        # Child process: one grid point, result as the last stdout line
+        n_products, n_users, per_user, calls, seed = map(int, args.point)
+        result = run_point(n_products, n_users, per_user, calls, seed)
+        print(json.dumps(result))
+        return
+
+    print("\n📈 Recommendation Engine Scaling Benchmark\n")
+    report = {
+        'generated_at': datetime.now().isoformat(),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'cpu_count': os.cpu_count(),
+        'interactions_per_user': args.interactions_per_user,
+        'results': run_grid(
+            [int(n) for n in args.products.split(',')],
+            [int(n) for n in args.users.split(',')],
+            args.interactions_per_user, args.serving_calls, args.seed, args.timeout
+        ),
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Results written to {args.output}")
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""
+"Frequently bought together" co-purchase index
+Counts, over placed orders that aren't cancelled, how many orders contain
+each product and each pair of products, and keeps per product its ``top_k``
+partners by
+
+    confidence(a -> b) = orders(a, b) / orders(a)
+
+A partner's lift, orders(a, b) * orders / (orders(a) * orders(b)), is
+computed when serving from the current counts; partners with lift <=
+``min_lift`` are bought together no more often than chance (typically
+products that are in most baskets anyway) and are skipped. Serving reads one
+precomputed list, O(K).
+
+Orders are pulled by order-id watermark, re-reading the last
+``rescan_orders`` ids below it: an order that committed late under a lower id
+is counted then, and a counted order in that window that has since been
+cancelled (or deleted) is subtracted again. Only the touched products' lists
+are rebuilt. Changes further below the watermark are picked up by a full
+rebuild every ``rebuild_interval`` seconds, swapped in when complete.
+Pulls run on a debounced background worker (a RetrainScheduler), requested
+by checkout and periodically by serving; request threads never wait for
+the database. Until the first pull has finished the lists are empty.
+"""
+
+import heapq
+import logging
+import threading
+import time
+from ml.retrain_scheduler import RetrainScheduler
+
+logger = logging.getLogger(__name__)
+
+
+class CoPurchaseIndex:
+    """
+    Incrementally maintained co-purchase counts with top-K partner lists
+
+    Args:
+        top_k: Partners kept per product
+        min_lift: Partners at or below this lift are not served
+        refresh_interval: Minimum seconds between serving-triggered pulls
+        debounce: Seconds the background worker waits to batch requested pulls
+        rescan_orders: Order ids below the watermark re-read on every pull
+        rebuild_interval: Seconds between full rebuilds by the background worker
+    """
+
+    def __init__(self, top_k=20, min_lift=1.0, refresh_interval=30.0, debounce=1.0,
+                 rescan_orders=1000, rebuild_interval=3600.0):
+        self.top_k = top_k
+        self.min_lift = min_lift
+        self.refresh_interval = refresh_interval
+        self.rescan_orders = rescan_orders
+        self.rebuild_interval = rebuild_interval
+        self._scheduler = RetrainScheduler(
+            self._scheduled_refresh, window=debounce, max_delay=max(debounce, 10.0), name='co-purchase'
+        )
+        self._orders = 0
+        self._product_orders = {}
+        self._pair_orders = {}
+        self._top = {}
+        self._watermark = None
+        # Products of the counted orders inside the rescan window, by order id
+        self._counted = {}
+        self._next_refresh = 0.0
+        self._next_rebuild = time.monotonic() + rebuild_interval
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    def add_orders(self, baskets):
+        """Count orders given as iterables of product ids"""
+        with self._lock:
+            touched = set()
+            for basket in baskets:
+                touched.update(self._add_order(basket))
+            self._rebuild(touched)
+
+    def _add_order(self, basket):
+        products = set(basket)
+        self._orders += 1
+        for product_id in products:
+            self._product_orders[product_id] = self._product_orders.get(product_id, 0) + 1
+            if len(products) > 1:
+                partners = self._pair_orders.setdefault(product_id, {})
+                for other_id in products:
+                    if other_id != product_id:
+                        partners[other_id] = partners.get(other_id, 0) + 1
+        return products
+
+    def _remove_order(self, products):
+        """Undo _add_order for a counted order's products"""
+        self._orders -= 1
+        for product_id in products:
+            count = self._product_orders[product_id] - 1
+            if count:
+                self._product_orders[product_id] = count
+            else:
+                del self._product_orders[product_id]
+            if len(products) > 1:
+                partners = self._pair_orders[product_id]
+                for other_id in products:
+                    if other_id != product_id:
+                        if partners[other_id] > 1:
+                            partners[other_id] -= 1
+                        else:
+                            del partners[other_id]
+                if not partners:
+                    del self._pair_orders[product_id]
+        return products
+
+    def _rebuild(self, product_ids):
+        """
+        Re-rank the partner lists of ``product_ids``. Confidence only changes
+        for products in new orders, so no other list needs touching.
+        """
+        for product_id in product_ids:
+            partners = self._pair_orders.get(product_id)
+            if not partners:
+                self._top.pop(product_id, None)
+                continue
+            # Equal confidence: the less popular partner has the higher lift
+            self._top[product_id] = heapq.nsmallest(
+                self.top_k, partners,
+                key=lambda other_id: (-partners[other_id], self._product_orders[other_id], other_id)
+            )
+
+    def associations(self, product_id, n=5):
+        """[(partner_id, confidence, lift)] for ``product_id``, best first"""
+        self.maybe_refresh()
+        with self._lock:
+            partners = self._top.get(product_id)
+            if not partners:
+                return []
+            product_orders = self._product_orders[product_id]
+            pair_orders = self._pair_orders[product_id]
+            results = []
+            for other_id in partners:
+                together = pair_orders[other_id]
+                lift = together * self._orders / (product_orders * self._product_orders[other_id])
+                if lift > self.min_lift:
+                    results.append((other_id, together / product_orders, lift))
+                    if len(results) == n:
+                        break
+            return results
+
+    def top(self, product_id, n=5):
+        """Ids of the products most often bought with ``product_id``"""
+        return [other_id for other_id, _, _ in self.associations(product_id, n)]
+
+    def for_basket(self, product_ids, n=5):
+        """
+        Ids most often bought with any of ``product_ids`` (a cart), ranked by
+        summed confidence; products already in the basket are left out
+        """
+        basket = set(product_ids)
+        scores = {}
+        for product_id in basket:
+            for other_id, confidence, _ in self.associations(product_id, self.top_k):
+                if other_id not in basket:
+                    scores[other_id] = scores.get(other_id, 0.0) + confidence
+        return heapq.nlargest(n, scores, key=scores.get)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'orders': self._orders,
+                'products': len(self._product_orders),
+                'pairs': sum(len(partners) for partners in self._pair_orders.values()) // 2,
+                'watermark': self._watermark,
+            }
+
+    def maybe_refresh(self):
+        """Request a background pull at most every refresh_interval seconds"""
+        now = time.monotonic()
+        if now < self._next_refresh:
+            return
+        self._next_refresh = now + self.refresh_interval
+        self.request_refresh('serve')
+
+    def request_refresh(self, reason='order'):
+        """Queue a pull of new orders on the background worker; returns immediately"""
+        self._scheduler.request(reason)
+
+    def _scheduled_refresh(self):
+        try:
+            if time.monotonic() >= self._next_rebuild:
+                self.rebuild()
+            else:
+                self.refresh()
+        except Exception:
+            logger.exception("Co-purchase refresh failed")
+
+    def refresh(self):
+        """
+        Count orders placed since the watermark (every order on first use)
+        and re-check the rescan window, in the calling thread; number of
+        orders counted or subtracted
+        """
+        with self._refresh_lock:
+            return self._pull()
+
+    def rebuild(self):
+        """Recount every order into a fresh index and swap it in; number of orders counted"""
+        with self._refresh_lock:
+            fresh = CoPurchaseIndex(top_k=self.top_k, min_lift=self.min_lift, rescan_orders=self.rescan_orders)
+            counted = fresh._pull()
+            with self._lock:
+                self._orders = fresh._orders
+                self._product_orders = fresh._product_orders
+                self._pair_orders = fresh._pair_orders
+                self._top = fresh._top
+                self._watermark = fresh._watermark
+                self._counted = fresh._counted
+            self._next_rebuild = time.monotonic() + self.rebuild_interval
+            return counted
+
+    def _pull(self):
+        # Checkout creates an order and its items in one transaction, so an
+        # order is either fully visible or not at all
+        from app.models import OrderItem
+
+        items = OrderItem.objects.exclude(order__order_status='cancelled').order_by('order_id')
+        floor = None
+        if self._watermark is not None:
+            floor = max(self._watermark - self.rescan_orders, 0)
+            items = items.filter(order_id__gt=floor)
+
+        baskets = {}
+        for order_id, product_id in items.values_list('order_id', 'product_id').iterator(chunk_size=2000):
+            baskets.setdefault(order_id, []).append(product_id)
+
+        with self._lock:
+            touched, changed = set(), 0
+            # Counted orders of the window that are no longer placed
+            for order_id in [order_id for order_id in self._counted if order_id not in baskets]:
+                touched.update(self._remove_order(self._counted.pop(order_id)))
+                changed += 1
+            for order_id, basket in baskets.items():
+                if order_id not in self._counted:
+                    self._counted[order_id] = self._add_order(basket)
+                    touched.update(self._counted[order_id])
+                    changed += 1
+            self._rebuild(touched)
+
+            self._watermark = max([self._watermark or 0, *baskets])
+            window_floor = self._watermark - self.rescan_orders
+            for order_id in [order_id for order_id in self._counted if order_id <= window_floor]:
+                del self._counted[order_id]
+        return changed
+
+
+# Global instance, refreshed in the background after checkout and periodically when served
+co_purchase_index = CoPurchaseIndex()
@@ -0,0 +1,163 @@
+"""
+Streaming training data loader
+Reads Product / UserInteraction rows with ``.iterator(chunk_size=...)`` and
+transactions CSVs with ``read_csv(chunksize=...)`` straight into
+preallocated, downcast NumPy columns (int32 ids, float32 weights), so
+training never holds a table as one Python dict per row.
+"""
+
+import numpy as np
+import pandas as pd
+from itertools import islice
+
+CHUNK_SIZE = 10000
+
+PRODUCT_FIELDS = ('id', 'category', 'price', 'rating', 'total_reviews')
+INTERACTION_FIELDS = ('user_id', 'product_id', 'interaction_type', 'weight', 'rating_value', 'timestamp')
+
+# Column dtypes while loading. Timestamps are held as int64 ns (UTC) and
+# interaction types as int8 codes, both converted when the frame is built.
+DTYPES = {
+    'id': np.int32,
+    'user_id': np.int32,
+    'product_id': np.int32,
+    'category': object,
+    'price': np.float32,
+    'rating': np.float32,
+    'total_reviews': np.int32,
+    'interaction_type': np.int8,
+    'weight': np.float32,
+    'rating_value': np.float32,
+    'timestamp': np.int64,
+}
+
+CSV_DTYPES = {'user_id': np.int32, 'product_id': np.int32, 'rating': np.float32}
+
+
+def _interaction_types():
+    from app.models import UserInteraction
+    return [code for code, _ in UserInteraction.INTERACTION_TYPES]
+
+
+def _convert(field, values, type_codes):
+    """One chunk of raw column values as a NumPy array of the field's dtype"""
+    if field == 'timestamp':
+        return pd.to_datetime(list(values), utc=True).as_unit('ns').asi8
+    if field == 'interaction_type':
+        return np.fromiter((type_codes.get(value, -1) for value in values), np.int8, len(values))
+    # DecimalFields convert through float(); NULLs become NaN
+    return np.asarray(values, dtype=DTYPES[field])
+
+
+def stream_columns(queryset, fields, chunk_size=CHUNK_SIZE):
+    """
+    Stream ``fields`` of every row of ``queryset`` into preallocated arrays
+
+    The row count and max id are read first and the scan is capped at that
+    id, so rows inserted while streaming can't overflow the arrays. Rows
+    deleted meanwhile just leave the arrays shorter.
+
+    Returns:
+        {field: np.ndarray} with the dtypes of DTYPES
+    """
+    from django.db.models import Count, Max
+
+    bounds = queryset.aggregate(rows=Count('id'), max_id=Max('id'))
+    n_rows = bounds['rows']
+    columns = {field: np.empty(n_rows, dtype=DTYPES[field]) for field in fields}
+    if not n_rows:
+        return columns
+
+    type_codes = {code: idx for idx, code in enumerate(_interaction_types())} \
+        if 'interaction_type' in fields else {}
+    rows = queryset.filter(id__lte=bounds['max_id']).values_list(*fields).iterator(chunk_size=chunk_size)
+
+    filled = 0
+    while filled < n_rows:
+        chunk = list(islice(rows, min(chunk_size, n_rows - filled)))
+        if not chunk:
+            break
+        for field, values in zip(fields, zip(*chunk)):
+            columns[field][filled:filled + len(chunk)] = _convert(field, values, type_codes)
+        filled += len(chunk)
+
+    return {field: column[:filled] for field, column in columns.items()}
+
+
+def _to_frame(columns):
+    """DataFrame from streamed columns, decoding timestamps and interaction types"""
+    frame = pd.DataFrame(columns, copy=False)
+    if 'timestamp' in frame:
+        frame['timestamp'] = pd.to_datetime(frame['timestamp'], unit='ns', utc=True)
+    if 'interaction_type' in frame:
+        frame['interaction_type'] = pd.Categorical.from_codes(
+            frame['interaction_type'], categories=_interaction_types()
+        )
+    return frame
+
+
+def load_products(queryset=None, chunk_size=CHUNK_SIZE, fields=PRODUCT_FIELDS):
+    """Product frame with the columns the engines train on"""
+    from app.models import Product
+
+    if queryset is None:
+        queryset = Product.objects.order_by()
+    return _to_frame(stream_columns(queryset, fields, chunk_size))
+
+
+def stream_product_text(queryset=None, chunk_size=CHUNK_SIZE):
+    """(product_ids, texts) chunks of ``name + description``, one chunk in memory at a time"""
+    from app.models import Product
+
+    if queryset is None:
+        queryset = Product.objects.order_by()
+    rows = queryset.values_list('id', 'name', 'description').iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        product_ids, names, descriptions = zip(*chunk)
+        yield (
+            np.asarray(product_ids, dtype=np.int32),
+            [f'{name} {description or ""}' for name, description in zip(names, descriptions)],
+        )
+
+
+def load_interactions(queryset=None, chunk_size=CHUNK_SIZE, fields=INTERACTION_FIELDS):
+    """
+    UserInteraction frame for training
+
+    Args:
+        queryset: Rows to load (default: all, unordered, so the database
+            doesn't sort the table by the model's default ordering)
+    """
+    from app.models import UserInteraction
+
+    if queryset is None:
+        queryset = UserInteraction.objects.order_by()
+    return _to_frame(stream_columns(queryset, fields, chunk_size))
+
+
+def load_transactions_csv(csv_path, chunk_size=CHUNK_SIZE):
+    """
+    ``user_id, product_id, rating`` transactions CSV read in chunks
+
+    The total row count isn't known up front, so the columns are
+    preallocated one chunk ahead and doubled when they fill up.
+    """
+    capacity = chunk_size
+    columns = {field: np.empty(capacity, dtype=dtype) for field, dtype in CSV_DTYPES.items()}
+    filled = 0
+
+    for chunk in pd.read_csv(csv_path, usecols=list(CSV_DTYPES), dtype=CSV_DTYPES, chunksize=chunk_size):
+        if filled + len(chunk) > capacity:
+            capacity = max(capacity * 2, filled + len(chunk))
+            for field in columns:
+                grown = np.empty(capacity, dtype=columns[field].dtype)
+                grown[:filled] = columns[field][:filled]
+                columns[field] = grown
+        for field in columns:
+            columns[field][filled:filled + len(chunk)] = chunk[field].to_numpy()
+        filled += len(chunk)
+
+    return pd.DataFrame({field: column[:filled] for field, column in columns.items()}, copy=False)
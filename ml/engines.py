@@ -0,0 +1,80 @@
+"""
+Lazy recommendation engine handles
+Importing ml.recommendation / ml.advanced_recommendation pulls in pandas,
+NumPy, SciPy and scikit-learn. Modules that are imported in every process
+(views, URL conf) use these proxies instead, so the import happens on the
+first attribute access rather than at Django startup. migrate, shell and
+requests that never recommend anything don't pay for it.
+"""
+
+import importlib
+import threading
+
+
+class LazyEngine:
+    """
+    Stand-in for a module-level engine object, imported on first use
+
+    Attribute access is delegated to ``<module>.<attribute>``.
+    """
+
+    def __init__(self, module, attribute):
+        self._module = module
+        self._attribute = attribute
+        self._target = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        """Whether the engine module has been imported yet"""
+        return self._target is not None
+
+    def resolve(self):
+        """The real engine object, importing its module if needed"""
+        if self._target is None:
+            with self._lock:
+                if self._target is None:
+                    self._target = getattr(importlib.import_module(self._module), self._attribute)
+        return self._target
+
+    def __getattr__(self, name):
+        return getattr(self.resolve(), name)
+
+    def __repr__(self):
+        state = 'loaded' if self.loaded else 'not loaded'
+        return f'<LazyEngine {self._module}.{self._attribute} ({state})>'
+
+
+recommendation_engine = LazyEngine('ml.recommendation', 'recommendation_engine')
+advanced_recommendation_engine = LazyEngine('ml.advanced_recommendation', 'advanced_recommendation_engine')
+
+
+def get_recommender():
+    """
+    What a request should query: the recommendation server client when
+    ML_RECOMMENDATION_SERVER is set (see ml/rpc.py), otherwise the active
+    local advanced engine. Hold on to it for the duration of the request.
+    """
+    from ml.rpc import get_recommendation_client
+    from ml.micro_batch import batched
+
+    client = get_recommendation_client()
+    if client is not None:
+        return client
+    return batched(advanced_recommendation_engine.engine)
+
+
+def warm_up():
+    """
+    Import both engines and load their current model versions now, so the
+    first request a serving worker handles doesn't pay for it
+    """
+    try:
+        for proxy in (recommendation_engine, advanced_recommendation_engine):
+            # .engine runs the first (inline) load of the published version
+            proxy.engine
+        print("✓ Recommendation engines warmed up")
+        return True
+    except Exception as e:
+        print(f"❌ Engine warm-up error: {e}")
+        return False
@@ -1,19 +1,23 @@
 import pandas as pd
 from sklearn.metrics import mean_squared_error, mean_absolute_error
 import math
-import pickle
-import os
+from ml.recommendation import RecommendationEngine
 
 class ModelEvaluator:
     """Evaluate the recommendation model performance"""
     
     @staticmethod
-    def load_model(model_path="ml/model.pkl"):
+    def load_model(model_path="ml/model"):
         """Load trained model"""
         try:
-            with open(model_path, "rb") as f:
-                data = pickle.load(f)
-            return data
+            engine = RecommendationEngine(model_path=model_path)
+            if not engine.load_model():
+                return None
+            return {
+                'user_item_matrix': engine.user_item_matrix,
+                'product_neighbors': engine.product_neighbors,
+                'products_list': engine.products_list
+            }
         except:
             return None
     
@@ -0,0 +1,123 @@
+"""
+Double-buffered recommendation engines
+A ReloadableEngine stands in for a module-level engine instance. Requests
+always read the active engine; when a newer artifact version is published
+(by another worker, a management command or the retrain signal), it is
+loaded into a fresh engine on a background thread and swapped in with a
+single reference assignment. Readers keep the engine they started with, so
+a reload never blocks a request or exposes a half-loaded model. Only the
+first load is inline: requests that arrive meanwhile wait for it. Engines
+never load themselves in place, so an engine without a model just serves
+trending/empty results.
+"""
+
+import threading
+import time
+from ml.artifacts import current_token
+
+
+class ReloadableEngine:
+    """
+    Proxy around an engine class that hot-reloads published model versions
+
+    Attribute access is delegated to the active engine. Methods that rebuild
+    the model run on a fresh instance which replaces the active one only when
+    they succeed.
+    """
+
+    # Methods that build a model from scratch
+    REBUILD_METHODS = ('train_from_database', 'train_from_data', 'load_model')
+    # Methods that modify the currently published model
+    UPDATE_METHODS = ('update_from_database', 'refresh_popularity', 'precompute_user_recommendations')
+
+    def __init__(self, engine_class, check_interval=2.0, **engine_kwargs):
+        self._engine_class = engine_class
+        self._engine_kwargs = engine_kwargs
+        self._active = engine_class(**engine_kwargs)
+        self._lock = threading.Lock()
+        self._first_load_lock = threading.Lock()
+        self._loading = False
+        self._next_check = 0.0
+        self.check_interval = check_interval
+
+    @property
+    def engine(self):
+        """Active engine; hold on to it for the duration of a request"""
+        self._check_version()
+        return self._active
+
+    def __getattr__(self, name):
+        if name in self.REBUILD_METHODS:
+            return lambda *args, **kwargs: self._run_on_copy(name, False, *args, **kwargs)
+        if name in self.UPDATE_METHODS:
+            return lambda *args, **kwargs: self._run_on_copy(name, True, *args, **kwargs)
+        return getattr(self.engine, name)
+
+    def _new_engine(self):
+        return self._engine_class(**self._engine_kwargs)
+
+    def _swap(self, engine):
+        with self._lock:
+            self._active = engine
+
+    def _run_on_copy(self, method, load_current, *args, **kwargs):
+        """Run ``method`` on a new engine and swap it in if it succeeds"""
+        engine = self._new_engine()
+        if load_current:
+            engine.load_model()
+        result = getattr(engine, method)(*args, **kwargs)
+        if result:
+            self._swap(engine)
+        return result
+
+    def _check_version(self):
+        """
+        Compare the published version with the active one, at most once per
+        check_interval. The first load happens inline (there is nothing to
+        serve yet); later versions load in the background.
+        """
+        if self._active.model_version is None:
+            self._first_load()
+            return
+
+        now = time.monotonic()
+        if now < self._next_check or self._loading:
+            return
+        self._next_check = now + self.check_interval
+
+        token = current_token(self._active.model_path)
+        if token is None or token == self._active.model_version:
+            return
+
+        with self._lock:
+            if self._loading:
+                return
+            self._loading = True
+        threading.Thread(target=self._reload, daemon=True).start()
+
+    def _first_load(self):
+        """
+        Load the published version inline. Concurrent callers wait on the
+        lock and find it loaded, so nobody serves the empty engine while a
+        model exists.
+        """
+        with self._first_load_lock:
+            if self._active.model_version is not None:
+                return
+            # Nothing was published at the last check
+            now = time.monotonic()
+            if now < self._next_check:
+                return
+            self._next_check = now + self.check_interval
+            if current_token(self._active.model_path) is not None:
+                self._reload()
+
+    def _reload(self):
+        try:
+            engine = self._new_engine()
+            if engine.load_model():
+                self._swap(engine)
+        except Exception as e:
+            print(f"❌ Model reload error: {e}")
+        finally:
+            self._loading = False
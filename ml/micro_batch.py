@@ -0,0 +1,148 @@
+"""
+Micro-batching of concurrent recommendation requests
+Requests that arrive within ``max_wait`` seconds of each other are collected
+by one worker thread and scored together with a single
+get_hybrid_recommendations_batch call, which turns many per-request vector
+operations into a few (batch x products) matrix operations. Each request
+waits at most ``max_wait`` plus the time of the batch it lands in.
+"""
+
+import threading
+import time
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    """
+    Funnel single calls into batched calls of ``batch_fn``
+
+    Args:
+        batch_fn: Called with a list of items, returns one result per item
+        max_batch: Largest batch handed to batch_fn
+        max_wait: Seconds to keep collecting after the first item arrives
+    """
+
+    def __init__(self, batch_fn, max_batch=32, max_wait=0.002, name='micro-batch'):
+        self.batch_fn = batch_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.name = name
+        self._condition = threading.Condition()
+        self._queue = []
+        self._thread = None
+        self._batches = 0
+        self._items = 0
+
+    def submit(self, item, timeout=None):
+        """Result of ``item`` once its batch has run (re-raises batch errors)"""
+        future = Future()
+        with self._condition:
+            self._queue.append((item, future))
+            self._ensure_worker()
+            self._condition.notify()
+        return future.result(timeout)
+
+    def stats(self):
+        with self._condition:
+            return {
+                'batches': self._batches,
+                'items': self._items,
+                'mean_batch': round(self._items / self._batches, 2) if self._batches else 0,
+                'queued': len(self._queue),
+            }
+
+    def _ensure_worker(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._work, name=f'{self.name}-worker', daemon=True)
+            self._thread.start()
+
+    def _work(self):
+        while True:
+            with self._condition:
+                while not self._queue:
+                    self._condition.wait()
+                # Collect until the batch is full or max_wait has passed
+                deadline = time.monotonic() + self.max_wait
+                while len(self._queue) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(timeout=remaining)
+                batch = self._queue[:self.max_batch]
+                del self._queue[:self.max_batch]
+                self._batches += 1
+                self._items += len(batch)
+
+            items = [item for item, _ in batch]
+            try:
+                results = self.batch_fn(items)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+
+def _score_hybrid(items):
+    """batch_fn for hybrid queries: items are (engine, user_id, product_id, n)"""
+    # Normally one engine; during a hot reload a batch can span two versions
+    by_engine = {}
+    for position, (engine, user_id, product_id, n) in enumerate(items):
+        by_engine.setdefault(id(engine), (engine, []))[1].append((position, (user_id, product_id, n)))
+
+    results = [None] * len(items)
+    for engine, entries in by_engine.values():
+        batch_results = engine.get_hybrid_recommendations_batch([query for _, query in entries])
+        for (position, _), result in zip(entries, batch_results):
+            results[position] = result
+    return results
+
+
+class BatchedEngine:
+    """
+    Engine wrapper whose get_hybrid_recommendations goes through a shared
+    MicroBatcher; everything else is delegated to the wrapped engine
+    """
+
+    def __init__(self, engine, batcher):
+        self._engine = engine
+        self._batcher = batcher
+
+    def get_hybrid_recommendations(self, user_id=None, product_id=None, n_recommendations=6):
+        return self._batcher.submit((self._engine, user_id, product_id, n_recommendations))
+
+    def __getattr__(self, name):
+        return getattr(self._engine, name)
+
+
+_hybrid_batcher = None
+_hybrid_batcher_lock = threading.Lock()
+
+
+def get_hybrid_batcher():
+    """
+    Process-wide batcher for hybrid queries, configured with
+    ML_MICRO_BATCH_SIZE / ML_MICRO_BATCH_WAIT_MS
+    """
+    global _hybrid_batcher
+    if _hybrid_batcher is None:
+        with _hybrid_batcher_lock:
+            if _hybrid_batcher is None:
+                from django.conf import settings
+                _hybrid_batcher = MicroBatcher(
+                    _score_hybrid,
+                    max_batch=getattr(settings, 'ML_MICRO_BATCH_SIZE', 32),
+                    max_wait=getattr(settings, 'ML_MICRO_BATCH_WAIT_MS', 2) / 1000,
+                    name='hybrid',
+                )
+    return _hybrid_batcher
+
+
+def batched(engine):
+    """``engine`` with micro-batched hybrid queries when ML_MICRO_BATCH is on"""
+    from django.conf import settings
+
+    if not getattr(settings, 'ML_MICRO_BATCH', False):
+        return engine
+    return BatchedEngine(engine, get_hybrid_batcher())
@@ -0,0 +1,169 @@
+"""
+Offline ranking evaluation
+Trains the advanced engine on the older part of UserInteraction (time-based
+split), asks it for recommendations for every user that has newer
+interactions, and scores them against what those users actually did next:
+precision@k, recall@k, NDCG@k and catalog coverage. Also measures request
+latency percentiles of get_hybrid_recommendations and
+get_personalized_recommendations on the trained model.
+"""
+
+import time
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from ml.advanced_recommendation import AdvancedRecommendationEngine
+from ml.data_loader import load_products, load_interactions, stream_product_text
+
+
+def time_split(interaction_df, test_fraction=0.2):
+    """Split interactions at the timestamp quantile: (train_df, test_df, cutoff)"""
+    cutoff = interaction_df['timestamp'].quantile(1 - test_fraction)
+    train_df = interaction_df[interaction_df['timestamp'] <= cutoff]
+    test_df = interaction_df[interaction_df['timestamp'] > cutoff]
+    return train_df, test_df, cutoff
+
+
+def ranking_metrics(recommendations, relevant, k, n_products):
+    """
+    Mean precision@k, recall@k and NDCG@k (binary relevance) over the users
+    in ``relevant``, plus the share of the catalog recommended to anyone
+
+    Args:
+        recommendations: {user_id: [product_id, ...]} ranked best first
+        relevant: {user_id: set of held-out product ids}
+    """
+    discounts = 1.0 / np.log2(np.arange(2, k + 2))
+    precision, recall, ndcg = [], [], []
+    recommended = set()
+
+    for user_id, items in relevant.items():
+        ranked = list(recommendations.get(user_id, []))[:k]
+        recommended.update(ranked)
+        hits = np.array([product_id in items for product_id in ranked], dtype=float)
+
+        precision.append(hits.sum() / k)
+        recall.append(hits.sum() / len(items))
+        ideal = discounts[:min(len(items), k)].sum()
+        ndcg.append((hits * discounts[:len(hits)]).sum() / ideal)
+
+    return {
+        f'precision@{k}': float(np.mean(precision)) if precision else 0.0,
+        f'recall@{k}': float(np.mean(recall)) if recall else 0.0,
+        f'ndcg@{k}': float(np.mean(ndcg)) if ndcg else 0.0,
+        'coverage': len(recommended) / n_products if n_products else 0.0,
+        'users': len(relevant),
+    }
+
+
+def latency_percentiles(fn, calls):
+    """Call ``fn(*args)`` for every args tuple in ``calls``; latency summary in ms"""
+    timings = []
+    for args in calls:
+        started = time.perf_counter()
+        fn(*args)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    if not timings:
+        return None
+    p50, p95, p99 = np.percentile(timings, [50, 95, 99])
+    return {
+        'calls': len(timings),
+        'mean': round(float(np.mean(timings)), 3),
+        'p50': round(float(p50), 3),
+        'p95': round(float(p95), 3),
+        'p99': round(float(p99), 3),
+    }
+
+
+def evaluate(k=10, test_fraction=0.2, latency_samples=200, seed=42, engine=None):
+    """
+    Run the full evaluation against the Django database
+
+    Args:
+        k: Cut-off for the ranking metrics
+        test_fraction: Newest share of interactions held out for testing
+        latency_samples: Calls timed per endpoint
+        engine: Untrained engine to evaluate (default AdvancedRecommendationEngine())
+
+    Returns:
+        JSON-serializable report dict, or None if there is nothing to evaluate
+    """
+    product_df = load_products()
+    interaction_df = load_interactions()
+    if product_df.empty or interaction_df.empty:
+        print("❌ Need products and interactions to evaluate")
+        return None
+
+    train_df, test_df, cutoff = time_split(interaction_df, test_fraction)
+
+    engine = engine or AdvancedRecommendationEngine()
+    started = time.perf_counter()
+    # Same features as train_advanced_model, including name/description TF-IDF
+    engine.fit(product_df, train_df, product_text=stream_product_text())
+    train_seconds = time.perf_counter() - started
+
+    # Held-out products each known user had not interacted with before the cutoff
+    seen = train_df.groupby('user_id')['product_id'].agg(set)
+    relevant = {}
+    cold_users = 0
+    for user_id, product_ids in test_df.groupby('user_id')['product_id']:
+        if user_id not in engine.user_index:
+            cold_users += 1
+            continue
+        items = set(product_ids) - seen.get(user_id, set())
+        items &= engine.product_index.keys()
+        if items:
+            relevant[user_id] = items
+
+    # Context product for hybrid: the user's latest pre-cutoff interaction
+    last_product = train_df.sort_values('timestamp').groupby('user_id')['product_id'].last()
+
+    personalized = {
+        user_id: engine.get_personalized_recommendations(user_id, n_recommendations=k)
+        for user_id in relevant
+    }
+    hybrid = {
+        user_id: engine.get_hybrid_recommendations(
+            user_id=user_id, product_id=last_product.get(user_id), n_recommendations=k
+        )
+        for user_id in relevant
+    }
+    n_products = len(engine.products_list)
+
+    rng = np.random.default_rng(seed)
+    users = np.asarray(engine.users_list or [None])
+    sample_users = rng.choice(users, latency_samples).tolist()
+    sample_products = rng.choice(np.asarray(engine.products_list), latency_samples).tolist()
+    latency = {
+        'get_hybrid_recommendations': latency_percentiles(
+            lambda user_id, product_id: engine.get_hybrid_recommendations(
+                user_id=user_id, product_id=product_id, n_recommendations=k
+            ),
+            list(zip(sample_users, sample_products))
+        ),
+        'get_personalized_recommendations': latency_percentiles(
+            lambda user_id: engine.get_personalized_recommendations(user_id, n_recommendations=k),
+            [(user_id,) for user_id in sample_users]
+        ),
+    }
+
+    return {
+        'generated_at': datetime.now().isoformat(),
+        'engine': type(engine).__name__,
+        'k': k,
+        'split': {
+            'cutoff': pd.Timestamp(cutoff).isoformat(),
+            'test_fraction': test_fraction,
+            'train_interactions': len(train_df),
+            'test_interactions': len(test_df),
+            'evaluated_users': len(relevant),
+            'cold_users_skipped': cold_users,
+        },
+        'train_seconds': round(train_seconds, 3),
+        'metrics': {
+            'personalized': ranking_metrics(personalized, relevant, k, n_products),
+            'hybrid': ranking_metrics(hybrid, relevant, k, n_products),
+        },
+        'latency_ms': latency,
+    }
@@ -1,9 +1,13 @@
 import pandas as pd
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.feature_extraction.text import TfidfVectorizer
-import pickle
-import os
+from scipy import sparse
+from ml.similarity import top_k_cosine_neighbors, DEFAULT_TOP_K
+from ml.artifacts import save_artifact, load_artifact
+from ml.hot_reload import ReloadableEngine
+from ml.trending import trending_engine
+from ml.data_loader import load_products, load_transactions_csv, stream_product_text
+from ml.text_features import product_text_features
+from datetime import datetime
 
 class RecommendationEngine:
     """
@@ -11,17 +15,21 @@ class RecommendationEngine:
     Uses collaborative filtering and content-based recommendations
     """
     
-    def __init__(self, model_path="ml/model.pkl"):
+    def __init__(self, model_path="ml/model", n_neighbors=DEFAULT_TOP_K):
         self.model_path = model_path
+        self.n_neighbors = n_neighbors
         self.user_item_matrix = None
-        self.product_similarity = None
+        self.product_neighbors = None
+        self.product_neighbor_scores = None
         self.product_df = None
         self.products_list = []
+        self.product_index = {}
+        self.model_version = None
         
     def train_from_data(self, csv_path="data/transactions.csv"):
         """Train model from transactions CSV"""
         try:
-            df = pd.read_csv(csv_path)
+            df = load_transactions_csv(csv_path)
             
             # Create user-item matrix
             self.user_item_matrix = df.pivot_table(
@@ -30,13 +38,12 @@ class RecommendationEngine:
                 values="rating"
             ).fillna(0)
             
-            # Calculate user-based collaborative filtering similarity
-            user_similarity = cosine_similarity(self.user_item_matrix)
-            
-            # Calculate product similarity
-            product_similarity = cosine_similarity(self.user_item_matrix.T)
-            
-            self.product_similarity = product_similarity
+            # Item-based similarity: top-K neighbors of each product column
+            self.products_list = list(self.user_item_matrix.columns)
+            self.product_index = {pid: idx for idx, pid in enumerate(self.products_list)}
+            self.product_neighbors, self.product_neighbor_scores = top_k_cosine_neighbors(
+                self.user_item_matrix.T.values, k=self.n_neighbors
+            )
             
             self.save_model()
             print("✓ Model trained from CSV successfully")
@@ -48,36 +55,37 @@ class RecommendationEngine:
     def train_from_database(self):
         """Train model from Django database directly"""
         try:
-            # Import here to avoid circular imports
-            from app.models import Product
+            self.product_df = load_products(fields=('id', 'category', 'price'))
             
-            products = list(Product.objects.all().values())
-            
-            if not products:
+            if self.product_df.empty:
                 print("No products in database")
                 return False
             
-            self.product_df = pd.DataFrame(products)
-            self.products_list = [p['id'] for p in products]
+            self.products_list = self.product_df['id'].tolist()
+            self.product_index = {pid: idx for idx, pid in enumerate(self.products_list)}
             
-            # Content-based: Category + Price similarity
+            # Content-based: Category + Price + name/description TF-IDF similarity
             if len(self.products_list) > 1:
                 # Create simple feature vectors
-                categories = self.product_df['category'].str.lower()
+                n_products = len(self.products_list)
+                codes, _ = pd.factorize(self.product_df['category'].str.lower())
+                categories = sparse.csr_matrix(
+                    (np.ones(n_products, dtype=np.float32), (np.arange(n_products), codes))
+                )
                 prices = self.product_df['price'].values.reshape(-1, 1)
                 
                 # Normalize prices
                 price_normalized = (prices - prices.min()) / (prices.max() - prices.min() + 1)
                 
-                # Combine features
-                features = []
-                for idx, row in self.product_df.iterrows():
-                    cat_vec = [1 if row['category'].lower() == cat else 0 for cat in categories.unique()]
-                    price_feat = price_normalized[idx].tolist()
-                    features.append(cat_vec + price_feat)
+                text = product_text_features(stream_product_text(), self.product_index, n_products)
                 
-                features_array = np.array(features)
-                self.product_similarity = cosine_similarity(features_array)
+                # Combine features (sparse throughout)
+                features_array = sparse.hstack(
+                    [categories, sparse.csr_matrix(price_normalized), text], format='csr', dtype=np.float32
+                )
+                self.product_neighbors, self.product_neighbor_scores = top_k_cosine_neighbors(
+                    features_array, k=self.n_neighbors
+                )
             
             self.save_model()
             print("✓ Model trained from database successfully")
@@ -89,28 +97,15 @@ class RecommendationEngine:
     def get_recommendations(self, product_id, n_recommendations=5):
         """Get product recommendations based on similarity"""
         try:
-            if self.product_similarity is None:
-                self.load_model()
-            
-            if self.product_df is None:
-                from app.models import Product
-                self.product_df = pd.DataFrame(list(Product.objects.all().values()))
-            
             # Find product index
-            if product_id not in self.product_df['id'].values:
+            product_idx = self.product_index.get(product_id)
+            if product_idx is None or self.product_neighbors is None:
                 return []
             
-            product_idx = self.product_df[self.product_df['id'] == product_id].index[0]
-            
-            # Get similarity scores
-            sim_scores = list(enumerate(self.product_similarity[product_idx]))
-            sim_scores = sorted(sim_scores, key=lambda x: x[1], reverse=True)
+            # Neighbor lists are already sorted best-first and exclude the product itself
+            product_indices = self.product_neighbors[product_idx][:n_recommendations]
             
-            # Get top recommendations (excluding the product itself)
-            sim_scores = sim_scores[1:n_recommendations+1]
-            product_indices = [i[0] for i in sim_scores]
-            
-            recommended_ids = self.product_df.iloc[product_indices]['id'].tolist()
+            recommended_ids = [self.products_list[idx] for idx in product_indices]
             return recommended_ids
         except Exception as e:
             print(f"Error getting recommendations: {e}")
@@ -119,9 +114,13 @@ class RecommendationEngine:
     def get_trending_products(self, n_products=6):
         """Get trending/popular products"""
         try:
+            # Time-decayed interaction counters (see ml/trending.py)
+            trending = trending_engine.top(n_products)
+            if trending:
+                return trending
+            
             from app.models import Product
-            # For now, return recently created products
-            # This can be enhanced with view counts or ratings
+            # No recent interactions yet, return recently created products
             trending = Product.objects.all().order_by('-created_at')[:n_products]
             return list(trending.values_list('id', flat=True))
         except Exception as e:
@@ -166,30 +165,44 @@ class RecommendationEngine:
             return []
     
     def save_model(self):
-        """Save trained model to pickle file"""
+        """Save trained model as a memory-mappable artifact directory"""
         try:
-            os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
-            with open(self.model_path, "wb") as f:
-                pickle.dump({
-                    'user_item_matrix': self.user_item_matrix,
-                    'product_similarity': self.product_similarity,
-                    'product_df': self.product_df,
-                    'products_list': self.products_list
-                }, f)
-            print(f"✓ Model saved to {self.model_path}")
+            arrays = {
+                'product_ids': np.asarray(self.products_list, dtype=np.int64),
+                'product_neighbors': self.product_neighbors,
+                'product_neighbor_scores': self.product_neighbor_scores,
+            }
+            if self.user_item_matrix is not None:
+                arrays.update({
+                    'user_item_values': self.user_item_matrix.to_numpy(dtype=np.float32),
+                    'user_item_users': self.user_item_matrix.index.to_numpy(dtype=np.int64),
+                    'user_item_products': self.user_item_matrix.columns.to_numpy(dtype=np.int64),
+                })
+            self.model_version = save_artifact(
+                self.model_path, arrays, {'engine': 'basic', 'trained_at': datetime.now().isoformat()}
+            )
+            print(f"✓ Model saved to {self.model_path} (version {self.model_version})")
         except Exception as e:
             print(f"Error saving model: {e}")
     
     def load_model(self):
-        """Load trained model from pickle file"""
+        """Load trained model (arrays are memory-mapped, not copied)"""
         try:
-            if os.path.exists(self.model_path):
-                with open(self.model_path, "rb") as f:
-                    data = pickle.load(f)
-                    self.user_item_matrix = data.get('user_item_matrix')
-                    self.product_similarity = data.get('product_similarity')
-                    self.product_df = data.get('product_df')
-                    self.products_list = data.get('products_list', [])
+            arrays, meta = load_artifact(self.model_path)
+            if arrays is not None:
+                self.product_neighbors = arrays.get('product_neighbors')
+                self.product_neighbor_scores = arrays.get('product_neighbor_scores')
+                self.products_list = arrays['product_ids'].tolist()
+                self.product_index = {pid: idx for idx, pid in enumerate(self.products_list)}
+                self.user_item_matrix = None
+                if 'user_item_values' in arrays:
+                    self.user_item_matrix = pd.DataFrame(
+                        arrays['user_item_values'],
+                        index=arrays['user_item_users'],
+                        columns=arrays['user_item_products'],
+                        copy=False
+                    )
+                self.model_version = meta['version']
                 print("✓ Model loaded successfully")
                 return True
         except Exception as e:
@@ -197,5 +210,5 @@ class RecommendationEngine:
         return False
 
 
-# Global instance
-recommendation_engine = RecommendationEngine()
+# Global instance, double-buffered so workers pick up newly published versions
+recommendation_engine = ReloadableEngine(RecommendationEngine)
@@ -0,0 +1,129 @@
+"""
+Debounced retrain scheduler
+Coalesces retrain triggers (new products, scheduled jobs, manual requests)
+into a single training run. A run starts once no new trigger has arrived for
+``window`` seconds, or ``max_delay`` seconds after the first pending trigger,
+whichever comes first. Only one training runs at a time; triggers that
+arrive during a run are queued for the next one.
+"""
+
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+
+class RetrainScheduler:
+    """Single background worker that runs ``train_fn`` for batches of triggers"""
+
+    def __init__(self, train_fn, window=30.0, max_delay=300.0, name='retrain'):
+        self.train_fn = train_fn
+        self.window = window
+        self.max_delay = max_delay
+        self.name = name
+        self._condition = threading.Condition()
+        self._thread = None
+        self._pending = Counter()
+        self._first_request = None
+        self._last_request = None
+        self._running = False
+        self._runs = 0
+        self._coalesced = 0
+        self._last_started = None
+        self._last_finished = None
+        self._last_duration = None
+        self._last_error = None
+
+    def request(self, reason='manual'):
+        """Queue a retrain; returns immediately"""
+        with self._condition:
+            now = time.monotonic()
+            if not self._pending:
+                self._first_request = now
+            self._pending[reason] += 1
+            self._last_request = now
+            self._ensure_worker()
+            self._condition.notify()
+
+    def status(self):
+        """Snapshot of the queue state"""
+        with self._condition:
+            return {
+                'name': self.name,
+                'running': self._running,
+                'pending': sum(self._pending.values()),
+                'pending_reasons': dict(self._pending),
+                'next_run_in': round(max(self._due_at() - time.monotonic(), 0), 1) if self._pending else None,
+                'runs': self._runs,
+                'coalesced_triggers': self._coalesced,
+                'last_started': self._last_started.isoformat() if self._last_started else None,
+                'last_finished': self._last_finished.isoformat() if self._last_finished else None,
+                'last_duration': self._last_duration,
+                'last_error': self._last_error,
+            }
+
+    def _ensure_worker(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._work, name=f'{self.name}-scheduler', daemon=True)
+            self._thread.start()
+
+    def _due_at(self):
+        return min(self._last_request + self.window, self._first_request + self.max_delay)
+
+    def _work(self):
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+                # Debounce: keep waiting while triggers keep arriving
+                while time.monotonic() < self._due_at():
+                    self._condition.wait(timeout=self._due_at() - time.monotonic())
+
+                triggers = self._pending
+                self._pending = Counter()
+                self._running = True
+                self._last_started = datetime.now()
+
+            n_triggers = sum(triggers.values())
+            print(f"🔄 {self.name}: training for {n_triggers} trigger(s) {dict(triggers)}")
+            started = time.monotonic()
+            error = None
+            try:
+                self.train_fn()
+            except Exception as e:
+                error = str(e)
+                print(f"⚠️  {self.name}: training failed: {e}")
+
+            with self._condition:
+                self._running = False
+                self._runs += 1
+                self._coalesced += n_triggers - 1
+                self._last_finished = datetime.now()
+                self._last_duration = round(time.monotonic() - started, 3)
+                self._last_error = error
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def _train_from_database():
+    from django.core.management import call_command
+    call_command('train_ml_model', '--source', 'database')
+
+
+def get_retrain_scheduler():
+    """
+    Process-wide scheduler for the product recommendation model, configured
+    with ML_RETRAIN_DEBOUNCE_SECONDS / ML_RETRAIN_MAX_DELAY_SECONDS
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            from django.conf import settings
+            _scheduler = RetrainScheduler(
+                _train_from_database,
+                window=getattr(settings, 'ML_RETRAIN_DEBOUNCE_SECONDS', 30),
+                max_delay=getattr(settings, 'ML_RETRAIN_MAX_DELAY_SECONDS', 300),
+            )
+        return _scheduler
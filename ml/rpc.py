@@ -0,0 +1,324 @@
+"""
+Out-of-process recommendation serving
+A RecommendationServer (started with ``manage.py run_recommendation_server``)
+loads the advanced engine once and answers queries over a Unix socket or a
+local TCP port, so model memory scales with the number of servers instead of
+the number of web workers. Web workers talk to it through a
+RecommendationClient, which has the same query methods as the engine, times
+out quickly and falls back to trending products when the server is down.
+
+Wire format: each message is a 4-byte big-endian length followed by compact
+JSON. A request carries a batch of queries, ``{"q": [[op, *args], ...]}``, and
+the response the model version plus one result per query,
+``{"v": version, "r": [[product_id, ...] or null, ...]}``.
+
+Ops: ``personalized(user_id, n)``, ``hybrid(user_id, product_id, n)``,
+``session([[product_id, weight], ...], n)``, ``trending(n)``, ``version()``
+and, only on a server started with ``allow_retrain``, ``retrain(reason)``.
+Session windows stay in the web process; only the scoring runs in the
+server.
+
+Unix sockets are created owner-only (0600); the default one lives in the
+project's ``var/`` directory rather than a world-writable /tmp.
+"""
+
+import json
+import os
+import socket
+import socketserver
+import struct
+import threading
+import time
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_ADDRESS = 'unix:' + os.path.join(PROJECT_DIR, 'var', 'recommendations.sock')
+
+# Largest message either side accepts
+MAX_MESSAGE_BYTES = 1 << 20
+
+_HEADER = struct.Struct('>I')
+
+
+class ConnectionClosed(Exception):
+    pass
+
+
+def parse_address(address):
+    """'unix:/path' or 'tcp:host:port' -> (socket family, socket address)"""
+    scheme, _, rest = address.partition(':')
+    if scheme == 'unix':
+        return socket.AF_UNIX, rest
+    if scheme == 'tcp':
+        host, _, port = rest.rpartition(':')
+        return socket.AF_INET, (host or '127.0.0.1', int(port))
+    raise ValueError(f"Unsupported recommendation server address: {address}")
+
+
+def send_message(sock, message):
+    payload = json.dumps(message, separators=(',', ':')).encode()
+    sock.sendall(_HEADER.pack(len(payload)) + payload)
+
+
+def _recv_exactly(sock, size, deadline=None):
+    chunks, remaining = [], size
+    while remaining:
+        if deadline is not None:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                raise socket.timeout('recommendation server timed out')
+            sock.settimeout(timeout)
+        chunk = sock.recv(min(remaining, 1 << 16))
+        if not chunk:
+            raise ConnectionClosed()
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b''.join(chunks)
+
+
+def recv_message(sock, deadline=None):
+    (size,) = _HEADER.unpack(_recv_exactly(sock, _HEADER.size, deadline))
+    if size > MAX_MESSAGE_BYTES:
+        raise ValueError(f"Message of {size} bytes exceeds MAX_MESSAGE_BYTES")
+    return json.loads(_recv_exactly(sock, size, deadline))
+
+
+# ===== SERVER =====
+
+class _QueryHandler(socketserver.BaseRequestHandler):
+    """One client connection; answers messages until the client hangs up"""
+
+    def handle(self):
+        while True:
+            try:
+                message = recv_message(self.request)
+            except (ConnectionClosed, ConnectionResetError):
+                return
+            except Exception as e:
+                print(f"Recommendation server: bad message: {e}")
+                return
+            try:
+                send_message(self.request, self.server.answer(message.get('q', [])))
+            except OSError:
+                return
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class _TCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class RecommendationServer:
+    """
+    Serves the advanced engine over ``address`` ('unix:/path' or 'tcp:host:port')
+
+    Queries run against the hot-reloading global engine, pinned once per
+    message, so a batch is always answered by a single model version. The
+    ``retrain`` op is refused unless ``allow_retrain`` is set.
+    """
+
+    def __init__(self, address=DEFAULT_ADDRESS, allow_retrain=False):
+        self.address = address
+        self.allow_retrain = allow_retrain
+        self._server = None
+
+    def answer(self, queries):
+        from ml.engines import advanced_recommendation_engine
+        from ml.micro_batch import batched
+
+        # Hybrid queries of concurrent connections are scored together
+        engine = batched(advanced_recommendation_engine.engine)
+        results = []
+        for query in queries:
+            try:
+                results.append(self._run(engine, query[0], *query[1:]))
+            except Exception as e:
+                print(f"Recommendation server: query {query!r} failed: {e}")
+                results.append(None)
+        return {'v': engine.model_version, 'r': results}
+
+    def _run(self, engine, op, *args):
+        if op == 'personalized':
+            user_id, n = args
+            ids = engine.get_personalized_recommendations(user_id=user_id, n_recommendations=n)
+        elif op == 'hybrid':
+            user_id, product_id, n = args
+            ids = engine.get_hybrid_recommendations(user_id=user_id, product_id=product_id, n_recommendations=n)
+        elif op == 'session':
+            recent, n = args
+            ids = engine.get_session_recommendations(recent, n_recommendations=n)
+        elif op == 'trending':
+            (n,) = args
+            ids = engine.get_trending_products(n)
+        elif op == 'version':
+            return engine.model_version
+        elif op == 'retrain':
+            if not self.allow_retrain:
+                raise ValueError("retrain is disabled on this server")
+            from ml.retrain_scheduler import get_retrain_scheduler
+            get_retrain_scheduler().request(*args)
+            return True
+        else:
+            raise ValueError(f"unknown op {op!r}")
+        return [int(product_id) for product_id in ids]
+
+    def serve_forever(self):
+        family, address = parse_address(self.address)
+        if family == socket.AF_UNIX:
+            os.makedirs(os.path.dirname(address) or '.', mode=0o700, exist_ok=True)
+            if os.path.exists(address):
+                os.unlink(address)
+            self._server = _UnixServer(address, _QueryHandler)
+            # Only the server's user may connect
+            os.chmod(address, 0o600)
+        else:
+            self._server = _TCPServer(address, _QueryHandler)
+        self._server.answer = self.answer
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            if family == socket.AF_UNIX and os.path.exists(address):
+                os.unlink(address)
+
+    def shutdown(self):
+        if self._server is not None:
+            self._server.shutdown()
+
+
+# ===== CLIENT =====
+
+class RecommendationClient:
+    """
+    Engine-shaped client of a RecommendationServer
+
+    Every call is bounded by ``timeout`` seconds. A failed call answers with
+    trending products and marks the server down for ``retry_after`` seconds,
+    so an unavailable server costs one timeout, not one per request.
+    Connections are kept open, one per thread.
+    """
+
+    def __init__(self, address=DEFAULT_ADDRESS, timeout=0.25, retry_after=5.0, check_interval=2.0):
+        self.address = address
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self.check_interval = check_interval
+        self._local = threading.local()
+        self._down_until = 0.0
+        self._version = None
+        self._next_version_check = 0.0
+
+    def _connection(self):
+        sock = getattr(self._local, 'sock', None)
+        if sock is None:
+            family, address = parse_address(self.address)
+            sock = socket.socket(family, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(address)
+            self._local.sock = sock
+        return sock
+
+    def _close(self):
+        sock = getattr(self._local, 'sock', None)
+        self._local.sock = None
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+
+    def call(self, queries):
+        """
+        Send one batch of queries; list of results, or None if the server
+        couldn't answer in time
+        """
+        if time.monotonic() < self._down_until:
+            return None
+        deadline = time.monotonic() + self.timeout
+        try:
+            sock = self._connection()
+            sock.settimeout(self.timeout)
+            send_message(sock, {'q': queries})
+            response = recv_message(sock, deadline)
+        except Exception as e:
+            # A half-read response would desync the stream, so always reconnect
+            self._close()
+            self._down_until = time.monotonic() + self.retry_after
+            print(f"Recommendation server unavailable ({e}), using fallback")
+            return None
+        self._version = response.get('v')
+        return response.get('r')
+
+    def batch(self, queries):
+        """
+        Results of several recommendation queries (their last argument is n)
+        in one round trip; failed ones fall back to trending
+        """
+        results = self.call(queries) or [None] * len(queries)
+        return [
+            result if result is not None else self._fallback(query[-1])
+            for query, result in zip(queries, results)
+        ]
+
+    def _fallback(self, n):
+        from ml.trending import trending_engine
+        trending = trending_engine.top(n)
+        if trending:
+            return trending
+        from app.models import Product
+        return list(Product.objects.order_by('-created_at').values_list('id', flat=True)[:n])
+
+    @property
+    def model_version(self):
+        """Server's model version, re-checked at most every check_interval"""
+        now = time.monotonic()
+        if now >= self._next_version_check:
+            self._next_version_check = now + self.check_interval
+            self.call([['version']])
+        return self._version
+
+    def get_personalized_recommendations(self, user_id, n_recommendations=6):
+        return self.batch([['personalized', user_id, n_recommendations]])[0]
+
+    def get_hybrid_recommendations(self, user_id=None, product_id=None, n_recommendations=6):
+        return self.batch([['hybrid', user_id, product_id, n_recommendations]])[0]
+
+    def get_session_recommendations(self, recent_products, n_recommendations=6):
+        # No trending fallback: the caller falls back to its regular recommendations
+        results = self.call([['session', [list(item) for item in recent_products], n_recommendations]])
+        return (results[0] if results else None) or []
+
+    def get_trending_products(self, n_products=6):
+        return self.batch([['trending', n_products]])[0]
+
+    def request_retrain(self, reason='manual'):
+        """Queue a retrain in the server process; False if it can't be reached"""
+        results = self.call([['retrain', reason]])
+        return bool(results and results[0])
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_recommendation_client():
+    """
+    Process-wide client for ML_RECOMMENDATION_SERVER, or None when
+    recommendations are served in-process
+    """
+    global _client
+    from django.conf import settings
+
+    address = getattr(settings, 'ML_RECOMMENDATION_SERVER', None)
+    if not address:
+        return None
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = RecommendationClient(
+                    address, timeout=getattr(settings, 'ML_RECOMMENDATION_TIMEOUT', 0.25)
+                )
+    return _client
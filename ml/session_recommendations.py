@@ -0,0 +1,119 @@
+"""
+Session-based real-time recommendations
+Keeps a short window of the products each browsing session viewed or carted,
+in memory, and scores candidates from the model's precomputed product
+neighbor lists on every request:
+
+    score(c) = sum over window entries j of  w_j * decay ** age_j * sim(p_j, c)
+
+where w_j is the interaction weight and age_j the number of newer entries.
+Anonymous visitors and logged-in users get suggestions that follow the
+current session without a retrain and without touching the database.
+
+The store is bounded: at most ``window`` entries per session and
+``max_sessions`` sessions, least recently active first out. Sessions idle for
+``session_ttl`` seconds are forgotten. State is per process, like
+ml.trending; with several web workers, a session only sees what its own
+worker recorded.
+"""
+
+import threading
+import time
+from collections import OrderedDict, deque
+
+# Interactions kept in a window, weighted by UserInteraction.INTERACTION_WEIGHTS
+SESSION_INTERACTIONS = ('view', 'click', 'wishlist', 'cart')
+
+
+def session_weight(interaction_type):
+    """Window weight of ``interaction_type``, None if it isn't kept"""
+    if interaction_type not in SESSION_INTERACTIONS:
+        return None
+    # Imported here so this module stays importable before Django is set up
+    from app.models import UserInteraction
+    return UserInteraction.INTERACTION_WEIGHTS.get(interaction_type, 1.0)
+
+
+class SessionRecommender:
+    """
+    Bounded per-session windows of recent products
+
+    Args:
+        window: Recent products kept per session
+        max_sessions: Sessions kept in memory
+        session_ttl: Seconds of inactivity after which a session is dropped
+        decay: Weight multiplier per newer product in the window
+    """
+
+    def __init__(self, window=10, max_sessions=10000, session_ttl=1800, decay=0.8):
+        self.window = window
+        self.max_sessions = max_sessions
+        self.session_ttl = session_ttl
+        self.decay = decay
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, session_id, product_id, interaction_type='view'):
+        """Add a product to the session's window (other interaction types are ignored)"""
+        weight = session_weight(interaction_type)
+        if not session_id or weight is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            entry = self._sessions.pop(session_id, None)
+            if entry is None or now - entry[0] > self.session_ttl:
+                entry = (now, deque(maxlen=self.window))
+            recent = entry[1]
+            # A product viewed again moves to the front, keeping its strongest weight
+            for position, (previous_id, previous_weight) in enumerate(recent):
+                if previous_id == product_id:
+                    del recent[position]
+                    weight = max(weight, previous_weight)
+                    break
+            recent.append((product_id, weight))
+            self._sessions[session_id] = (now, recent)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def recent(self, session_id):
+        """(product_id, weight) pairs of the session, newest last, recency decay applied"""
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return []
+            if time.monotonic() - entry[0] > self.session_ttl:
+                del self._sessions[session_id]
+                return []
+            recent = list(entry[1])
+        last = len(recent) - 1
+        return [(product_id, weight * self.decay ** (last - position))
+                for position, (product_id, weight) in enumerate(recent)]
+
+    def recommend(self, session_id, engine, n=6, min_products=1):
+        """
+        Ids for the session from ``engine``'s neighbor lists, [] while the
+        session's window has fewer than ``min_products`` products
+        """
+        recent = self.recent(session_id)
+        if not recent or len(recent) < min_products:
+            return []
+        try:
+            return engine.get_session_recommendations(recent, n_recommendations=n)
+        except Exception as e:
+            print(f"Session recommendation error: {e}")
+            return []
+
+    def forget(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'sessions': len(self._sessions),
+                'products': sum(len(recent) for _, recent in self._sessions.values()),
+            }
+
+
+# Global instance, fed by app.tracking
+session_recommender = SessionRecommender()
@@ -0,0 +1,91 @@
+"""
+Similarity helpers shared by the recommendation engines
+Keeps only the top-K neighbors of each row instead of a dense N x N matrix.
+Rows are scored block by block, so only a (block x N) slice of similarities
+exists at any time, and blocks are spread over a thread pool since the
+BLAS / sparse matmul and partition calls doing the work release the GIL.
+"""
+
+import os
+import numpy as np
+from scipy import sparse
+from sklearn.preprocessing import normalize
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_TOP_K = 50
+
+# Similarity cells per block; each costs 4 bytes (float32 score) plus 8
+# (argpartition index), i.e. ~48 MB of scratch per worker
+BLOCK_CELLS = 1 << 22
+
+
+def _unit_rows(features):
+    """L2-normalized float32 copy of ``features``, CSR if it was sparse"""
+    if sparse.issparse(features):
+        features = sparse.csr_matrix(features, dtype=np.float32)
+    else:
+        features = np.asarray(features, dtype=np.float32)
+    # Zero rows stay zero, i.e. similarity 0 to everything
+    return normalize(features, norm='l2', copy=True)
+
+
+def _block_top_k(unit, unit_t, start, stop, k, neighbors, scores):
+    """Fill ``neighbors``/``scores`` rows [start, stop) from one similarity block"""
+    similarity = unit[start:stop] @ unit_t
+    if sparse.issparse(similarity):
+        similarity = similarity.toarray()
+    # Negated in place so partitioning needs no second block-sized copy
+    distance = np.negative(similarity, out=np.asarray(similarity, dtype=np.float32))
+    rows = np.arange(stop - start)
+    distance[rows, rows + start] = np.inf
+
+    # Unordered top k per row, then sort just those k entries
+    top = np.argpartition(distance, k - 1, axis=1)[:, :k]
+    top_distance = np.take_along_axis(distance, top, axis=1)
+    order = np.argsort(top_distance, axis=1, kind='stable')
+
+    neighbors[start:stop] = np.take_along_axis(top, order, axis=1)
+    scores[start:stop] = -np.take_along_axis(top_distance, order, axis=1)
+
+
+def top_k_cosine_neighbors(features, k=DEFAULT_TOP_K, workers=None, block_rows=None):
+    """
+    Find the k most similar rows (by cosine similarity) for every row
+
+    Args:
+        features: (n_rows, n_features) matrix, dense or sparse
+        k: Number of neighbors to keep per row (capped at n_rows - 1)
+        workers: Threads scoring blocks in parallel (defaults to the CPU count)
+        block_rows: Rows per block (defaults to BLOCK_CELLS // n_rows)
+
+    Returns:
+        (neighbors, scores): int32 row indices and float32 similarities of
+        shape (n_rows, k), best match first. A row is never its own neighbor.
+    """
+    n_rows = features.shape[0]
+    k = max(0, min(k, n_rows - 1))
+
+    neighbors = np.zeros((n_rows, k), dtype=np.int32)
+    scores = np.zeros((n_rows, k), dtype=np.float32)
+    if k == 0:
+        return neighbors, scores
+
+    unit = _unit_rows(features)
+    unit_t = unit.T.tocsr() if sparse.issparse(unit) else unit.T
+    block_rows = block_rows or max(1, BLOCK_CELLS // n_rows)
+    blocks = [(start, min(start + block_rows, n_rows)) for start in range(0, n_rows, block_rows)]
+    workers = min(workers or os.cpu_count() or 1, len(blocks))
+
+    if workers == 1:
+        for start, stop in blocks:
+            _block_top_k(unit, unit_t, start, stop, k, neighbors, scores)
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_block_top_k, unit, unit_t, start, stop, k, neighbors, scores)
+                for start, stop in blocks
+            ]
+            for future in futures:
+                future.result()
+
+    return neighbors, scores
@@ -0,0 +1,72 @@
+"""
+Product text features
+TF-IDF over product name and description, sparse end to end. Text is hashed
+chunk by chunk as it streams in (HashingVectorizer is stateless, so there is
+no vocabulary to fit or hold in memory); only the document frequencies are
+fitted over the whole catalog, by TfidfTransformer on the sparse counts.
+"""
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+
+# Hashed vocabulary size; collisions are rare at catalog scale
+N_FEATURES = 1 << 18
+
+TEXT_CHUNK_SIZE = 2000
+
+
+def _vectorizer():
+    return HashingVectorizer(
+        n_features=N_FEATURES,
+        stop_words='english',
+        alternate_sign=False,
+        norm=None,
+        dtype=np.float32,
+    )
+
+
+def frame_text_chunks(product_df, chunk_size=TEXT_CHUNK_SIZE):
+    """(product_ids, texts) chunks from a frame's name/description columns"""
+    for start in range(0, len(product_df), chunk_size):
+        chunk = product_df.iloc[start:start + chunk_size]
+        texts = chunk['name'].fillna('').astype(str) + ' ' + chunk['description'].fillna('').astype(str)
+        yield chunk['id'].to_numpy(), texts.tolist()
+
+
+def product_text_features(text_chunks, product_index, n_products):
+    """
+    L2-normalized TF-IDF rows of every product
+
+    Args:
+        text_chunks: Iterable of (product_ids, texts) chunks
+        product_index: {product_id: row} of the trained catalog; text of
+            other products is skipped
+        n_products: Number of rows
+
+    Returns:
+        (n_products, N_FEATURES) float32 CSR matrix in product_index order.
+        Products without text are zero rows.
+    """
+    vectorizer = _vectorizer()
+    rows, counts = [], []
+    for product_ids, texts in text_chunks:
+        positions = np.fromiter((product_index.get(pid, -1) for pid in product_ids), np.int64, len(product_ids))
+        known = positions >= 0
+        if known.any():
+            rows.append(positions[known])
+            counts.append(vectorizer.transform(texts)[known])
+
+    if not counts:
+        return sparse.csr_matrix((n_products, N_FEATURES), dtype=np.float32)
+
+    # Place each hashed row at its product's position
+    counts = sparse.vstack(counts).tocsr()
+    placement = sparse.csr_matrix(
+        (np.ones(counts.shape[0], dtype=np.float32), (np.concatenate(rows), np.arange(counts.shape[0]))),
+        shape=(n_products, counts.shape[0])
+    )
+    counts = placement.dot(counts).tocsr()
+
+    tfidf = TfidfTransformer(sublinear_tf=True).fit_transform(counts)
+    return tfidf.astype(np.float32).tocsr()
@@ -43,7 +43,7 @@ def train_model(source='database'):
     if success:
         print(f"\n✅ Training completed successfully!")
         print(f"⏱️  Time taken: {elapsed:.2f} seconds")
-        print(f"💾 Model saved to: ml/model.pkl\n")
+        print(f"💾 Model saved to: {recommendation_engine.model_path}/\n")
         
         # Evaluate model
         print("📈 Model Evaluation:")
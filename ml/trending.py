@@ -0,0 +1,178 @@
+"""
+Real-time trending products
+Keeps an exponentially decayed, weighted interaction counter per product:
+
+    score(p, t) = sum over interactions i on p of  w_i * 2 ** (-(t - t_i) / half_life)
+
+Counters are stored relative to a fixed reference time, so every counter
+decays at the same rate and the ranking never changes by itself; a new
+interaction is a single addition and the top-K set can be kept exactly in
+memory. New UserInteraction rows are pulled by primary-key watermark on a
+debounced background worker (a RetrainScheduler), so top() serves the
+current counters and request threads never wait for the database. Until
+the first pull has finished the top-K set is empty.
+"""
+
+import logging
+import math
+import threading
+import time
+from datetime import timedelta
+from ml.retrain_scheduler import RetrainScheduler
+
+logger = logging.getLogger(__name__)
+
+# Rebase stored counters once the scale factor reaches e ** REBASE_EXPONENT
+REBASE_EXPONENT = 30.0
+
+
+class TrendingEngine:
+    """
+    Decayed per-product counters with an incrementally maintained top-K
+
+    Args:
+        half_life_hours: Time for an interaction's contribution to halve
+        capacity: Size of the top-K set (largest n served by top())
+        bootstrap_half_lives: History loaded on first refresh, in half-lives
+        refresh_interval: Minimum seconds between serving-triggered pulls
+        debounce: Seconds the background worker waits to batch requested pulls
+    """
+
+    def __init__(self, half_life_hours=24.0, capacity=100, bootstrap_half_lives=4, refresh_interval=5.0,
+                 debounce=0.5):
+        self.half_life = half_life_hours * 3600
+        self.tau = self.half_life / math.log(2)
+        self.capacity = capacity
+        self.bootstrap_window = timedelta(seconds=self.half_life * bootstrap_half_lives)
+        self.refresh_interval = refresh_interval
+        self._scheduler = RetrainScheduler(
+            self._scheduled_refresh, window=debounce, max_delay=max(debounce, 5.0), name='trending'
+        )
+        self._scores = {}
+        self._top = {}
+        self._top_min = None
+        self._reference = None
+        self._watermark = None
+        self._next_refresh = 0.0
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    def add(self, product_id, weight, timestamp):
+        """Count one interaction (``timestamp`` in epoch seconds)"""
+        with self._lock:
+            self._add(product_id, weight, timestamp)
+
+    def _add(self, product_id, weight, timestamp):
+        self._merge({product_id: weight}, timestamp)
+
+    def _merge(self, partial, reference):
+        """Add ``{product_id: decayed weight}`` counters stored relative to ``reference``"""
+        if self._reference is None:
+            self._reference = reference
+        exponent = (reference - self._reference) / self.tau
+        if exponent > REBASE_EXPONENT:
+            self._rebase(reference)
+            exponent = 0.0
+
+        scale = math.exp(exponent)
+        for product_id, weight in partial.items():
+            score = self._scores.get(product_id, 0.0) + weight * scale
+            self._scores[product_id] = score
+            self._offer(product_id, score)
+
+    def _offer(self, product_id, score):
+        """
+        Update the top-K set. Stored scores only grow, so a product can only
+        enter the set through its own increment.
+        """
+        if product_id in self._top or len(self._top) < self.capacity:
+            self._top[product_id] = score
+            if self._top_min is None or self._top_min == product_id or score < self._top[self._top_min]:
+                self._top_min = min(self._top, key=self._top.get)
+        elif score > self._top[self._top_min]:
+            del self._top[self._top_min]
+            self._top[product_id] = score
+            self._top_min = min(self._top, key=self._top.get)
+
+    def _rebase(self, timestamp):
+        """Move the reference time forward, dropping counters that decayed to nothing"""
+        factor = math.exp(-(timestamp - self._reference) / self.tau)
+        self._scores = {pid: s * factor for pid, s in self._scores.items() if s * factor > 1e-9}
+        self._top = {pid: s * factor for pid, s in self._top.items()}
+        self._reference = timestamp
+
+    def top(self, n=6):
+        """Product ids of the ``n`` hottest products right now"""
+        self.maybe_refresh()
+        with self._lock:
+            ranked = sorted(self._top.items(), key=lambda item: item[1], reverse=True)
+        return [product_id for product_id, _ in ranked[:n]]
+
+    def maybe_refresh(self):
+        """Request a background pull at most every refresh_interval seconds"""
+        now = time.monotonic()
+        if now < self._next_refresh:
+            return
+        self._next_refresh = now + self.refresh_interval
+        self.request_refresh('serve')
+
+    def request_refresh(self, reason='serve'):
+        """Queue a pull of new interactions on the background worker; returns immediately"""
+        self._scheduler.request(reason)
+
+    def _scheduled_refresh(self):
+        try:
+            self.refresh()
+        except Exception:
+            logger.exception("Trending refresh failed")
+
+    def refresh(self):
+        """
+        Pull interactions newer than the watermark (a recent window on first
+        use) in the calling thread. Rows are summed per product while
+        streaming, without the lock; the lock is only held to merge those
+        sums, so top() never waits for the pull.
+        """
+        with self._refresh_lock:
+            self._pull()
+
+    def _pull(self):
+        from django.utils import timezone
+        from app.models import UserInteraction
+
+        weights = UserInteraction.INTERACTION_WEIGHTS
+        interactions = UserInteraction.objects.order_by('id')
+        if self._watermark is None:
+            latest = UserInteraction.objects.order_by('-id').values_list('id', flat=True).first() or 0
+            interactions = interactions.filter(
+                id__lte=latest, timestamp__gte=timezone.now() - self.bootstrap_window
+            )
+        else:
+            latest = None
+            interactions = interactions.filter(id__gt=self._watermark)
+
+        rows = interactions.values_list('id', 'product_id', 'interaction_type', 'timestamp')
+        partial, reference, last_id = {}, None, None
+        for interaction_id, product_id, interaction_type, timestamp in rows.iterator(chunk_size=2000):
+            timestamp = timestamp.timestamp()
+            if reference is None:
+                reference = timestamp
+            exponent = (timestamp - reference) / self.tau
+            if exponent > REBASE_EXPONENT:
+                factor = math.exp(-exponent)
+                partial = {pid: s * factor for pid, s in partial.items()}
+                reference, exponent = timestamp, 0.0
+            partial[product_id] = partial.get(product_id, 0.0) + weights.get(interaction_type, 1.0) * math.exp(exponent)
+            last_id = interaction_id
+
+        with self._lock:
+            if latest is not None:
+                self._watermark = latest
+            if partial:
+                self._merge(partial, reference)
+            if last_id is not None:
+                self._watermark = max(self._watermark, last_id)
+
+
+# Global instance, shared by both recommendation engines
+trending_engine = TrendingEngine()
@@ -0,0 +1,233 @@
+"""
+Columnar per-user tables for the advanced recommendation engine
+User preferences and interaction history are kept as flat NumPy arrays
+aligned to ``users_list`` (so they can be saved as .npy files and
+memory-mapped), behind read-only mappings keyed by user id.
+Updates are copy-on-write: they return a new table.
+"""
+
+from collections.abc import Mapping
+import numpy as np
+
+
+class RaggedArray:
+    """Variable-length rows packed CSR-style into ``indptr`` and ``values``"""
+    
+    def __init__(self, indptr, values):
+        self.indptr = indptr
+        self.values = values
+    
+    @classmethod
+    def from_lists(cls, lists, dtype):
+        lengths = np.fromiter((len(row) for row in lists), dtype=np.int64, count=len(lists))
+        indptr = np.zeros(len(lists) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        values = np.fromiter((value for row in lists for value in row), dtype=dtype, count=int(indptr[-1]))
+        return cls(indptr, values)
+    
+    @classmethod
+    def from_sorted_rows(cls, rows, values, n_rows):
+        """Pack ``values`` whose row numbers ``rows`` are already sorted ascending"""
+        indptr = np.zeros(n_rows + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n_rows), out=indptr[1:])
+        return cls(indptr, np.asarray(values))
+    
+    def __len__(self):
+        return len(self.indptr) - 1
+    
+    def row(self, idx):
+        if idx >= len(self):
+            return self.values[:0]
+        return self.values[self.indptr[idx]:self.indptr[idx + 1]]
+    
+    def replace_rows(self, rows, new_rows, n_rows):
+        """
+        Return a copy with ``rows`` replaced by ``new_rows`` (a RaggedArray or
+        a list of sequences, one per row), grown to ``n_rows`` rows
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        old_lengths = np.diff(self.indptr)
+        lengths = np.zeros(n_rows, dtype=np.int64)
+        lengths[:len(old_lengths)] = old_lengths
+        if isinstance(new_rows, RaggedArray):
+            new_lengths = np.diff(new_rows.indptr)
+        else:
+            new_lengths = [len(row) for row in new_rows]
+        lengths[rows] = new_lengths
+        
+        indptr = np.zeros(n_rows + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        values = np.empty(int(indptr[-1]), dtype=self.values.dtype)
+        
+        # Move untouched rows in one vectorized copy
+        owner = np.repeat(np.arange(len(old_lengths)), old_lengths)
+        kept = ~np.isin(owner, rows)
+        offset_in_row = np.arange(len(self.values)) - self.indptr[owner]
+        values[indptr[owner[kept]] + offset_in_row[kept]] = self.values[kept]
+        
+        if isinstance(new_rows, RaggedArray):
+            owner = np.repeat(rows, new_lengths)
+            offset_in_row = np.arange(len(new_rows.values)) - np.repeat(new_rows.indptr[:-1], new_lengths)
+            values[indptr[owner] + offset_in_row] = new_rows.values
+        else:
+            for row, new_row in zip(rows, new_rows):
+                values[indptr[row]:indptr[row + 1]] = new_row
+        return RaggedArray(indptr, values)
+    
+    def take_rows(self, rows):
+        """RaggedArray of ``rows`` (rows past the end are empty)"""
+        rows = np.asarray(rows, dtype=np.int64)
+        present = rows < len(self)
+        lengths = np.zeros(len(rows), dtype=np.int64)
+        starts = np.zeros(len(rows), dtype=np.int64)
+        lengths[present] = self.indptr[rows[present] + 1] - self.indptr[rows[present]]
+        starts[present] = self.indptr[rows[present]]
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        offset_in_row = np.arange(int(indptr[-1])) - np.repeat(indptr[:-1], lengths)
+        return RaggedArray(indptr, self.values[np.repeat(starts, lengths) + offset_in_row])
+    
+    def to_arrays(self, prefix):
+        return {f'{prefix}_indptr': self.indptr, f'{prefix}_values': self.values}
+    
+    @classmethod
+    def from_arrays(cls, arrays, prefix):
+        return cls(arrays[f'{prefix}_indptr'], arrays[f'{prefix}_values'])
+
+
+class InteractionHistory(Mapping):
+    """user_id -> recently interacted product ids, most recent first"""
+    
+    def __init__(self, user_index, products):
+        self.user_index = user_index
+        self.products = products
+    
+    @classmethod
+    def from_dict(cls, history, user_index, n_users):
+        lists = [[] for _ in range(n_users)]
+        for user_id, product_ids in history.items():
+            if user_id in user_index:
+                lists[user_index[user_id]] = product_ids
+        return cls(user_index, RaggedArray.from_lists(lists, np.int64))
+    
+    def _row(self, user_id):
+        idx = self.user_index.get(user_id)
+        return self.products.row(idx) if idx is not None else self.products.values[:0]
+    
+    def __getitem__(self, user_id):
+        row = self._row(user_id)
+        if len(row) == 0:
+            raise KeyError(user_id)
+        return row.tolist()
+    
+    def __contains__(self, user_id):
+        return len(self._row(user_id)) > 0
+    
+    def __iter__(self):
+        non_empty = np.flatnonzero(np.diff(self.products.indptr) > 0)
+        users = list(self.user_index)
+        return (users[idx] for idx in non_empty)
+    
+    def __len__(self):
+        return int(np.count_nonzero(np.diff(self.products.indptr)))
+    
+    def with_rows(self, rows, products, n_users):
+        """Copy with the histories of user ``rows`` replaced by the rows of ``products`` (a RaggedArray)"""
+        return InteractionHistory(self.user_index, self.products.replace_rows(rows, products, n_users))
+    
+    def to_arrays(self):
+        return self.products.to_arrays('history')
+    
+    @classmethod
+    def from_arrays(cls, arrays, user_index):
+        return cls(user_index, RaggedArray.from_arrays(arrays, 'history'))
+
+
+class UserPreferences(Mapping):
+    """user_id -> {'preferred_categories', 'avg_price', 'interaction_count', 'avg_rating'}"""
+    
+    def __init__(self, user_index, category_names, categories, avg_price, avg_rating, interaction_count):
+        self.user_index = user_index
+        self.category_names = list(category_names)
+        self.categories = categories  # RaggedArray of codes into category_names
+        self.avg_price = avg_price
+        self.avg_rating = avg_rating
+        self.interaction_count = interaction_count
+    
+    @classmethod
+    def from_dict(cls, prefs, user_index, n_users, category_names):
+        code_of = {name: code for code, name in enumerate(category_names)}
+        categories = [[] for _ in range(n_users)]
+        avg_price = np.zeros(n_users, dtype=np.float32)
+        avg_rating = np.zeros(n_users, dtype=np.float32)
+        interaction_count = np.zeros(n_users, dtype=np.int32)
+        
+        for user_id, pref in prefs.items():
+            idx = user_index.get(user_id)
+            if idx is None:
+                continue
+            categories[idx] = [code_of[name] for name in pref['preferred_categories']]
+            avg_price[idx] = pref['avg_price']
+            avg_rating[idx] = pref['avg_rating']
+            interaction_count[idx] = pref['interaction_count']
+        
+        return cls(user_index, category_names, RaggedArray.from_lists(categories, np.int32),
+                   avg_price, avg_rating, interaction_count)
+    
+    def _idx(self, user_id):
+        """Row of a user with preferences, else None"""
+        idx = self.user_index.get(user_id)
+        if idx is None or len(self.categories.row(idx)) == 0:
+            return None
+        return idx
+    
+    def __getitem__(self, user_id):
+        idx = self._idx(user_id)
+        if idx is None:
+            raise KeyError(user_id)
+        return {
+            'preferred_categories': [self.category_names[code] for code in self.categories.row(idx)],
+            'avg_price': float(self.avg_price[idx]),
+            'interaction_count': int(self.interaction_count[idx]),
+            'avg_rating': float(self.avg_rating[idx])
+        }
+    
+    def __contains__(self, user_id):
+        return self._idx(user_id) is not None
+    
+    def __iter__(self):
+        non_empty = np.flatnonzero(np.diff(self.categories.indptr) > 0)
+        users = list(self.user_index)
+        return (users[idx] for idx in non_empty)
+    
+    def __len__(self):
+        return int(np.count_nonzero(np.diff(self.categories.indptr)))
+    
+    def with_rows(self, rows, categories, avg_price, avg_rating, interaction_count, n_users):
+        """
+        Copy with the preferences of user ``rows`` replaced; ``categories``
+        is a RaggedArray and the other columns are arrays, one entry per row
+        """
+        def grown(array, new_values):
+            out = np.zeros(n_users, dtype=array.dtype)
+            out[:len(array)] = array
+            out[rows] = new_values
+            return out
+        
+        rows = np.asarray(rows, dtype=np.int64)
+        return UserPreferences(self.user_index, self.category_names, self.categories.replace_rows(rows, categories, n_users),
+                               grown(self.avg_price, avg_price), grown(self.avg_rating, avg_rating),
+                               grown(self.interaction_count, interaction_count))
+    
+    def to_arrays(self):
+        return {
+            **self.categories.to_arrays('pref_categories'),
+            'pref_avg_price': self.avg_price,
+            'pref_avg_rating': self.avg_rating,
+            'pref_interaction_count': self.interaction_count,
+        }
+    
+    @classmethod
+    def from_arrays(cls, arrays, user_index, category_names):
+        return cls(user_index, category_names, RaggedArray.from_arrays(arrays, 'pref_categories'),
+                   arrays['pref_avg_price'], arrays['pref_avg_rating'], arrays['pref_interaction_count'])